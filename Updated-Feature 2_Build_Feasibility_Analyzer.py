@@ -1,68 +1,17 @@
-
-import streamlit as st
-
-st.set_page_config(
-    page_title="SafeSpace AI",
-    page_icon="🏗️",
-    layout="wide"
-)
-
-st.markdown("""
-   <style>
-   .stApp {
-       background-color: #ffffff;
-   }
-   .st-emotion-cache-18ni7ap {
-       background-color: #bfd7ed;
-   }
-   .st-emotion-cache-16idsys p {
-       color: #000000 !important;
-       font-weight: 500;
-   }
-   .st-emotion-cache-10trblm {
-       color: #000000 !important;
-       font-weight: 600;
-   }
-   .st-emotion-cache-1gulkj5 {
-       background-color: #ffffff;
-   }
-   div[data-testid="stMetricValue"] {
-       color: #0074b7;
-   }
-   .stButton > button {
-       background-color: #0074b7;
-       color: white;
-   }
-   .stButton > button:hover {
-       background-color: #003b73;
-       color: white;
-   }
-   h1 {
-       color: #003b73 !important;
-       font-weight: 800 !important;
-       background-color: #bfd7ed;
-       padding: 20px;
-       border-radius: 10px;
-       margin-bottom: 30px !important;
-   }
-   h2, h3, h4 {
-       color: #0074b7 !important;
-       font-weight: 600 !important;
-   }
-   </style>
-""", unsafe_allow_html=True)
-
-
 import streamlit as st
 import pandas as pd
 from geopy.geocoders import Nominatim
 import folium
-from streamlit_folium import folium_static
 import ssl
 import certifi
 import geopy.geocoders
 import urllib.request
 
+from safespace.bulk_geocoding import SAN_JOSE_QUERY_TEMPLATES, BulkGeocoder, read_address_csv
+from safespace.feasibility import evaluate_feasibility_batch
+from safespace.geocoding import geocode, lookup_scope, normalize_address
+from safespace.map_cache import map_html, show_map, sites_fingerprint
+
 # ---------- Styling & Page Config ----------
 COLORS = {
    'baby_blue': '#bfd7ed',
@@ -145,7 +94,7 @@ if 'proposed_sites' not in st.session_state:
    st.session_state.proposed_sites = []
 
 # ---------- Utility Functions ----------
-def geocode_address(address):
+def nominatim_lookup(address):
    ctx = ssl.create_default_context(cafile=certifi.where())
    geopy.geocoders.options.default_ssl_context = ctx
    geopy.geocoders.options.default_user_agent = "my_feasibility_analyzer_v2"
@@ -155,70 +104,49 @@ def geocode_address(address):
        scheme='http'  # Use HTTP instead of HTTPS
    )
   
-   try:
-       # First try with city and state
+   # First try with city and state
+   location = geolocator.geocode(
+       f"{address}, San Jose, California, USA",
+       timeout=10,
+       exactly_one=True
+   )
+  
+   if not location:
+       # Try without state
        location = geolocator.geocode(
-           f"{address}, San Jose, California, USA",
+           f"{address}, San Jose, USA",
            timeout=10,
            exactly_one=True
        )
       
-       if not location:
-           # Try without state
-           location = geolocator.geocode(
-               f"{address}, San Jose, USA",
-               timeout=10,
-               exactly_one=True
-           )
-          
-       if not location:
-           # Try just the address
-           location = geolocator.geocode(
-               address,
-               timeout=10,
-               exactly_one=True
-           )
-      
-       if location:
-           return {
-               'lat': location.latitude,
-               'lon': location.longitude,
-               'address': location.address
-           }
-       else:
-           st.error("📍 Could not find this address. Please try another one.")
-           return None
-          
+   if not location:
+       # Try just the address
+       location = geolocator.geocode(
+           address,
+           timeout=10,
+           exactly_one=True
+       )
+  
+   if location:
+       return {
+           'lat': location.latitude,
+           'lon': location.longitude,
+           'address': location.address
+       }
+   return None
+
+def geocode_address(address):
+   try:
+       # Offline address index first, then Nominatim through the on-disk cache
+       # Same three query variants as the bulk import, so the two share cached misses
+       result = geocode(address, nominatim_lookup, scope=lookup_scope(SAN_JOSE_QUERY_TEMPLATES))
    except Exception as e:
        st.error(f"🚫 Error: {str(e)}")
        return None
 
-def evaluate_feasibility(lat, lon):
-   flood_risk = "High" if lon < -121.91 else "Low"
-   soil_stability = "Unstable" if lat < 37.32 else "Stable"
-   slope = "Steep" if lat > 37.35 else "Moderate"
-
-   base_cost_sqft = 250
-   site_prep_multiplier = 1.4 if slope == "Steep" else 1.2 if slope == "Moderate" else 1.0
-   est_cost = round(base_cost_sqft * site_prep_multiplier, 2)
-
-   score = 1.0
-   if flood_risk == "High":
-       score -= 0.3
-   if soil_stability == "Unstable":
-       score -= 0.3
-   if slope == "Steep":
-       score -= 0.2
-   elif slope == "Moderate":
-       score -= 0.1
-
-   return {
-       "Flood Risk": flood_risk,
-       "Soil Stability": soil_stability,
-       "Terrain Slope": slope,
-       "Estimated Cost ($/sqft)": est_cost,
-       "Feasibility Score": round(max(score, 0), 2)
-   }
+   if result is None:
+       st.error("📍 Could not find this address. Please try another one.")
+   return result
 
 def create_map(proposed_sites):
    m = folium.Map(
@@ -326,11 +254,41 @@ st.sidebar.markdown("""
    </ul>
 """, unsafe_allow_html=True)
 
+st.sidebar.markdown("---")
+st.sidebar.markdown("""
+   <h4 style='color: #003b73;'>📥 Bulk Import</h4>
+""", unsafe_allow_html=True)
+
+uploaded_file = st.sidebar.file_uploader(
+   "Upload a CSV of addresses:",
+   type="csv",
+   help="Uses the 'address' column, or the first column if there is none"
+)
+
+if uploaded_file is not None and st.sidebar.button("📥 Import Sites", help="Geocode and add every address in the file"):
+   addresses = read_address_csv(uploaded_file)
+   progress = st.sidebar.progress(0.0, text="Geocoding addresses...")
+
+   def show_progress(address, result, done, total):
+       progress.progress(done / total, text=f"Geocoded {done} of {total}: {address}")
+
+   results = BulkGeocoder().geocode(addresses, show_progress)
+   found = [results[key] for key in dict.fromkeys(map(normalize_address, addresses))
+            if results.get(key)]
+   st.session_state.proposed_sites.extend(found)
+
+   if found:
+       st.sidebar.success(f"✅ Added {len(found)} of {len(results)} addresses.")
+   if len(found) < len(results):
+       st.sidebar.warning(f"📍 {len(results) - len(found)} addresses could not be found.")
+
 # ---------- Map Section ----------
 st.markdown("<h3 style='color: #003b73; margin-top: 30px;'>🗺️ Proposed Site Map</h3>", unsafe_allow_html=True)
 if st.session_state.proposed_sites:
-   map_obj = create_map(st.session_state.proposed_sites)
-   folium_static(map_obj, width=1200)
+   # Rendered once per distinct list of sites
+   html = map_html(('feasibility', sites_fingerprint(st.session_state.proposed_sites)),
+                   lambda: create_map(st.session_state.proposed_sites))
+   show_map(html, width=1200)
 else:
    st.info("No sites added yet. Use the sidebar to enter an address.")
 
@@ -339,16 +297,12 @@ st.markdown("---")
 st.markdown("<h3 style='color: #003b73; margin-top: 30px;'>📊 Feasibility Results</h3>", unsafe_allow_html=True)
 
 if st.session_state.proposed_sites:
-   results = []
-   for i, site in enumerate(st.session_state.proposed_sites, 1):
-       row = evaluate_feasibility(site['lat'], site['lon'])
-       row["Site #"] = f"Site {i}"
-       row["Address"] = site.get('address', 'N/A')
-       row["Latitude"] = round(site['lat'], 5)
-       row["Longitude"] = round(site['lon'], 5)
-       results.append(row)
-
-   df = pd.DataFrame(results)
+   sites = pd.DataFrame(st.session_state.proposed_sites)
+   df = evaluate_feasibility_batch(sites['lat'], sites['lon'])
+   df["Site #"] = [f"Site {i}" for i in range(1, len(sites) + 1)]
+   df["Address"] = sites['address'].fillna('N/A') if 'address' in sites else 'N/A'
+   df["Latitude"] = sites['lat'].round(5)
+   df["Longitude"] = sites['lon'].round(5)
   
    # Reorder columns
    columns_order = [
@@ -1,13 +1,22 @@
 import streamlit as st
 import pandas as pd
 import geopandas as gpd
-import folium
-from streamlit_folium import folium_static
 from geopy.geocoders import Nominatim
 from shapely.geometry import Point, Polygon
 import plotly.express as px
 import numpy as np
 
+from safespace import map_layers
+from safespace.bulk_geocoding import BulkGeocoder, read_address_csv
+from safespace.compact_map import create_compact_map
+from safespace.coverage import get_coverage_engine, get_coverage_tracker
+from safespace.data_loading import dataset_version, load_dataset
+from safespace.geocoding import geocode, lookup_scope, normalize_address
+from safespace.map_cache import map_html, show_map, sites_fingerprint
+from safespace.offline_geocoder import get_offline_geocoder
+from safespace.shelter_assignment import PROPOSED_SITE_CAPACITY, assess_proposed_sites, get_assignment_engine
+from safespace.site_selection import select_sites
+
 # Color scheme
 COLORS = {
     'baby_blue': '#bfd7ed',
@@ -50,129 +59,40 @@ if 'proposed_sites' not in st.session_state:
     st.session_state.proposed_sites = []
 
 def load_initial_data():
-    """Load existing shelter data and geographic boundaries"""
-    # Load all datasets
-    census_data = pd.read_csv('/Users/kita/Documents/Projects/data sets/mock_census_tracts_sanjose.csv')
-    shelters_data = pd.read_csv('/Users/kita/Documents/Projects/data sets/mock_shelters_sanjose.csv')
-    pit_data = pd.read_csv('/Users/kita/Documents/Projects/data sets/mock_pit_summary_sanjose.csv')
+    """Load existing shelter data and geographic boundaries (memoized until the files change)"""
+    # Load all datasets from the data root (SAFESPACE_DATA_ROOT)
+    census_data = load_dataset('census_tracts')
+    shelters_data = load_dataset('shelters')
+    pit_data = load_dataset('pit_summary')
     
     return shelters_data, census_data, pit_data
 
-def create_map(shelters_df, census_data, proposed_sites=None, map_layer="All Data"):
+def create_map(shelters_df, census_data, proposed_sites=None, map_layer="All Data", data_version=None,
+               compact=False):
     """Create a folium map with existing shelters, census tracts, and proposed sites"""
-    # Center on San Jose
-    m = folium.Map(
-        location=[37.3382, -121.8863],
-        zoom_start=12,
-        tiles='cartodbpositron'  # Light map style
-    )
-    
-    # Add census tract circles with color based on selected layer
-    max_unhoused = census_data['Unhoused Count'].max()
-    max_population = census_data['Population'].max()
-    
-    for _, row in census_data.iterrows():
-        # Determine radius and color based on selected layer
-        if map_layer == "Unhoused Count":
-            radius = (row['Unhoused Count'] / max_unhoused) * 1000
-            color = get_color_for_value(row['Unhoused Count'] / max_unhoused * 100)
-        elif map_layer == "Population Density":
-            radius = (row['Population'] / max_population) * 1000
-            color = get_color_for_value(row['Population'] / max_population * 100)
-        elif map_layer == "Poverty Rate":
-            radius = 500  # Fixed radius for poverty rate view
-            color = get_color_for_value(row['Poverty Rate (%)'])
-        else:  # All Data
-            radius = (row['Unhoused Count'] / max_unhoused) * 1000
-            color = get_color_for_value(row['Poverty Rate (%)'])
-        
-        folium.Circle(
-            location=[row['Latitude'], row['Longitude']],
-            radius=radius,
-            color=color,
-            fill=True,
-            popup=f"""Tract: {row['Tract ID']}
-Population: {row['Population']:,}
-Unhoused Count: {row['Unhoused Count']:,}
-Poverty Rate: {row['Poverty Rate (%)']}%""",
-            fill_opacity=0.3
-        ).add_to(m)
-    
-    # Add existing shelters
-    for _, row in shelters_df.iterrows():
-        # Color based on shelter type
-        color = COLORS['navy_blue'] if row['Shelter Type'] == 'EIH' else (
-            COLORS['royal_blue'] if row['Shelter Type'] == 'Permanent' else COLORS['blue_grotto']
-        )
-        
-        # Calculate occupancy rate
-        occupancy_rate = (row['Current Occupancy'] / row['Capacity']) * 100
-        
-        folium.CircleMarker(
-            location=[row['Latitude'], row['Longitude']],
-            radius=8,
-            color=color,
-            fill=True,
-            popup=f"""Shelter: {row['Shelter Name']}
-Type: {row['Shelter Type']}
-Capacity: {row['Capacity']}
-Current Occupancy: {row['Current Occupancy']}
-Occupancy Rate: {occupancy_rate:.1f}%""",
-            fill_opacity=0.7
-        ).add_to(m)
-        
-        # Add 1-mile buffer
-        folium.Circle(
-            location=[row['Latitude'], row['Longitude']],
-            radius=1609,  # 1 mile in meters
-            color=color,
-            fill=True,
-            opacity=0.1
-        ).add_to(m)
-    
-    # Add proposed sites
-    if proposed_sites:
-        for site in proposed_sites:
-            folium.CircleMarker(
-                location=[site['lat'], site['lon']],
-                radius=8,
-                color=COLORS['baby_blue'],
-                fill=True,
-                popup='Proposed Site',
-                fill_opacity=0.7
-            ).add_to(m)
-            
-            folium.Circle(
-                location=[site['lat'], site['lon']],
-                radius=1609,
-                color=COLORS['baby_blue'],
-                fill=True,
-                opacity=0.1
-            ).add_to(m)
-    
-    return m
+    if compact:
+        # Quantized columnar payloads, decoded and clustered in the browser
+        return create_compact_map(shelters_df, census_data, proposed_sites, map_layer, COLORS, data_version)
+    # One GeoJSON layer per category, styled column-wise; base layers reused per data_version
+    return map_layers.create_map(shelters_df, census_data, proposed_sites, map_layer, COLORS, data_version)
 
-def get_color_for_value(value):
-    """Return color based on value percentage"""
-    if value > 75:
-        return COLORS['navy_blue']
-    elif value > 50:
-        return COLORS['royal_blue']
-    elif value > 25:
-        return COLORS['blue_grotto']
-    else:
-        return COLORS['baby_blue']
+# The single Nominatim query tried per address, by the address box and the CSV import
+QUERY_TEMPLATES = ["{address}, San Jose, CA"]
 
-def geocode_address(address):
-    """Convert address to coordinates using Nominatim"""
+def nominatim_lookup(address):
+    """Query Nominatim for an address in San Jose"""
     geolocator = Nominatim(user_agent="eih_analysis")
+    location = geolocator.geocode(QUERY_TEMPLATES[0].format(address=address))
+    if location:
+        return {'lat': location.latitude, 'lon': location.longitude, 'address': location.address}
+    return None
+
+def geocode_address(address):
+    """Convert address to coordinates from the offline index, falling back to Nominatim"""
     try:
-        location = geolocator.geocode(f"{address}, San Jose, CA")
-        if location:
-            return {'lat': location.latitude, 'lon': location.longitude}
+        return geocode(address, nominatim_lookup, scope=lookup_scope(QUERY_TEMPLATES))
     except:
         return None
-    return None
 
 # Main application
 st.title("Service Area Coverage")
@@ -183,6 +103,18 @@ map_layer = st.sidebar.selectbox(
     "Select Map Layer",
     ["All Data", "Poverty Rate", "Unhoused Count", "Population Density"]
 )
+map_rendering = st.sidebar.radio(
+    "Map Rendering",
+    ["Standard", "Compact (clustered)"],
+    help="Compact mode ships quantized data and clusters markers in the browser; use it for large datasets"
+)
+capacity_basis = st.sidebar.radio(
+    "Shelter Beds to Assign",
+    ["All beds", "Free beds only"],
+    help="'Free beds only' keeps current occupants in place and assigns only Capacity minus Current Occupancy"
+)
+proposed_capacity = st.sidebar.number_input("Beds per Proposed Site", min_value=0,
+                                            value=PROPOSED_SITE_CAPACITY, step=10)
 
 # Add help section in sidebar
 st.sidebar.markdown("---")
@@ -232,9 +164,73 @@ col1, col2 = st.columns([2, 1])
 with col1:
     st.subheader("Shelter Coverage Map")
     
-    # Create and display map
-    m = create_map(shelters_data, census_data, st.session_state.proposed_sites, map_layer)
-    folium_static(m)
+    # Create and display map, rebuilt only when the data, layer or proposed sites change
+    data_version = (dataset_version('census_tracts'), dataset_version('shelters'))
+    compact = map_rendering == "Compact (clustered)"
+    html = map_html(
+        ('coverage', data_version, map_layer, compact, sites_fingerprint(st.session_state.proposed_sites)),
+        lambda: create_map(shelters_data, census_data, st.session_state.proposed_sites, map_layer,
+                           data_version, compact)
+    )
+    show_map(html)
+    
+    # Unhoused people within 1 mile of a shelter, before and after the proposed sites;
+    # the tracker only updates the tracts around sites added or removed since the last run
+    engine = get_coverage_engine(census_data, data_version[0])
+    tracker = get_coverage_tracker(st.session_state, engine, shelters_data, data_version)
+    tracker.sync(st.session_state.proposed_sites)
+    combined = tracker.summary()
+    
+    coverage_cols = st.columns(3)
+    with coverage_cols[0]:
+        st.metric("Unhoused Covered (Existing)", f"{tracker.base_covered_unhoused:,.0f}",
+                  help="Unhoused people in tracts within 1 mile of an existing shelter")
+    with coverage_cols[1]:
+        st.metric("Unhoused Covered (With Proposed)", f"{combined['covered_unhoused']:,.0f}",
+                  delta=f"{combined['covered_unhoused'] - tracker.base_covered_unhoused:+,.0f}")
+    with coverage_cols[2]:
+        st.metric("Still Uncovered", f"{combined['uncovered_unhoused']:,.0f}",
+                  delta=f"{combined['unhoused_coverage']:.1%} covered", delta_color="off")
+    
+    with st.expander("Coverage by Census Tract"):
+        st.dataframe(
+            tracker.tract_coverage().sort_values('Uncovered Unhoused', ascending=False).style.format({
+                'Covered Fraction': '{:.0%}',
+                'Covered Unhoused': '{:,.0f}',
+                'Uncovered Unhoused': '{:,.0f}',
+                'Covered Population': '{:,.0f}'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+    
+    # Each tract's unhoused count assigned to shelters within 5 miles, up to their capacity
+    assignment_engine = get_assignment_engine(census_data, data_version[0])
+    basis = 'available' if capacity_basis == "Free beds only" else 'total'
+    assignment = assess_proposed_sites(assignment_engine, shelters_data, st.session_state.proposed_sites,
+                                       basis, proposed_capacity)
+    
+    assignment_cols = st.columns(2)
+    with assignment_cols[0]:
+        st.metric("Unmet Demand (Existing)", f"{assignment['unmet_existing']:,.0f}",
+                  help="Unhoused people no shelter within 5 miles has a bed for")
+    with assignment_cols[1]:
+        st.metric("Unmet Demand (With Proposed)", f"{assignment['unmet_proposed']:,.0f}",
+                  delta=f"{assignment['unmet_proposed'] - assignment['unmet_existing']:+,.0f}",
+                  delta_color="inverse")
+    
+    with st.expander("Unmet Demand by Census Tract"):
+        st.dataframe(
+            assignment['tracts'].sort_values('Unmet (With Proposed)', ascending=False).style.format({
+                'Unhoused Count': '{:,.0f}',
+                'Unmet (Existing)': '{:,.0f}',
+                'Unmet (With Proposed)': '{:,.0f}',
+                'Relieved': '{:,.0f}'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.dataframe(assignment['shelters'], use_container_width=True, hide_index=True)
 
 with col2:
     st.subheader("Add Proposed Site")
@@ -264,11 +260,67 @@ with col2:
             st.session_state.proposed_sites = []
             st.success("🗑️ All proposed sites cleared")
     
+    # Bulk import from a CSV of addresses
+    uploaded_file = st.file_uploader(
+        "Or upload a CSV of addresses:",
+        type="csv",
+        help="Uses the 'address' column, or the first column if there is none"
+    )
+    if uploaded_file is not None and st.button("Import Sites", use_container_width=True):
+        addresses = read_address_csv(uploaded_file)
+        progress = st.progress(0.0, text="Geocoding addresses...")
+        
+        def show_progress(address, result, done, total):
+            progress.progress(done / total, text=f"Geocoded {done} of {total}: {address}")
+        
+        geocoder = BulkGeocoder(query_templates=QUERY_TEMPLATES)
+        results = geocoder.geocode(addresses, show_progress)
+        found = [results[key] for key in dict.fromkeys(map(normalize_address, addresses))
+                 if results.get(key)]
+        st.session_state.proposed_sites.extend(found)
+        
+        if found:
+            st.success(f"✅ Added {len(found)} of {len(results)} addresses")
+        if len(found) < len(results):
+            st.warning(f"⚠️ {len(results) - len(found)} addresses could not be found")
+    
+    # Suggest the address points that newly cover the most unhoused people
+    address_points = get_offline_geocoder()
+    if address_points is not None:
+        st.markdown("---")
+        st.markdown("### 🎯 Suggest Sites")
+        n_suggested = st.number_input("Number of sites to suggest", min_value=1, max_value=50, value=5)
+        exact = st.checkbox("Exact solution (slower)",
+                            help="Solve an integer program instead of the fast greedy selection")
+        if st.button("Suggest Sites", use_container_width=True):
+            candidates = pd.DataFrame({
+                'address': address_points.labels,
+                'lat': address_points.lats,
+                'lon': address_points.lons
+            })
+            with st.spinner("Choosing sites..."):
+                suggested = select_sites(engine, candidates, int(n_suggested), shelters_data,
+                                         st.session_state.proposed_sites, 'ilp' if exact else 'greedy',
+                                         time_limit=60)
+            st.session_state.proposed_sites.extend(
+                suggested[['lat', 'lon', 'address']].to_dict('records'))
+            if len(suggested):
+                st.success(f"✅ Added {len(suggested)} suggested sites covering "
+                           f"{suggested['marginal_gain'].sum():,.0f} more unhoused people")
+            else:
+                st.warning("⚠️ No candidate site covers anyone not already covered")
+    
     if st.session_state.proposed_sites:
         st.markdown("---")
         st.markdown("### 📍 Proposed Sites")
-        for i, site in enumerate(st.session_state.proposed_sites, 1):
-            st.markdown(f"**Site {i}**: ({site['lat']:.4f}, {site['lon']:.4f})")
+        # Picks up sites added above in this run; only the new ones are computed
+        site_gains = tracker.sync(st.session_state.proposed_sites)
+        site_relief = assess_proposed_sites(assignment_engine, shelters_data, st.session_state.proposed_sites,
+                                            basis, proposed_capacity)['sites']['Overflow Relieved']
+        for i, (site, gain, relief) in enumerate(
+                zip(st.session_state.proposed_sites, site_gains, site_relief), 1):
+            st.markdown(f"**Site {i}**: ({site['lat']:.4f}, {site['lon']:.4f}) · "
+                        f"+{gain:,.0f} unhoused newly covered · relieves {relief:,.0f} unmet demand")
 
     # Display PIT Summary
     st.subheader("Point-in-Time Count Summary")
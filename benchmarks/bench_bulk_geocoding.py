@@ -0,0 +1,129 @@
+"""
+Benchmark bulk geocoding against the local stub: wall time and rate-limit slots per address.
+
+Usage:
+    python benchmarks/bench_bulk_geocoding.py [--addresses 30] [--rps 10] [--latency 0.05]
+        [--hedge-delay 1] [--timeout 10]
+
+The stub Nominatim server (scripts/stub_geocoder.py) runs in this process
+and counts the requests it receives. Each scenario geocodes --addresses
+unique addresses at --rps requests per second, with the offline index
+switched off and an empty cache, so every address goes to the network:
+
+- first variant hits: every address is found by its most specific query
+- all variants miss: every address is unknown, so all its variants are tried
+- slow first variant hits: the most specific query takes half the hedge
+  delay, so no other variant is started
+- first variant stalls: the most specific query takes twice the request
+  timeout, so the second variant is hedged after the hedge delay, hits,
+  and the stalled one is cancelled
+
+Slots per address is the wall time in rate-limit intervals divided by the
+address count. It must stay close to the requests each address actually
+needed (1 when the first variant hits, one per variant when all miss, 2
+when the first stalls). No address may take as long as the request timeout.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from typing import Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
+
+from safespace.bulk_geocoding import SAN_JOSE_QUERY_TEMPLATES, BulkGeocoder  # noqa: E402
+from safespace.geocoding import GeocodeCache  # noqa: E402
+from stub_geocoder import make_handler  # noqa: E402
+
+# Slots an address may use beyond the requests it needed (startup and scheduling jitter)
+SLOT_TOLERANCE = 0.25
+
+
+def start_stub(latency: float, miss: str, slow: Optional[str] = None, slow_latency: float = 0.0):
+    """Start the stub on a free port; returns the server and its request counter."""
+    requests = []
+    handler = make_handler(latency, miss, slow, slow_latency)
+
+    class CountingHandler(handler):
+        def do_GET(self):
+            requests.append(self.path)
+            super().do_GET()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, requests
+
+
+class TimedGeocoder(BulkGeocoder):
+    """BulkGeocoder recording how long each address took to resolve."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = []
+
+    async def _geocode_one(self, session, limiter, address):
+        start = time.perf_counter()
+        try:
+            return await super()._geocode_one(session, limiter, address)
+        finally:
+            self.durations.append(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--addresses', type=int, default=30)
+    parser.add_argument('--rps', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub seconds per request')
+    parser.add_argument('--hedge-delay', type=float, default=1.0)
+    parser.add_argument('--timeout', type=float, default=10.0, help='Seconds per request')
+    parser.add_argument('--concurrency', type=int, default=16, help='Addresses resolved at once')
+    args = parser.parse_args()
+
+    # The first template is the only one mentioning California
+    slow = 'california'
+    hits = [f"{100 + i} Main St" for i in range(args.addresses)]
+    misses = [f"{100 + i} Unknown Rd" for i in range(args.addresses)]
+    # (name, stub slow latency, addresses, requests per address, found)
+    scenarios = (
+        ('first variant hits', args.latency, hits, 1, True),
+        ('all variants miss', args.latency, misses, len(SAN_JOSE_QUERY_TEMPLATES), False),
+        ('slow first variant hits', args.hedge_delay / 2, hits, 1, True),
+        ('first variant stalls', args.timeout * 2, hits, 2, True)
+    )
+
+    print(f"{args.addresses} addresses at {args.rps:g} req/s, stub latency {args.latency * 1000:.0f} ms, "
+          f"hedge delay {args.hedge_delay:g} s, timeout {args.timeout:g} s")
+    print(f"{'scenario':>24} {'seconds':>8} {'slowest':>8} {'requests':>9} {'slots/address':>14} {'expected':>9}")
+    for name, slow_latency, addresses, expected, all_found in scenarios:
+        server, requests = start_stub(args.latency, 'unknown', slow, slow_latency)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                geocoder = TimedGeocoder(base_url=f"http://127.0.0.1:{server.server_address[1]}",
+                                         requests_per_second=args.rps, max_concurrency=args.concurrency,
+                                         timeout=args.timeout, hedge_delay=args.hedge_delay,
+                                         cache=GeocodeCache(os.path.join(tmp, 'cache.sqlite')),
+                                         use_offline=False, network=True)
+                start = time.perf_counter()
+                results = geocoder.geocode(addresses)
+                elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+        slots = elapsed * args.rps / len(addresses)
+        slowest = max(geocoder.durations)
+        print(f"{name:>24} {elapsed:>8.2f} {slowest:>8.2f} {len(requests):>9} {slots:>14.2f} {expected:>9}")
+        found = sum(result is not None for result in results.values())
+        assert found == (len(addresses) if all_found else 0)
+        assert len(requests) == expected * len(addresses)
+        assert slots <= expected + SLOT_TOLERANCE, f"{slots:.2f} slots per address, expected {expected}"
+        assert slowest < args.timeout, f"an address took {slowest:.1f} s, waiting out the request timeout"
+
+
+if __name__ == '__main__':
+    main()
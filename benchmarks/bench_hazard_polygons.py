@@ -0,0 +1,125 @@
+"""
+Benchmark polygon hazard lookups: STRtree + prepared polygons vs. naive loops.
+
+Usage:
+    python benchmarks/bench_hazard_polygons.py [--sites 10000] [--repeat 3]
+
+Synthetic hazard polygons are drawn over Santa Clara County, from a few
+hundred large many-vertex zones (flood-zone-like) to thousands of small
+ones (liquefaction-like). Each lookup classifies every site against the
+layer three ways:
+
+- naive: a Python loop calling polygon.contains(point) per polygon per site
+  (timed on the first --naive-sites sites and scaled up)
+- per-polygon: a loop over polygons, each tested against all sites at
+  once with an unprepared vectorized contains
+- PolygonLayer: one STRtree query for all sites, then one contains test of
+  the candidate pairs on prepared polygons; its build time, first lookup
+  (which prepares the polygons it touches) and best lookup are shown, and
+  the speedup is over the per-polygon loop
+
+All three must agree on which sites are inside a polygon.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import Point, Polygon
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.hazard_layers import PolygonLayer  # noqa: E402
+
+# Santa Clara County bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (36.95, 37.49, -122.20, -121.21)
+
+# (polygons, vertices per polygon, radius range in degrees)
+LAYERS = ((200, 5000, (0.005, 0.02)), (2000, 1000, (0.002, 0.008)), (10000, 256, (0.0008, 0.003)))
+
+
+def synthetic_polygons(rng: np.random.Generator, n: int, vertices: int, radius) -> list:
+    """Wavy star-shaped polygons, so contains tests have real boundaries to walk."""
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    centers_lon = rng.uniform(BOUNDS[2], BOUNDS[3], n)
+    centers_lat = rng.uniform(BOUNDS[0], BOUNDS[1], n)
+    radii = rng.uniform(*radius, n)
+    polygons = []
+    for lon, lat, r, lobes in zip(centers_lon, centers_lat, radii, rng.integers(3, 9, n)):
+        rho = r * (1 + 0.3 * np.sin(angles * lobes))
+        # Longitude degrees are shorter than latitude degrees at this latitude
+        polygons.append(Polygon(np.column_stack([lon + rho * np.cos(angles) * 1.26,
+                                                 lat + rho * np.sin(angles)])))
+    return polygons
+
+
+def naive_loop(polygons: list, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    points = [Point(lon, lat) for lat, lon in zip(lats, lons)]
+    inside = np.zeros(len(points), dtype=bool)
+    for polygon in polygons:
+        for i, point in enumerate(points):
+            if polygon.contains(point):
+                inside[i] = True
+    return inside
+
+
+def per_polygon_loop(polygons: list, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    inside = np.zeros(len(lats), dtype=bool)
+    for polygon in polygons:
+        inside |= shapely.contains_xy(polygon, lons, lats)
+    return inside
+
+
+def best_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sites', type=int, default=10_000)
+    parser.add_argument('--naive-sites', type=int, default=200,
+                        help="Sites the naive loop is timed on before scaling")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    lats = rng.uniform(BOUNDS[0], BOUNDS[1], args.sites)
+    lons = rng.uniform(BOUNDS[2], BOUNDS[3], args.sites)
+
+    print(f"{args.sites:,} sites; best of {args.repeat}, naive loop scaled from {args.naive_sites} sites")
+    print(f"{'polygons':>9} {'vertices':>9} {'naive (ms)':>11} {'per-polygon (ms)':>17} "
+          f"{'build (ms)':>11} {'first (ms)':>11} {'STRtree (ms)':>13} {'speedup':>8} {'inside':>7}")
+
+    for n_polygons, vertices, radius in LAYERS:
+        polygons = synthetic_polygons(rng, n_polygons, vertices, radius)
+
+        naive_n = min(args.naive_sites, args.sites)
+        naive, naive_inside = best_time(lambda: naive_loop(polygons, lats[:naive_n], lons[:naive_n]), 1)
+        naive *= args.sites / naive_n
+        per_polygon, loop_inside = best_time(lambda: per_polygon_loop(polygons, lats, lons), args.repeat)
+
+        start = time.perf_counter()
+        layer = PolygonLayer(polygons)
+        build = time.perf_counter() - start
+        # GEOS builds each prepared polygon's index on its first contains test
+        first, _ = best_time(lambda: layer.sample(lats, lons), 1)
+        indexed, (values, _) = best_time(lambda: layer.sample(lats, lons), args.repeat)
+
+        assert np.array_equal(values > 0, loop_inside)
+        assert np.array_equal(naive_inside, loop_inside[:naive_n])
+        print(f"{n_polygons:>9,} {vertices:>9,} {naive * 1000:>11,.0f} {per_polygon * 1000:>17,.0f} "
+              f"{build * 1000:>11.0f} {first * 1000:>11.1f} {indexed * 1000:>13,.1f} "
+              f"{per_polygon / indexed:>7.0f}x {loop_inside.mean():>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
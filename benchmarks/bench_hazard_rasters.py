@@ -0,0 +1,117 @@
+"""
+Benchmark raster hazard lookups: per-site cost and memory vs. raster size.
+
+Usage:
+    python benchmarks/bench_hazard_rasters.py [--sizes 1000 5000 20000] [--sites 100000]
+
+A uint8 hazard raster covering Santa Clara County is written to a temporary
+directory at each size (20000 x 20000 is 400 MB on disk). For each size
+the table reports the time to open it memory-mapped, the per-site cost
+of a batch lookup, first from a cold page cache and then warm, and the
+process memory: anonymous memory (heap), which should stay flat, and
+file-backed pages, which only grow by the pages the sites touched. A full
+np.load of the same file is shown for comparison.
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.hazard_layers import RasterLayer, write_sidecar  # noqa: E402
+
+# Santa Clara County bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (36.95, 37.49, -122.20, -121.21)
+
+# Rows written per block when generating a raster
+WRITE_BLOCK_ROWS = 2000
+
+
+def memory_mb():
+    """Current (anonymous, file-backed) resident memory in MB, from /proc where available."""
+    try:
+        with open('/proc/self/status') as f:
+            fields = dict(line.split(':', 1) for line in f)
+        return (int(fields['RssAnon'].split()[0]) / 1024, int(fields['RssFile'].split()[0]) / 1024)
+    except (OSError, KeyError):
+        return float('nan'), float('nan')
+
+
+def write_raster(stem: str, size: int, rng: np.random.Generator) -> None:
+    lat_min, lat_max, lon_min, lon_max = BOUNDS
+    transform = ((lon_max - lon_min) / size, 0.0, lon_min, 0.0, -(lat_max - lat_min) / size, lat_max)
+    data = np.lib.format.open_memmap(f"{stem}.npy", mode='w+', dtype=np.uint8, shape=(size, size))
+    for start in range(0, size, WRITE_BLOCK_ROWS):
+        stop = min(start + WRITE_BLOCK_ROWS, size)
+        data[start:stop] = rng.integers(0, 5, (stop - start, size), dtype=np.uint8)
+    data.flush()
+    del data
+    write_sidecar(stem, transform)
+
+    # Evict the file from the page cache, so lookups start cold
+    if hasattr(os, 'posix_fadvise'):
+        fd = os.open(f"{stem}.npy", os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--sites', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    lats = rng.uniform(BOUNDS[0], BOUNDS[1], args.sites)
+    lons = rng.uniform(BOUNDS[2], BOUNDS[3], args.sites)
+
+    print(f"{args.sites:,} sites per lookup; warm is the best of {args.repeat}")
+    print(f"{'pixels':>14} {'file MB':>8} {'open (ms)':>10} {'cold ns/site':>13} {'warm ns/site':>13} "
+          f"{'anon +MB':>9} {'file +MB':>9} {'np.load anon +MB':>17}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            stem = os.path.join(tmp, f"hazard_{size}")
+            write_raster(stem, size, rng)
+            gc.collect()
+            anon_before, file_before = memory_mb()
+
+            start = time.perf_counter()
+            layer = RasterLayer.open(stem)
+            opened = time.perf_counter() - start
+
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                layer.sample(lats, lons)
+                times.append(time.perf_counter() - start)
+            anon_after, file_after = memory_mb()
+            del layer
+            gc.collect()
+
+            # The same raster read fully into memory
+            anon_base, _ = memory_mb()
+            loaded = np.load(f"{stem}.npy")
+            anon_loaded, _ = memory_mb()
+            del loaded
+            os.remove(f"{stem}.npy")
+
+            print(f"{size:>7,}x{size:<6,} {size * size / 1e6:>8,.0f} {opened * 1000:>10.2f} "
+                  f"{times[0] / args.sites * 1e9:>13,.0f} {min(times) / args.sites * 1e9:>13,.0f} "
+                  f"{anon_after - anon_before:>9.1f} "
+                  f"{file_after - file_before:>9.1f} {anon_loaded - anon_base:>17.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark coverage-map payloads: GeoJSON layers vs. compact client-side mode.
+
+Usage:
+    python benchmarks/bench_map_payload.py [--repeat 3]
+
+Synthetic tracts and shelters (4:1) are drawn over the San Jose bounding box.
+For each mode the map is built and rendered to HTML, and the page's inline
+scripts are then executed under Node.js against a stubbed Leaflet that
+still runs every per-feature callback. That client time covers parsing the
+payload and creating the layers up to the first paint, but not Leaflet's
+DOM/canvas drawing or marker clustering. It is skipped when Node.js is not
+installed.
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.compact_map import create_compact_map  # noqa: E402
+from safespace.map_layers import create_map  # noqa: E402
+
+# San Jose bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (37.20, 37.47, -122.05, -121.72)
+FEATURE_COUNTS = (1_000, 10_000, 50_000)
+
+COLORS = {
+    'baby_blue': '#bfd7ed',
+    'blue_grotto': '#60a3d9',
+    'royal_blue': '#0074b7',
+    'navy_blue': '#003b73',
+    'white': '#ffffff'
+}
+
+MODES = {
+    'geojson': create_map,
+    'compact': create_compact_map
+}
+
+# Runs the page's inline scripts against a Leaflet stub and prints the time in ms
+NODE_HARNESS = r"""
+const fs = require('fs');
+const html = fs.readFileSync(process.argv[2], 'utf8');
+const scripts = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map(m => m[1]);
+
+function stub() {
+    const target = function() {};
+    const proxy = new Proxy(target, {
+        get: (t, key) => key === Symbol.toPrimitive ? (() => '') : proxy,
+        apply: () => proxy,
+        construct: () => proxy
+    });
+    return proxy;
+}
+function layer() { return { setStyle() {}, setRadius() {}, bindPopup() {}, on() {}, addTo() { return this; } }; }
+function group() {
+    return { layers: [], addLayer(l) { this.layers.push(l); }, addLayers(ls) { this.layers.push(...ls); },
+             bindPopup() {}, on() {}, addTo() { return this; } };
+}
+
+globalThis.window = globalThis;
+globalThis.document = stub();
+globalThis.L = new Proxy({
+    circle: layer, circleMarker: layer, marker: layer,
+    featureGroup: group, markerClusterGroup: group,
+    geoJson: (data, options) => new Proxy({
+        addData(data) {
+            for (const feature of data.features) {
+                const coords = feature.geometry.coordinates;
+                const l = options.pointToLayer ? options.pointToLayer(feature, [coords[1], coords[0]]) : layer();
+                if (options.onEachFeature) options.onEachFeature(feature, l);
+            }
+        }
+    }, { get: (t, key) => key in t ? t[key] : stub() })
+}, { get: (t, key) => key in t ? t[key] : stub() });
+
+// The page's scripts share globals, so run them as one
+const start = performance.now();
+(new Function(scripts.join('\n')))();
+console.log((performance.now() - start).toFixed(1));
+"""
+
+
+def synthetic_data(rng: np.random.Generator, n_features: int):
+    n_shelters = n_features // 5
+    n_tracts = n_features - n_shelters
+
+    census = pd.DataFrame({
+        'Tract ID': [f"06085{i:06d}" for i in range(n_tracts)],
+        'Population': rng.integers(1000, 9000, n_tracts),
+        'Unhoused Count': rng.integers(0, 400, n_tracts),
+        'Poverty Rate (%)': rng.uniform(2, 40, n_tracts).round(2),
+        'Latitude': rng.uniform(BOUNDS[0], BOUNDS[1], n_tracts),
+        'Longitude': rng.uniform(BOUNDS[2], BOUNDS[3], n_tracts)
+    })
+    capacity = rng.integers(20, 200, n_shelters)
+    shelters = pd.DataFrame({
+        'Shelter Name': [f"Shelter {i}" for i in range(1, n_shelters + 1)],
+        'Latitude': rng.uniform(BOUNDS[0], BOUNDS[1], n_shelters),
+        'Longitude': rng.uniform(BOUNDS[2], BOUNDS[3], n_shelters),
+        'Capacity': capacity,
+        'Current Occupancy': (capacity * rng.uniform(0.5, 1.2, n_shelters)).astype(int),
+        'Shelter Type': rng.choice(['EIH', 'Permanent', 'Transitional'], n_shelters)
+    })
+    return census, shelters
+
+
+def best_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def client_time(node: str, harness: str, html: str, workdir: str) -> str:
+    path = os.path.join(workdir, 'map.html')
+    with open(path, 'w') as f:
+        f.write(html)
+    result = subprocess.run([node, harness, path], capture_output=True, text=True)
+    if result.returncode != 0:
+        return 'error'
+    return f"{float(result.stdout.strip()):.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # folium warns about the CartoDB tiles on every map
+    warnings.filterwarnings('ignore', category=UserWarning)
+
+    rng = np.random.default_rng(args.seed)
+    node = shutil.which('node')
+    sites = [{'lat': 37.33, 'lon': -121.89}]
+
+    print(f"best of {args.repeat}; client time {'from ' + node if node else 'skipped (no node)'}")
+    print(f"{'features':>9} {'mode':>8} {'build (ms)':>11} {'HTML (KB)':>10} {'gzip (KB)':>10} "
+          f"{'client (ms)':>12}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        harness = os.path.join(workdir, 'harness.js')
+        with open(harness, 'w') as f:
+            f.write(NODE_HARNESS)
+
+        for n_features in FEATURE_COUNTS:
+            census, shelters = synthetic_data(rng, n_features)
+
+            for mode, build_map in MODES.items():
+                build, html = best_time(
+                    lambda: build_map(shelters, census, sites, "All Data", COLORS).get_root().render(),
+                    args.repeat
+                )
+                size = len(html.encode())
+                compressed = len(gzip.compress(html.encode()))
+                client = client_time(node, harness, html, workdir) if node else '-'
+
+                print(f"{n_features:>9,} {mode:>8} {build * 1000:>11.0f} {size / 1024:>10,.0f} "
+                      f"{compressed / 1024:>10,.0f} {client:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark nearest-anchor lookups: brute-force haversine scan vs. spatial indexes.
+
+Usage:
+    python benchmarks/bench_nearest_anchor.py [--candidates 10000] [--repeat 3]
+
+Anchors and candidates are drawn uniformly over the San Jose bounding box.
+Build time is reported separately because SiteScorer builds its indexes once
+in __init__ and reuses them for every query.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.spatial_index import INDEX_TYPES  # noqa: E402
+
+# San Jose bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (37.20, 37.47, -122.05, -121.72)
+ANCHOR_COUNTS = (1_000, 10_000, 100_000)
+
+
+def random_points(rng: np.random.Generator, n: int):
+    return (rng.uniform(BOUNDS[0], BOUNDS[1], n),
+            rng.uniform(BOUNDS[2], BOUNDS[3], n))
+
+
+def best_time(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--candidates', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    # Warm up optional imports so they are not billed to the first build
+    for index_type in INDEX_TYPES.values():
+        try:
+            index_type(*random_points(rng, 8))
+        except ImportError:
+            pass
+
+    cand_lats, cand_lons = random_points(rng, args.candidates)
+
+    print(f"{args.candidates:,} candidates, best of {args.repeat}")
+    print(f"{'anchors':>9} {'method':>9} {'build (ms)':>11} {'query (ms)':>11} {'speedup':>8} {'max err (m)':>12}")
+
+    for n_anchors in ANCHOR_COUNTS:
+        anchor_lats, anchor_lons = random_points(rng, n_anchors)
+        baseline = None
+        reference = None
+
+        for method, index_type in INDEX_TYPES.items():
+            try:
+                build = best_time(lambda: index_type(anchor_lats, anchor_lons), args.repeat)
+                index = index_type(anchor_lats, anchor_lons)
+            except ImportError as e:
+                print(f"{n_anchors:>9,} {method:>9}   skipped ({e})")
+                continue
+
+            query = best_time(lambda: index.query(cand_lats, cand_lons), args.repeat)
+            distances, _ = index.query(cand_lats, cand_lons)
+
+            if method == 'brute':
+                baseline, reference = query, distances
+            speedup = f"{baseline / query:.1f}x" if baseline else '-'
+            error = (f"{np.abs(distances - reference).max() * 1000:.3f}"
+                     if reference is not None else '-')
+
+            print(f"{n_anchors:>9,} {method:>9} {build * 1000:>11.1f} {query * 1000:>11.1f} "
+                  f"{speedup:>8} {error:>12}")
+
+
+if __name__ == '__main__':
+    main()
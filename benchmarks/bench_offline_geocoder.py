@@ -0,0 +1,111 @@
+"""
+Benchmark offline geocoder lookups and check that fuzzy matches stay on the right street.
+
+Usage:
+    python benchmarks/bench_offline_geocoder.py [--lookups 2000] [--repeat 3]
+
+The index is built from the address-point file (SAFESPACE_ADDRESS_POINTS).
+Lookups are timed three ways: exact addresses, addresses with a typo in the
+street name (which must resolve through the fuzzy match) and addresses on a
+street that isn't in the index (which must miss).
+
+Before timing, a small index holding one side of each W/E, N/S and St/Ave
+pair is queried with the other side: none of them may match, so those
+addresses fall through to the network geocoder instead of landing on a
+different street.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.offline_geocoder import ADDRESS_POINTS_PATH, OfflineGeocoder  # noqa: E402
+
+# (indexed address, query that must not match it)
+NON_MATCHES = (
+    ("200 E Santa Clara St", "200 W Santa Clara St"),
+    ("300 W Santa Clara St", "300 East Santa Clara Street"),
+    ("100 N First St", "100 S First St"),
+    ("100 S Market St", "100 North Market St"),
+    ("1661 Alum Rock Ave", "1661 Alum Rock St"),
+    ("500 Meridian St", "500 Meridian Avenue"),
+    ("75 Main St N", "75 Main St S")
+)
+
+# (indexed address, query with a typo in the street name that must match it)
+TYPO_MATCHES = (
+    ("200 E Santa Clara St", "200 E Santa Clarra St"),
+    ("100 N First St", "100 North Firsst Street"),
+    ("1661 Alum Rock Ave", "1661 Alum Rok Avenue")
+)
+
+
+def check_street_parts() -> None:
+    indexed = [address for address, _ in NON_MATCHES + TYPO_MATCHES]
+    geocoder = OfflineGeocoder(indexed, range(len(indexed)), range(len(indexed)))
+    for _, query in NON_MATCHES:
+        result = geocoder.lookup(query)
+        assert result is None, f"{query!r} matched {result['address']!r}"
+    for address, query in TYPO_MATCHES:
+        result = geocoder.lookup(query)
+        assert result is not None and result['address'] == address, f"{query!r} did not match {address!r}"
+    print(f"{len(NON_MATCHES)} direction/street-type pairs kept apart, "
+          f"{len(TYPO_MATCHES)} street-name typos matched")
+
+
+def with_typo(address: str) -> str:
+    """Double the second letter of the street name."""
+    number, name, *rest = address.split()
+    return " ".join([number, name[:2] + name[1:]] + rest)
+
+
+def best_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    check_street_parts()
+
+    df = pd.read_csv(ADDRESS_POINTS_PATH, dtype={'Address': str})
+    start = time.perf_counter()
+    geocoder = OfflineGeocoder.from_csv(ADDRESS_POINTS_PATH)
+    build = time.perf_counter() - start
+
+    rng = np.random.default_rng(args.seed)
+    addresses = df['Address'].iloc[rng.integers(0, len(df), args.lookups)].tolist()
+    queries = {
+        'exact': addresses,
+        'typo': [with_typo(address) for address in addresses],
+        'unknown street': [f"{address.split()[0]} Nowhere Ln" for address in addresses]
+    }
+
+    print(f"{len(geocoder):,} indexed addresses, built in {build * 1000:.0f} ms; "
+          f"{args.lookups:,} lookups, best of {args.repeat}")
+    print(f"{'query':>15} {'us/lookup':>10} {'found':>7}")
+    for name, batch in queries.items():
+        elapsed, results = best_time(lambda: [geocoder.lookup(query) for query in batch], args.repeat)
+        found = sum(result is not None for result in results) / len(batch)
+        if name == 'unknown street':
+            assert found == 0
+        print(f"{name:>15} {elapsed / len(batch) * 1e6:>10.1f} {found:>7.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark capacity-aware shelter assignment at city and county scale.
+
+Usage:
+    python benchmarks/bench_shelter_assignment.py [--proposed 5] [--repeat 3]
+
+Synthetic tracts and shelters are drawn over a Santa Clara County sized
+bounding box. For each size the table reports the sparse graph size, the
+time of one assignment (graph + LP) and of a full proposed-site assessment
+(existing shelters, with all proposed sites, and each site's relief) from a
+cold cache. The relief of every proposed site, taken from residual max
+flows on the combined assignment, is checked against re-solving the LP
+without that site, whose time is shown for comparison.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.shelter_assignment import (PROPOSED_SITE_CAPACITY, AssignmentEngine,  # noqa: E402
+                                         assess_proposed_sites)
+
+# Santa Clara County bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (36.95, 37.49, -122.20, -121.21)
+
+# (tracts, shelters)
+SIZES = ((400, 50), (1_000, 150), (2_000, 400))
+
+
+def synthetic_data(rng: np.random.Generator, n_tracts: int, n_shelters: int):
+    tracts = pd.DataFrame({
+        'Tract ID': [f"06085{i:06d}" for i in range(n_tracts)],
+        'Unhoused Count': rng.integers(0, 200, n_tracts),
+        'Latitude': rng.uniform(BOUNDS[0], BOUNDS[1], n_tracts),
+        'Longitude': rng.uniform(BOUNDS[2], BOUNDS[3], n_tracts)
+    })
+    capacity = rng.integers(20, 200, n_shelters)
+    shelters = pd.DataFrame({
+        'Shelter Name': [f"Shelter {i}" for i in range(1, n_shelters + 1)],
+        'Latitude': rng.uniform(BOUNDS[0], BOUNDS[1], n_shelters),
+        'Longitude': rng.uniform(BOUNDS[2], BOUNDS[3], n_shelters),
+        'Capacity': capacity,
+        'Current Occupancy': (capacity * rng.uniform(0.5, 1.2, n_shelters)).astype(int)
+    })
+    return tracts, shelters
+
+
+def best_time(fn, repeat: int):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--proposed', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print(f"best of {args.repeat}, cold cache; assessment with {args.proposed} proposed sites")
+    print(f"{'tracts':>7} {'shelters':>9} {'edges':>8} {'assign (ms)':>12} {'assess (ms)':>12} "
+          f"{'leave-one-out (ms)':>19} {'unmet':>8}")
+
+    for n_tracts, n_shelters in SIZES:
+        tracts, shelters = synthetic_data(rng, n_tracts, n_shelters)
+        lats, lons = shelters['Latitude'].to_numpy(), shelters['Longitude'].to_numpy()
+        proposed = [{'lat': lat, 'lon': lon} for lat, lon in
+                    zip(rng.uniform(BOUNDS[0], BOUNDS[1], args.proposed),
+                        rng.uniform(BOUNDS[2], BOUNDS[3], args.proposed))]
+
+        # A fresh engine per run, so no solution is served from its cache
+        assign, solution = best_time(
+            lambda: AssignmentEngine(tracts).assign(lats, lons, shelters['Capacity']), args.repeat
+        )
+        assess, assessment = best_time(
+            lambda: assess_proposed_sites(AssignmentEngine(tracts), shelters, proposed), args.repeat
+        )
+        edges = len(AssignmentEngine(tracts).edges(lats, lons)[0])
+
+        # Relief by re-solving without each proposed site, as a reference
+        engine = AssignmentEngine(tracts)
+        all_lats = np.concatenate([lats, [site['lat'] for site in proposed]])
+        all_lons = np.concatenate([lons, [site['lon'] for site in proposed]])
+        capacity = np.concatenate([shelters['Capacity'].to_numpy(dtype=float),
+                                   np.full(len(proposed), float(PROPOSED_SITE_CAPACITY))])
+        unmet = engine.assign(all_lats, all_lons, capacity)['unmet'].sum()
+        start = time.perf_counter()
+        relief = []
+        for i in range(n_shelters, len(all_lats)):
+            keep = np.arange(len(all_lats)) != i
+            relief.append(engine.assign(all_lats[keep], all_lons[keep], capacity[keep])['unmet'].sum() - unmet)
+        leave_one_out = time.perf_counter() - start
+        assert np.allclose(assessment['sites']['Overflow Relieved'], relief)
+
+        print(f"{n_tracts:>7,} {n_shelters:>9,} {edges:>8,} {assign * 1000:>12.0f} {assess * 1000:>12.0f} "
+              f"{leave_one_out * 1000:>19.0f} {solution['unmet'].sum():>8,.0f}")
+
+
+if __name__ == '__main__':
+    main()
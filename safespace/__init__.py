@@ -0,0 +1,47 @@
+"""
+Headless SafeSpace engines: site scoring, build feasibility, service-area
+coverage, site selection and shelter assignment, plus the batch screening
+CLI and a local HTTP scoring service (python -m safespace).
+
+Nothing here imports Streamlit, folium, geopandas or plotly, so batch jobs,
+workers and benchmarks can use the engines without booting a UI. The
+top-level names are resolved lazily, so `import safespace` is cheap and a
+submodule (and its NumPy/pandas/SciPy imports) only loads on first use:
+
+    from safespace import SiteScorer, evaluate_feasibility_batch
+
+The map rendering helpers (map_layers, compact_map, map_cache) and the
+geocoders live in the package too but are only imported by the apps.
+"""
+
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    'SiteScorer': 'scoring',
+    'evaluate_feasibility': 'feasibility',
+    'evaluate_feasibility_batch': 'feasibility',
+    'CoverageEngine': 'coverage',
+    'CoverageTracker': 'coverage',
+    'SiteSelector': 'site_selection',
+    'select_sites': 'site_selection',
+    'AssignmentEngine': 'shelter_assignment',
+    'assess_proposed_sites': 'shelter_assignment',
+    'load_dataset': 'data_loading',
+    'dataset_version': 'data_loading',
+    'ScoringService': 'service',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,313 @@
+"""
+Concurrent bulk geocoding through a rate-limited asyncio pipeline.
+
+Used by the apps' bulk import: addresses are deduplicated, answered from the
+offline address index or the shared geocode cache where possible, and otherwise
+(when network lookups are enabled) queried against a
+Nominatim-compatible /search endpoint over one HTTP session. Addresses are
+resolved concurrently; each one tries its query variants as hedged requests,
+most specific first. The next variant starts once the previous one misses or
+fails, or has been in flight for the hedge delay; the first hit wins and the
+variants still running are cancelled. An address whose first variant answers
+within the hedge delay uses a single rate-limited request, and a stalled
+variant never holds the address up for the full request timeout.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+
+from .geocoding import (GEOCODE_NETWORK_FALLBACK, GeocodeCache, get_geocode_cache,
+                       lookup_scope, normalize_address)
+from .offline_geocoder import OfflineGeocoder, get_offline_geocoder
+
+logger = logging.getLogger(__name__)
+
+# Geocoding server and request rate, overridable through the environment
+NOMINATIM_URL = os.environ.get('SAFESPACE_GEOCODER_URL', 'http://nominatim.openstreetmap.org')
+BULK_GEOCODE_RPS = float(os.environ.get('SAFESPACE_GEOCODE_RPS', 1.0))
+# Seconds a variant may be in flight before the next variant is started alongside it
+BULK_GEOCODE_HEDGE_DELAY = float(os.environ.get('SAFESPACE_GEOCODE_HEDGE_DELAY', 2.0))
+
+# Query variants, most specific first (same fallbacks as the feasibility app)
+SAN_JOSE_QUERY_TEMPLATES = (
+    "{address}, San Jose, California, USA",
+    "{address}, San Jose, USA",
+    "{address}"
+)
+
+
+class RateLimiter:
+    """
+    Spaces request starts at least 1 / requests_per_second apart.
+
+    Waiters are served in arrival order, and a slot is only taken once its
+    waiter is released, so a request cancelled while waiting (a hedged
+    variant that lost) doesn't use up a slot.
+    """
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        """Block until the caller may start its next request."""
+        async with self._lock:
+            delay = self._next_slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot = time.monotonic() + self.interval
+
+
+class BulkGeocoder:
+    """
+    Geocodes many addresses concurrently under a requests-per-second limit.
+    """
+
+    def __init__(self, base_url: str = NOMINATIM_URL,
+                 query_templates: Sequence[str] = SAN_JOSE_QUERY_TEMPLATES,
+                 requests_per_second: float = BULK_GEOCODE_RPS,
+                 max_concurrency: int = 4,
+                 timeout: float = 10.0,
+                 hedge_delay: float = BULK_GEOCODE_HEDGE_DELAY,
+                 user_agent: str = 'safespace_bulk_geocoder',
+                 cache: Optional[GeocodeCache] = None,
+                 offline: Optional[OfflineGeocoder] = None,
+                 use_offline: bool = True,
+                 network: bool = GEOCODE_NETWORK_FALLBACK):
+        """
+        Initialize the geocoder.
+
+        Args:
+            base_url: Nominatim-compatible server (a local stub in tests)
+            query_templates: Query variants with an {address} placeholder, most
+                specific first; cached misses are shared only with lookups
+                trying the same variants
+            requests_per_second: Maximum request rate across all addresses
+            max_concurrency: Addresses resolved at the same time
+            timeout: Seconds before a single request is abandoned
+            hedge_delay: Seconds a variant may be in flight before the next
+                variant is started alongside it; keep it well under timeout
+            user_agent: User-Agent header sent with every request
+            cache: Geocode cache, defaults to geocoding.get_geocode_cache()
+            offline: Offline address index, defaults to
+                offline_geocoder.get_offline_geocoder()
+            use_offline: Whether addresses are looked up in the offline index
+                at all; False sends every address to the cache and network
+            network: Whether addresses missing from the offline index and the
+                cache are queried over the network
+        """
+        self.base_url = base_url.rstrip('/')
+        self.query_templates = tuple(query_templates)
+        self.scope = lookup_scope(self.query_templates)
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.user_agent = user_agent
+        self.cache = cache or get_geocode_cache()
+        if not use_offline:
+            self.offline = None
+        else:
+            self.offline = offline if offline is not None else get_offline_geocoder()
+        self.network = network
+
+    async def _query(self, session, limiter: RateLimiter, query: str,
+                     started: asyncio.Event) -> Optional[Dict]:
+        """Run one /search request and parse the first hit; sets started once it's sent."""
+        await limiter.wait()
+        started.set()
+        async with session.get(f"{self.base_url}/search",
+                               params={'q': query, 'format': 'json', 'limit': 1}) as response:
+            response.raise_for_status()
+            hits = await response.json(content_type=None)
+        if not hits:
+            return None
+        return {
+            'lat': float(hits[0]['lat']),
+            'lon': float(hits[0]['lon']),
+            'address': hits[0].get('display_name', query)
+        }
+
+    async def _hedge_timer(self, started: asyncio.Event) -> None:
+        """Finish hedge_delay seconds after a variant's request was sent."""
+        await started.wait()
+        await asyncio.sleep(self.hedge_delay)
+
+    async def _geocode_one(self, session, limiter: RateLimiter, address: str) -> Optional[Dict]:
+        """
+        Resolve one address, trying query variants from most to least specific.
+
+        The next variant is started when a running one misses or fails, or
+        when the latest one has been in flight for hedge_delay (its wait for a
+        rate-limit slot doesn't count). The first hit is returned and the other
+        variants are cancelled, giving back any slot they were still waiting
+        for. Raises the last error when no variant succeeded and at least one
+        failed, so the miss isn't cached.
+        """
+        queries = [template.format(address=address) for template in self.query_templates]
+        running = {}
+        launched = 0
+        timer = None
+        error = None
+
+        def launch() -> None:
+            nonlocal launched, timer
+            started = asyncio.Event()
+            task = asyncio.ensure_future(self._query(session, limiter, queries[launched], started))
+            running[task] = launched
+            launched += 1
+            if timer is not None:
+                timer.cancel()
+            timer = asyncio.ensure_future(self._hedge_timer(started)) if launched < len(queries) else None
+
+        try:
+            launch()
+            while running:
+                waiting = set(running) | ({timer} if timer is not None else set())
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                advance = timer in done
+                for task in sorted(done & set(running), key=running.get):
+                    del running[task]
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        error = e
+                        advance = True
+                        continue
+                    if result is not None:
+                        return result
+                    advance = True
+                if advance and launched < len(queries):
+                    launch()
+        finally:
+            pending = list(running) + ([timer] if timer is not None else [])
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if error is not None:
+            raise error
+        return None
+
+    async def geocode_async(self, addresses: Iterable[str],
+                            on_result: Optional[Callable[[str, Optional[Dict], int, int], None]] = None
+                            ) -> Dict[str, Optional[Dict]]:
+        """
+        Geocode addresses, calling on_result as each unique address resolves.
+
+        Args:
+            addresses: Addresses as typed; duplicates (after normalization) are
+                geocoded once
+            on_result: Callback (address, result, done, total); result is None
+                for addresses that weren't found or failed
+
+        Returns:
+            Dict mapping each normalized address to its result or None
+        """
+        import aiohttp
+
+        unique = {}
+        for address in addresses:
+            if isinstance(address, str) and address.strip():
+                unique.setdefault(normalize_address(address), address.strip())
+
+        results = {}
+        done = 0
+
+        def report(key: str, result: Optional[Dict]) -> None:
+            nonlocal done
+            results[key] = result
+            done += 1
+            if on_result:
+                on_result(unique[key], result, done, len(unique))
+
+        pending = []
+        for key, address in unique.items():
+            result = self.offline.lookup(address) if self.offline is not None else None
+            if result is not None:
+                report(key, result)
+                continue
+            hit, result = self.cache.get(address, self.scope)
+            if hit or not self.network:
+                report(key, result)
+            else:
+                pending.append(key)
+
+        if not pending:
+            return results
+
+        limiter = RateLimiter(self.requests_per_second)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def resolve(key: str):
+            async with semaphore:
+                try:
+                    result = await self._geocode_one(session, limiter, unique[key])
+                    self.cache.put(unique[key], result, self.scope)
+                except Exception as e:
+                    logger.warning(f"Geocoding failed for '{unique[key]}': {str(e)}")
+                    result = None
+                return key, result
+
+        async with aiohttp.ClientSession(
+            headers={'User-Agent': self.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as session:
+            for next_done in asyncio.as_completed([resolve(key) for key in pending]):
+                report(*(await next_done))
+
+        return results
+
+    def geocode(self, addresses: Iterable[str],
+                on_result: Optional[Callable[[str, Optional[Dict], int, int], None]] = None
+                ) -> Dict[str, Optional[Dict]]:
+        """Synchronous wrapper around geocode_async()."""
+        return asyncio.run(self.geocode_async(addresses, on_result))
+
+    def geocode_dataframe(self, df: pd.DataFrame, address_column: str,
+                          on_result: Optional[Callable[[str, Optional[Dict], int, int], None]] = None
+                          ) -> pd.DataFrame:
+        """
+        Geocode an address column, keeping the input rows and order.
+
+        Args:
+            df: DataFrame with an address column
+            address_column: Name of the address column
+            on_result: Progress callback, see geocode_async()
+
+        Returns:
+            Copy of df with lat, lon and matched_address columns (NaN when not found)
+        """
+        results = self.geocode(df[address_column].tolist(), on_result)
+        rows = [results.get(normalize_address(address)) if isinstance(address, str) else None
+                for address in df[address_column]]
+
+        out = df.copy()
+        out['lat'] = [row['lat'] if row else float('nan') for row in rows]
+        out['lon'] = [row['lon'] if row else float('nan') for row in rows]
+        out['matched_address'] = [row.get('address') if row else None for row in rows]
+        return out
+
+
+def read_address_csv(file) -> List[str]:
+    """
+    Read addresses from an uploaded CSV.
+
+    Uses a column named 'address' (any case) when present, otherwise the first column.
+
+    Args:
+        file: Path or file-like object
+
+    Returns:
+        List of non-empty address strings
+    """
+    df = pd.read_csv(file, dtype=str)
+    columns = {column.strip().lower(): column for column in df.columns}
+    column = columns.get('address', df.columns[0])
+    return [address.strip() for address in df[column].dropna() if address.strip()]
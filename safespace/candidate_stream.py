@@ -0,0 +1,97 @@
+"""
+Chunked reading and incremental writing of candidate files (CSV or Parquet).
+
+Lets scoring run over candidate files of any size with constant peak memory.
+"""
+
+import os
+from typing import Iterator, Optional
+
+import pandas as pd
+
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+
+def is_parquet(path: str) -> bool:
+    """Whether path names a Parquet file, judged by its extension."""
+    return os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS
+
+
+def iter_candidate_chunks(path: str, chunksize: int = 100000,
+                          columns: Optional[list] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a candidate file in chunks.
+
+    Args:
+        path: CSV or Parquet file (by extension)
+        chunksize: Rows per chunk
+        columns: Columns to read, or None for all
+
+    Yields:
+        DataFrame chunks with a RangeIndex continuing across chunks
+    """
+    start = 0
+    if is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to a CSV or Parquet file as they are produced.
+
+    Use as a context manager so the Parquet writer is closed.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the writer. The file is created on the first write.
+
+        Args:
+            path: Output CSV or Parquet file (by extension)
+        """
+        self.path = path
+        self.rows_written = 0
+        self._parquet_writer = None
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+        Append a chunk to the output file.
+
+        Args:
+            chunk: Rows to write; every chunk must have the same columns
+        """
+        if is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='w' if self.rows_written == 0 else 'a',
+                         header=self.rows_written == 0, index=False)
+        self.rows_written += len(chunk)
+
+    def close(self) -> None:
+        """Finish the Parquet file, if one is being written."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self) -> 'ChunkWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,393 @@
+"""
+Command-line entry points: nightly county-wide site screening and the local
+scoring service.
+
+    python -m safespace screen candidates.parquet --output ranked.parquet
+    python -m safespace serve --port 8090
+
+Candidates are scored with SiteScorer, checked with evaluate_feasibility and
+given the unhoused population they would newly cover, then ranked into one
+CSV or Parquet file. Every stage works through the candidates one chunk at a
+time and checkpoints each chunk, so peak memory is set by --chunksize rather
+than by the input size, and an interrupted run resumes where it stopped.
+Stage timings are logged and kept in the checkpoint manifest. `serve` runs
+the HTTP/JSON service in safespace.service.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .candidate_stream import ChunkWriter, iter_candidate_chunks
+from .data_loading import load_dataset, read_dataset_file
+from .hazard_layers import EXTENT_FILE, HAZARD_DIR, HAZARD_LAYERS
+from .service import BATCH_WINDOW_MS
+from .spatial_index import coordinate_columns
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('score', 'feasibility', 'coverage', 'rank')
+
+# Candidates per chunk; peak memory grows with it
+DEFAULT_CHUNKSIZE = 100000
+
+# Ranked rows assembled and written at a time by the rank stage
+RANK_BLOCK_SIZE = 100000
+
+# Ranking: combined score, then newly covered unhoused, then input order
+RANK_KEYS = ['combined_score', 'newly_covered_unhoused', 'candidate']
+RANK_ASCENDING = [False, False, True]
+
+
+class ScreeningPipeline:
+    """
+    Checkpointed score -> feasibility -> coverage -> rank pipeline.
+
+    Each stage writes one Parquet part per candidate chunk under the
+    checkpoint directory. A manifest records the inputs' fingerprint and the
+    finished stages; rerunning with the same inputs skips finished stages
+    and chunks, while changed inputs discard the checkpoints.
+    """
+
+    def __init__(self, candidates_path: str, output_path: str, tracts: pd.DataFrame,
+                 shelters: pd.DataFrame, checkpoint_dir: Optional[str] = None,
+                 chunksize: int = DEFAULT_CHUNKSIZE, id_column: Optional[str] = None,
+                 top: Optional[int] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            candidates_path: CSV or Parquet file with latitude/longitude columns
+            output_path: Ranked CSV or Parquet file to write
+            tracts: Census tracts ('Unhoused Count', 'Population', coordinates)
+            shelters: Existing shelters, whose service areas count as covered
+            checkpoint_dir: Directory for stage checkpoints, defaults to
+                output_path + '.checkpoints'
+            chunksize: Candidates per chunk
+            id_column: Optional candidate column (e.g. a parcel ID) carried into the output
+            top: Only write the best top rows, or None for all
+        """
+        self.candidates_path = candidates_path
+        self.output_path = output_path
+        self.tracts = tracts
+        self.shelters = shelters
+        self.checkpoint_dir = checkpoint_dir or f"{output_path}.checkpoints"
+        self.chunksize = chunksize
+        self.id_column = id_column
+        self.top = top
+        self.manifest = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, 'manifest.json')
+
+    def fingerprint(self) -> str:
+        """Hash of everything the checkpoints depend on."""
+        stat = os.stat(self.candidates_path)
+        frames = [hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+                  for df in (self.tracts, self.shelters)]
+        # Feasibility depends on whichever hazard layers are installed
+        files = [name + extension for name in HAZARD_LAYERS
+                 for extension in ('.npy', '.geojson', '_extent.geojson')] + [EXTENT_FILE]
+        hazards = [(os.path.basename(path), os.stat(path).st_size, os.stat(path).st_mtime_ns)
+                   for path in [os.path.join(HAZARD_DIR, file) for file in files] if os.path.exists(path)]
+        payload = json.dumps([os.path.abspath(self.candidates_path), stat.st_size, stat.st_mtime_ns,
+                              self.chunksize, self.id_column, *frames, hazards])
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _load_manifest(self, restart: bool) -> None:
+        fingerprint = self.fingerprint()
+        if os.path.exists(self.manifest_path) and not restart:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('fingerprint') == fingerprint:
+                self.manifest = manifest
+                return
+            logger.warning("Inputs changed since the checkpoints were written; starting over")
+
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+        os.makedirs(self.checkpoint_dir)
+        self.manifest = {'fingerprint': fingerprint, 'chunks': None, 'stages': {}}
+        self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _part_path(self, stage: str, chunk: int) -> str:
+        return os.path.join(self.checkpoint_dir, stage, f"part-{chunk:05d}.parquet")
+
+    def _write_part(self, frame: pd.DataFrame, stage: str, chunk: int, **kwargs) -> None:
+        # Written under a temporary name, so a part on disk is always complete
+        path = self._part_path(stage, chunk)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        frame.to_parquet(f"{path}.tmp", index=False, **kwargs)
+        os.replace(f"{path}.tmp", path)
+
+    def _pending_chunks(self, stage: str) -> List[int]:
+        return [chunk for chunk in range(self.manifest['chunks'])
+                if not os.path.exists(self._part_path(stage, chunk))]
+
+    def run(self, restart: bool = False) -> Dict[str, Dict]:
+        """
+        Run every unfinished stage.
+
+        Args:
+            restart: Discard existing checkpoints first
+
+        Returns:
+            Dict of stage name -> {'rows', 'seconds', 'resumed'}; 'seconds' is
+            the time spent in this run
+        """
+        self._load_manifest(restart)
+        if self.manifest['stages'].get('rank', {}).get('top') != self.top:
+            self.manifest['stages'].pop('rank', None)
+
+        timings = {}
+        for stage in STAGES:
+            record = self.manifest['stages'].get(stage)
+            if record is not None and (stage != 'rank' or os.path.exists(self.output_path)):
+                logger.info(f"{stage}: finished in an earlier run, skipped")
+                timings[stage] = {'rows': record['rows'], 'seconds': 0.0, 'resumed': True}
+                continue
+
+            start = time.perf_counter()
+            rows = getattr(self, f"_run_{stage}")()
+            seconds = time.perf_counter() - start
+
+            self.manifest['stages'][stage] = {'rows': rows, 'seconds': seconds, 'top': self.top}
+            self._save_manifest()
+            timings[stage] = {'rows': rows, 'seconds': seconds, 'resumed': False}
+            logger.info(f"{stage}: {rows:,} rows in {seconds:.1f} s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
+        return timings
+
+    def _run_score(self) -> int:
+        from .scoring import SiteScorer
+
+        scorer = SiteScorer(self.tracts)
+        rows = chunks = 0
+        for chunk_number, chunk in enumerate(iter_candidate_chunks(self.candidates_path, self.chunksize)):
+            # Candidates without usable coordinates can't be scored or located
+            lat_column, lon_column = coordinate_columns(chunk)
+            coordinates = chunk[[lat_column, lon_column]].apply(pd.to_numeric, errors='coerce')
+            valid = np.isfinite(coordinates.to_numpy(dtype=float)).all(axis=1)
+            if not valid.all():
+                logger.warning(f"score: skipping {(~valid).sum():,} candidates without valid coordinates "
+                               f"in chunk {chunk_number + 1}")
+            chunk = chunk.assign(**{column: coordinates[column] for column in coordinates})[valid]
+            rows += len(chunk)
+            chunks += 1
+            if os.path.exists(self._part_path('score', chunk_number)):
+                continue
+
+            results = scorer.score_locations_batch(chunk, self.tracts)
+            results.insert(0, 'candidate', chunk.index.to_numpy())
+            if self.id_column:
+                results.insert(0, self.id_column, chunk[self.id_column].to_numpy())
+            self._write_part(results, 'score', chunk_number)
+            logger.info(f"score: chunk {chunk_number + 1} ({rows:,} candidates read)")
+
+        self.manifest['chunks'] = chunks
+        return rows
+
+    def _run_feasibility(self) -> int:
+        from .feasibility import evaluate_feasibility_batch
+
+        for chunk in self._pending_chunks('feasibility'):
+            sites = pd.read_parquet(self._part_path('score', chunk), columns=['latitude', 'longitude'])
+            feasibility = evaluate_feasibility_batch(sites['latitude'], sites['longitude'])
+            # Plain strings, so every part has the same Parquet schema
+            categorical = feasibility.select_dtypes('category').columns
+            self._write_part(feasibility.astype({column: str for column in categorical}), 'feasibility', chunk)
+        return self._row_count()
+
+    def _run_coverage(self) -> int:
+        from .coverage import CoverageEngine, site_coordinates
+
+        engine = CoverageEngine(self.tracts)
+        covered = engine.covered_mask(*site_coordinates(self.shelters))
+        for chunk in self._pending_chunks('coverage'):
+            sites = pd.read_parquet(self._part_path('score', chunk), columns=['latitude', 'longitude'])
+            gains = engine.site_gains(sites['latitude'], sites['longitude'], covered)
+            self._write_part(pd.DataFrame({'newly_covered_unhoused': gains}), 'coverage', chunk)
+        return self._row_count()
+
+    def _row_count(self) -> int:
+        return self.manifest['stages']['score']['rows']
+
+    def _combined_part(self, chunk: int) -> pd.DataFrame:
+        score = pd.read_parquet(self._part_path('score', chunk))
+        feasibility = pd.read_parquet(self._part_path('feasibility', chunk))
+        coverage = pd.read_parquet(self._part_path('coverage', chunk))
+
+        # Suitability scaled by build feasibility
+        combined = score['total_score'] * feasibility['Feasibility Score']
+        position = score.columns.get_loc('total_score')
+        score.insert(position, 'combined_score', combined.round(6))
+        return pd.concat([score, feasibility, coverage], axis=1)
+
+    def _run_rank(self) -> int:
+        """
+        Merge the chunks into one ranked file.
+
+        Each chunk is sorted on its own and only its sort keys are kept; the
+        global order of the keys then says how many rows every output block
+        takes from each sorted chunk, so the chunks are read sequentially and
+        never held in memory together.
+        """
+        import pyarrow.parquet as pq
+
+        chunks = self.manifest['chunks']
+        # Sorted chunks are read back a row group at a time, so the read-ahead
+        # across all chunks stays about one output block
+        batch_size = max(1, RANK_BLOCK_SIZE // max(chunks, 1))
+
+        keys = {name: [] for name in RANK_KEYS}
+        chunk_ids = []
+        for chunk in range(chunks):
+            frame = self._combined_part(chunk).sort_values(RANK_KEYS, ascending=RANK_ASCENDING,
+                                                           kind='mergesort')
+            self._write_part(frame, 'rank', chunk, row_group_size=batch_size)
+            for name in RANK_KEYS:
+                keys[name].append(frame[name].to_numpy())
+            chunk_ids.append(np.full(len(frame), chunk, dtype=np.int32))
+
+        combined, gains, candidates = (np.concatenate(keys[name]) for name in RANK_KEYS)
+        order = np.lexsort((candidates, -gains, -combined))
+        chunk_of_rank = np.concatenate(chunk_ids)[order] if chunks else np.empty(0, dtype=np.int32)
+        del keys, combined, gains, candidates, order
+
+        n_rows = len(chunk_of_rank) if self.top is None else min(self.top, len(chunk_of_rank))
+        readers = [pq.ParquetFile(self._part_path('rank', chunk)).iter_batches(batch_size=batch_size)
+                   for chunk in range(chunks)]
+        buffers = [None] * chunks
+
+        def take(chunk: int, count: int) -> pd.DataFrame:
+            parts = []
+            while count > 0:
+                if buffers[chunk] is None or not len(buffers[chunk]):
+                    buffers[chunk] = next(readers[chunk]).to_pandas()
+                part = buffers[chunk].iloc[:count]
+                buffers[chunk] = buffers[chunk].iloc[count:]
+                parts.append(part)
+                count -= len(part)
+            return pd.concat(parts)
+
+        stem, extension = os.path.splitext(self.output_path)
+        tmp_path = f"{stem}.partial{extension}"
+        with ChunkWriter(tmp_path) as writer:
+            for start in range(0, n_rows, RANK_BLOCK_SIZE):
+                stop = min(start + RANK_BLOCK_SIZE, n_rows)
+                counts = np.bincount(chunk_of_rank[start:stop], minlength=chunks)
+                block = pd.concat([take(chunk, count) for chunk, count in enumerate(counts) if count])
+                block = block.sort_values(RANK_KEYS, ascending=RANK_ASCENDING, kind='mergesort')
+                block.insert(0, 'rank', np.arange(start + 1, stop + 1))
+                writer.write(block)
+        if n_rows:
+            os.replace(tmp_path, self.output_path)
+        return n_rows
+
+
+def peak_memory_mb() -> Optional[float]:
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if os.uname().sysname == 'Darwin' else 1024)
+
+
+def screen(args: argparse.Namespace) -> int:
+    tracts = (read_dataset_file('census_tracts', args.tracts) if args.tracts
+              else load_dataset('census_tracts'))
+    shelters = (read_dataset_file('shelters', args.shelters) if args.shelters
+                else load_dataset('shelters'))
+
+    pipeline = ScreeningPipeline(args.candidates, args.output, tracts, shelters, args.checkpoint_dir,
+                                 args.chunksize, args.id_column, args.top)
+    timings = pipeline.run(restart=args.restart)
+
+    print(f"{'stage':<12} {'rows':>12} {'seconds':>9}")
+    for stage, timing in timings.items():
+        note = '  (checkpoint)' if timing['resumed'] else ''
+        print(f"{stage:<12} {timing['rows']:>12,} {timing['seconds']:>9.1f}{note}")
+    print(f"{'total':<12} {'':>12} {sum(t['seconds'] for t in timings.values()):>9.1f}")
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"peak memory: {peak:,.0f} MB")
+    if timings['rank']['rows'] and os.path.exists(args.output):
+        print(f"wrote {args.output}")
+    else:
+        print(f"no valid candidates to rank; {args.output} not written")
+
+    if not args.keep_checkpoints:
+        shutil.rmtree(pipeline.checkpoint_dir, ignore_errors=True)
+    return 0
+
+
+def serve(args: argparse.Namespace) -> int:
+    from .service import ScoringService, create_server
+
+    tracts = (read_dataset_file('census_tracts', args.tracts) if args.tracts
+              else load_dataset('census_tracts'))
+    service = ScoringService(tracts, window=args.batch_window_ms / 1000)
+    server = create_server(service, args.host, args.port)
+    logger.info(f"Serving /score, /feasibility and /metrics on http://{args.host}:{args.port} "
+                f"({args.batch_window_ms:g} ms batch window)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m safespace', description="SafeSpace batch tools")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    screen_parser = commands.add_parser(
+        'screen', help="Score, check and rank a candidate file",
+        description="Score candidates, evaluate feasibility and coverage, and write a ranked file."
+    )
+    screen_parser.add_argument('candidates', help="CSV or Parquet file with latitude/longitude columns")
+    screen_parser.add_argument('-o', '--output', required=True, help="Ranked CSV or Parquet output")
+    screen_parser.add_argument('--tracts', help="Census tract file (default: the bundled dataset)")
+    screen_parser.add_argument('--shelters', help="Shelter file (default: the bundled dataset)")
+    screen_parser.add_argument('--checkpoint-dir', help="Default: <output>.checkpoints")
+    screen_parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                               help="Candidates per chunk; bounds peak memory")
+    screen_parser.add_argument('--id-column', help="Candidate column carried into the output")
+    screen_parser.add_argument('--top', type=int, help="Only write the best N candidates")
+    screen_parser.add_argument('--restart', action='store_true', help="Ignore existing checkpoints")
+    screen_parser.add_argument('--keep-checkpoints', action='store_true',
+                               help="Keep the checkpoints after a successful run")
+    screen_parser.set_defaults(handler=screen)
+
+    serve_parser = commands.add_parser(
+        'serve', help="Serve scoring and feasibility over local HTTP/JSON",
+        description="Serve /score, /feasibility and /metrics, micro-batching concurrent requests."
+    )
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8090)
+    serve_parser.add_argument('--tracts', help="Census tract file (default: the bundled dataset)")
+    serve_parser.add_argument('--batch-window-ms', type=float, default=BATCH_WINDOW_MS,
+                              help="How long to collect concurrent requests into one batch")
+    serve_parser.set_defaults(handler=serve)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    return args.handler(args)
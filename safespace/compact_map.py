@@ -0,0 +1,286 @@
+"""
+Client-side rendering mode for the Service Area Coverage map.
+
+Instead of one GeoJSON feature (or one folium object) per point, each layer
+is shipped as a compact columnar payload: coordinates quantized to integer
+offsets (1e-5 degrees, about 1 m) and packed as base64 Int32 arrays, colors
+as indices into a small palette, radii as Uint16 meters, and popup fields as
+plain columns formatted in the browser on click. The browser decodes the
+arrays, builds the layers on a canvas renderer and clusters markers with
+Leaflet.markercluster, so payload size and page weight stay small for tens
+of thousands of features.
+"""
+
+import base64
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import folium
+import numpy as np
+import pandas as pd
+from folium.elements import JSCSSMixin
+from folium.map import Layer
+from folium.template import Template
+
+from .map_layers import (BUFFER_RADIUS_M, MAP_CENTER, cached_features, shelter_colors,
+                        tract_radius_and_color)
+
+# Quantization steps per degree (1e-5 degrees is about 1.1 m)
+QUANTIZATION_SCALE = 100000
+
+# Zoom level from which clustered markers are always shown individually
+CLUSTER_DISABLE_ZOOM = 15
+
+
+def encode_array(values, dtype: str) -> str:
+    """
+    Pack an array as base64 little-endian bytes for a JavaScript typed array.
+
+    Args:
+        values: Array-like of numbers
+        dtype: Little-endian NumPy dtype matching the typed array, e.g. '<i4'
+
+    Returns:
+        str: Base64 text
+    """
+    return base64.b64encode(np.ascontiguousarray(values, dtype=dtype).tobytes()).decode('ascii')
+
+
+def compact_payload(lats, lons, colors: Optional[Sequence[str]] = None,
+                    radius: Optional[Sequence[float]] = None,
+                    popup_fields: Optional[Dict[str, Sequence]] = None,
+                    popup_suffixes: Optional[Dict[str, str]] = None,
+                    scale: int = QUANTIZATION_SCALE) -> Dict:
+    """
+    Columnar, quantized payload for a point layer.
+
+    Args:
+        lats, lons: Point coordinates
+        colors: Hex color per point, stored as palette indices
+        radius: Circle radius per point in meters, or None for fixed-size markers
+        popup_fields: Mapping of popup label to a column of values
+        popup_suffixes: Text appended to a field's value, e.g. {'Poverty Rate': '%'}
+        scale: Quantization steps per degree
+
+    Returns:
+        dict: JSON-serializable payload decoded by CompactPointLayer
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    origin = [float(np.floor(lats.min() * 100) / 100), float(np.floor(lons.min() * 100) / 100)] \
+        if len(lats) else [0.0, 0.0]
+
+    payload = {
+        'count': len(lats),
+        'scale': scale,
+        'origin': origin,
+        'lat': encode_array(np.rint((lats - origin[0]) * scale), '<i4'),
+        'lon': encode_array(np.rint((lons - origin[1]) * scale), '<i4')
+    }
+
+    if colors is not None:
+        palette, indices = np.unique(np.asarray(colors, dtype=str), return_inverse=True)
+        payload['palette'] = palette.tolist()
+        payload['color'] = encode_array(indices, 'u1')
+
+    if radius is not None:
+        payload['radius'] = encode_array(np.clip(np.rint(radius), 0, 65535), '<u2')
+
+    if popup_fields:
+        suffixes = popup_suffixes or {}
+        payload['popup'] = {
+            'labels': list(popup_fields),
+            'suffixes': [suffixes.get(label, '') for label in popup_fields],
+            'columns': [np.asarray(values).tolist() for values in popup_fields.values()]
+        }
+
+    return payload
+
+
+class CompactPointLayer(JSCSSMixin, Layer):
+    """
+    Point layer decoded in the browser from a compact_payload().
+
+    Markers are CircleMarkers (fixed pixel radius) unless the payload carries
+    per-point radii, in which case they are Circles in meters.
+    """
+
+    _template = Template(
+        """
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = (function(payload, style, cluster, clusterOptions) {
+                function decode(text, Type) {
+                    var binary = atob(text);
+                    var bytes = new Uint8Array(binary.length);
+                    for (var i = 0; i < binary.length; i++) { bytes[i] = binary.charCodeAt(i); }
+                    return new Type(bytes.buffer);
+                }
+                var lat = decode(payload.lat, Int32Array);
+                var lon = decode(payload.lon, Int32Array);
+                var color = payload.color ? decode(payload.color, Uint8Array) : null;
+                var radius = payload.radius ? decode(payload.radius, Uint16Array) : null;
+                var renderer = L.canvas();
+
+                var layers = new Array(payload.count);
+                for (var i = 0; i < payload.count; i++) {
+                    var latlng = [payload.origin[0] + lat[i] / payload.scale,
+                                  payload.origin[1] + lon[i] / payload.scale];
+                    var options = Object.assign({renderer: renderer}, style);
+                    if (color) { options.color = options.fillColor = payload.palette[color[i]]; }
+                    if (radius) {
+                        options.radius = radius[i];
+                        layers[i] = L.circle(latlng, options);
+                    } else {
+                        layers[i] = L.circleMarker(latlng, options);
+                    }
+                    layers[i].compactIndex = i;
+                }
+
+                var group = cluster ? L.markerClusterGroup(clusterOptions) : L.featureGroup();
+                if (cluster) {
+                    group.addLayers(layers);
+                } else {
+                    layers.forEach(function(layer) { group.addLayer(layer); });
+                }
+
+                if (payload.popup) {
+                    group.bindPopup(function(layer) {
+                        var popup = payload.popup;
+                        return popup.labels.map(function(label, field) {
+                            var value = popup.columns[field][layer.compactIndex];
+                            if (typeof value === 'number') { value = value.toLocaleString(); }
+                            return label + ': ' + value + popup.suffixes[field];
+                        }).join('<br>');
+                    });
+                }
+                return group;
+            })({{ this.payload|tojson }}, {{ this.style|tojson }},
+               {{ this.cluster|tojson }}, {{ this.cluster_options|tojson }});
+        {% endmacro %}
+        """
+    )
+
+    default_js = [
+        (
+            "markerclusterjs",
+            "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js",
+        )
+    ]
+
+    default_css = [
+        (
+            "markerclustercss",
+            "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css",
+        ),
+        (
+            "markerclusterdefaultcss",
+            "https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css",
+        ),
+    ]
+
+    def __init__(self, payload: Dict, style: Optional[Dict] = None, cluster: bool = False,
+                 name: Optional[str] = None, **cluster_options):
+        """
+        Initialize the layer.
+
+        Args:
+            payload: Output of compact_payload()
+            style: Leaflet path options shared by every point, e.g. {'fillOpacity': 0.3}
+            cluster: Whether to cluster the points with Leaflet.markercluster
+            name: Layer name
+            cluster_options: Leaflet.markercluster options
+        """
+        super().__init__(name=name, overlay=True, control=True, show=True)
+        self._name = "CompactPointLayer"
+        self.payload = payload
+        self.style = style or {}
+        self.cluster = cluster
+        self.cluster_options = {'disableClusteringAtZoom': CLUSTER_DISABLE_ZOOM,
+                                'chunkedLoading': True, **cluster_options}
+
+
+def tract_payload(census_data: pd.DataFrame, map_layer: str, colors: Dict[str, str]) -> Dict:
+    """Compact payload of the census tract circles for the selected layer."""
+    radius, color = tract_radius_and_color(census_data, map_layer, colors)
+    return compact_payload(
+        census_data['Latitude'], census_data['Longitude'], color, radius,
+        {
+            'Tract': census_data['Tract ID'].astype(str),
+            'Population': census_data['Population'],
+            'Unhoused Count': census_data['Unhoused Count'],
+            'Poverty Rate': census_data['Poverty Rate (%)']
+        },
+        {'Poverty Rate': '%'}
+    )
+
+
+def shelter_payload(shelters_df: pd.DataFrame, colors: Dict[str, str]) -> Dict:
+    """Compact payload of the existing shelters, colored by type."""
+    occupancy_rate = (shelters_df['Current Occupancy'] / shelters_df['Capacity'] * 100).round(1)
+    return compact_payload(
+        shelters_df['Latitude'], shelters_df['Longitude'],
+        shelter_colors(shelters_df['Shelter Type'], colors),
+        popup_fields={
+            'Shelter': shelters_df['Shelter Name'].astype(str),
+            'Type': shelters_df['Shelter Type'].astype(str),
+            'Capacity': shelters_df['Capacity'],
+            'Current Occupancy': shelters_df['Current Occupancy'],
+            'Occupancy Rate': occupancy_rate
+        },
+        popup_suffixes={'Occupancy Rate': '%'}
+    )
+
+
+def create_compact_map(shelters_df: pd.DataFrame, census_data: pd.DataFrame,
+                       proposed_sites: Optional[List[Dict]], map_layer: str,
+                       colors: Dict[str, str], data_version: Optional[Hashable] = None) -> folium.Map:
+    """
+    Build the coverage map in client-side rendering mode.
+
+    Same layers and styling as map_layers.create_map, shipped as compact
+    payloads with tract and shelter markers clustered in the browser.
+
+    Args:
+        shelters_df: Existing shelters
+        census_data: Census tracts
+        proposed_sites: Proposed sites with 'lat' and 'lon', or None
+        map_layer: Tract layer to display
+        colors: Color scheme
+        data_version: Version of census_data and shelters_df; when given the
+            base-layer payloads are reused across calls
+
+    Returns:
+        folium.Map
+    """
+    m = folium.Map(
+        location=MAP_CENTER,
+        zoom_start=12,
+        tiles='cartodbpositron'  # Light map style
+    )
+
+    tracts = cached_features(None if data_version is None else ('compact_tracts', data_version, map_layer),
+                             lambda: tract_payload(census_data, map_layer, colors))
+    shelters = cached_features(None if data_version is None else ('compact_shelters', data_version),
+                               lambda: shelter_payload(shelters_df, colors))
+    buffers = {key: value for key, value in shelters.items() if key != 'popup'}
+    buffers['radius'] = encode_array(np.full(shelters['count'], BUFFER_RADIUS_M), '<u2')
+
+    CompactPointLayer(tracts, {'fill': True, 'fillOpacity': 0.3, 'weight': 2},
+                      cluster=True, name="Census Tracts").add_to(m)
+    CompactPointLayer(buffers, {'fill': True, 'opacity': 0.1, 'fillOpacity': 0.2},
+                      name="Shelter Service Areas").add_to(m)
+    CompactPointLayer(shelters, {'radius': 8, 'fill': True, 'fillOpacity': 0.7},
+                      cluster=True, name="Existing Shelters").add_to(m)
+
+    if proposed_sites:
+        lats = [site['lat'] for site in proposed_sites]
+        lons = [site['lon'] for site in proposed_sites]
+        sites = compact_payload(lats, lons, popup_fields={'Site': list(range(1, len(lats) + 1))})
+        site_style = {'color': colors['baby_blue'], 'fillColor': colors['baby_blue'], 'fill': True}
+
+        CompactPointLayer(dict(sites, radius=encode_array(np.full(len(lats), BUFFER_RADIUS_M), '<u2')),
+                          dict(site_style, opacity=0.1, fillOpacity=0.2),
+                          name="Proposed Service Areas").add_to(m)
+        CompactPointLayer(sites, dict(site_style, radius=8, fillOpacity=0.7),
+                          name="Proposed Sites").add_to(m)
+
+    return m
@@ -0,0 +1,464 @@
+"""
+Service-area coverage of census tracts by shelters and proposed sites.
+
+Each tract is represented by equal-weight sample points spread over its
+area: points inside its polygon when a 'geometry' column is present,
+otherwise a sunflower pattern over a disc around the centroid. The sample
+points of every tract go into one k-d tree (on locally projected
+coordinates), so finding what a set of service buffers covers is a single
+vectorized radius query. A tract's covered fraction is the share of its
+samples within any buffer, and its covered unhoused count and population
+scale with that fraction.
+
+CoverageTracker keeps per-sample cover counts so sites can be added and
+removed one at a time, touching only the samples within the site's buffer.
+"""
+
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .spatial_index import EARTH_RADIUS_KM, coordinate_columns
+from .ttl_cache import TTLCache
+
+# Service radius around shelters and proposed sites (1 mile in meters)
+SERVICE_RADIUS_M = 1609
+
+# Radius of the disc standing in for a tract without geometry or area
+TRACT_RADIUS_M = 1000
+
+# Sample points per tract
+SAMPLES_PER_TRACT = 64
+
+# Sites per tree query in CoverageEngine.site_gains(); bounds the hit lists held at once
+GAIN_BLOCK_SIZE = 2000
+
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+# Engines kept per process, keyed by tract data version
+_engine_cache = TTLCache(maxsize=4)
+
+
+def sunflower_offsets(n: int) -> np.ndarray:
+    """
+    Evenly spread points over the unit disc (Vogel's sunflower pattern).
+
+    Args:
+        n: Number of points
+
+    Returns:
+        Array of (x, y) offsets, shape (n, 2), each point standing for an equal area
+    """
+    i = np.arange(n)
+    r = np.sqrt((i + 0.5) / n)
+    theta = i * GOLDEN_ANGLE
+    return np.column_stack([r * np.cos(theta), r * np.sin(theta)])
+
+
+class CoverageEngine:
+    """
+    Covered fraction, unhoused count and population of every tract.
+
+    Build once per tract dataset; each coverage query only touches the tree.
+    """
+
+    def __init__(self, tracts: pd.DataFrame, service_radius_m: float = SERVICE_RADIUS_M,
+                 tract_radius_m: float = TRACT_RADIUS_M,
+                 samples_per_tract: int = SAMPLES_PER_TRACT):
+        """
+        Initialize the engine and index the tract sample points.
+
+        Args:
+            tracts: Census tracts with centroid coordinates, 'Unhoused Count' and
+                'Population', and optionally 'Tract ID', 'Area (sq km)' (sizes
+                the disc) or a shapely 'geometry' column
+            service_radius_m: Service radius of every shelter and site in meters
+            tract_radius_m: Disc radius for tracts without geometry or area
+            samples_per_tract: Sample points per tract
+        """
+        from scipy.spatial import cKDTree
+
+        lat_column, lon_column = coordinate_columns(tracts)
+        self.tract_ids = (tracts['Tract ID'].astype(str).to_numpy() if 'Tract ID' in tracts
+                          else np.arange(len(tracts)).astype(str))
+        self.unhoused = tracts['Unhoused Count'].to_numpy(dtype=float)
+        self.population = tracts['Population'].to_numpy(dtype=float)
+        self.service_radius_km = service_radius_m / 1000
+
+        centroid_lats = tracts[lat_column].to_numpy(dtype=float)
+        centroid_lons = tracts[lon_column].to_numpy(dtype=float)
+        self._cos_lat0 = np.cos(np.radians(centroid_lats.mean())) if len(tracts) else 1.0
+
+        if 'geometry' in tracts:
+            xy, sample_tracts = self._polygon_samples(tracts['geometry'], samples_per_tract)
+        else:
+            if 'Area (sq km)' in tracts:
+                radius_km = np.sqrt(tracts['Area (sq km)'].to_numpy(dtype=float) / np.pi)
+            else:
+                radius_km = np.full(len(tracts), tract_radius_m / 1000)
+            offsets = sunflower_offsets(samples_per_tract)
+            centroids = self.project(centroid_lats, centroid_lons)
+            xy = (centroids[:, np.newaxis, :] +
+                  radius_km[:, np.newaxis, np.newaxis] * offsets[np.newaxis, :, :]).reshape(-1, 2)
+            sample_tracts = np.repeat(np.arange(len(tracts)), samples_per_tract)
+
+        self.sample_xy = xy
+        self.sample_tracts = sample_tracts
+        samples_per = np.bincount(sample_tracts, minlength=len(tracts)).astype(float)
+        # Share of its tract each sample stands for
+        self.sample_weights = 1 / samples_per[sample_tracts]
+        self._tree = cKDTree(xy)
+
+    def project(self, lats, lons) -> np.ndarray:
+        """Equirectangular projection to kilometers, centred on the tracts."""
+        return np.column_stack([
+            np.radians(np.asarray(lons, dtype=float)) * self._cos_lat0 * EARTH_RADIUS_KM,
+            np.radians(np.asarray(lats, dtype=float)) * EARTH_RADIUS_KM
+        ])
+
+    def _polygon_samples(self, geometries: pd.Series, samples_per_tract: int):
+        """Grid points inside each tract polygon, or its centroid when none fall inside."""
+        import shapely
+
+        xy, sample_tracts = [], []
+        for tract, geometry in enumerate(geometries):
+            min_lon, min_lat, max_lon, max_lat = geometry.bounds
+            lo, hi = self.project([min_lat, max_lat], [min_lon, max_lon])
+            spacing = np.sqrt((hi[0] - lo[0]) * (hi[1] - lo[1]) / samples_per_tract) or 1.0
+            x, y = np.meshgrid(np.arange(lo[0] + spacing / 2, hi[0], spacing),
+                               np.arange(lo[1] + spacing / 2, hi[1], spacing))
+            x, y = x.ravel(), y.ravel()
+
+            inside = shapely.contains_xy(
+                geometry,
+                np.degrees(x / (self._cos_lat0 * EARTH_RADIUS_KM)),
+                np.degrees(y / EARTH_RADIUS_KM)
+            )
+            if inside.any():
+                points = np.column_stack([x[inside], y[inside]])
+            else:
+                centroid = geometry.centroid
+                points = self.project([centroid.y], [centroid.x])
+            xy.append(points)
+            sample_tracts.append(np.full(len(points), tract))
+
+        return np.concatenate(xy), np.concatenate(sample_tracts)
+
+    def samples_within(self, lats, lons) -> List[np.ndarray]:
+        """
+        Sample points inside each site's service radius.
+
+        Args:
+            lats, lons: Site coordinates
+
+        Returns:
+            List with an array of sample positions per site
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        if len(lats) == 0:
+            return []
+        hits = self._tree.query_ball_point(self.project(lats, lons), self.service_radius_km,
+                                           return_sorted=False)
+        return [np.asarray(samples, dtype=np.intp) for samples in hits]
+
+    def covered_mask(self, lats, lons) -> np.ndarray:
+        """
+        Which sample points lie within any site's service radius.
+
+        Args:
+            lats, lons: Site coordinates
+
+        Returns:
+            Boolean array over the sample points
+        """
+        covered = np.zeros(len(self.sample_xy), dtype=bool)
+        hits = self.samples_within(lats, lons)
+        if hits:
+            covered[np.concatenate(hits)] = True
+        return covered
+
+    def site_gains(self, lats, lons, covered: Optional[np.ndarray] = None,
+                   block_size: int = GAIN_BLOCK_SIZE) -> np.ndarray:
+        """
+        Unhoused people each site would newly cover on its own.
+
+        Sites are queried in blocks, so memory stays bounded for any number
+        of sites.
+
+        Args:
+            lats, lons: Site coordinates
+            covered: Sample mask that is already covered, e.g. covered_mask()
+                of the existing shelters, or None
+            block_size: Sites per tree query
+
+        Returns:
+            Array of newly covered unhoused counts, one per site
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        values = self.sample_weights * self.unhoused[self.sample_tracts]
+        if covered is not None:
+            values = np.where(covered, 0.0, values)
+
+        gains = np.zeros(len(lats))
+        for start in range(0, len(lats), block_size):
+            hits = self.samples_within(lats[start:start + block_size], lons[start:start + block_size])
+            sites = np.repeat(np.arange(len(hits)), [len(samples) for samples in hits])
+            if len(sites):
+                gains[start:start + len(hits)] = np.bincount(
+                    sites, weights=values[np.concatenate(hits)], minlength=len(hits)
+                )
+        return gains
+
+    def covered_fraction(self, covered: np.ndarray) -> np.ndarray:
+        """Covered fraction of every tract from a sample mask."""
+        return np.bincount(self.sample_tracts, weights=self.sample_weights * covered,
+                           minlength=len(self.unhoused))
+
+    def tract_coverage(self, lats, lons) -> pd.DataFrame:
+        """
+        Coverage of every tract by sites at the given coordinates.
+
+        Args:
+            lats, lons: Site coordinates (shelters and/or proposed sites)
+
+        Returns:
+            DataFrame with Tract ID, Covered Fraction, Covered Unhoused,
+            Uncovered Unhoused and Covered Population per tract
+        """
+        return self.tract_table(self.covered_fraction(self.covered_mask(lats, lons)))
+
+    def tract_table(self, fraction: np.ndarray) -> pd.DataFrame:
+        """Per-tract coverage table (see tract_coverage()) from covered fractions."""
+        return pd.DataFrame({
+            'Tract ID': self.tract_ids,
+            'Covered Fraction': fraction,
+            'Covered Unhoused': fraction * self.unhoused,
+            'Uncovered Unhoused': (1 - fraction) * self.unhoused,
+            'Covered Population': fraction * self.population
+        })
+
+    def summary(self, lats, lons) -> Dict[str, float]:
+        """
+        Total covered and uncovered unhoused people and population.
+
+        Args:
+            lats, lons: Site coordinates
+
+        Returns:
+            Dict with covered/uncovered unhoused and population totals and
+            the covered share of the unhoused
+        """
+        return self.totals(self.covered_fraction(self.covered_mask(lats, lons)))
+
+    def totals(self, fraction: np.ndarray) -> Dict[str, float]:
+        """Coverage totals (see summary()) from per-tract covered fractions."""
+        covered_unhoused = float(fraction @ self.unhoused)
+        covered_population = float(fraction @ self.population)
+        total_unhoused = float(self.unhoused.sum())
+        return {
+            'covered_unhoused': covered_unhoused,
+            'uncovered_unhoused': total_unhoused - covered_unhoused,
+            'covered_population': covered_population,
+            'uncovered_population': float(self.population.sum()) - covered_population,
+            'unhoused_coverage': covered_unhoused / total_unhoused if total_unhoused else 0.0
+        }
+
+
+class CoverageTracker:
+    """
+    Incremental coverage as sites are added and removed.
+
+    Keeps how many sites cover each sample point and the covered fraction of
+    each tract. Adding or removing a site only visits the samples within its
+    service radius, so the cost is proportional to the tracts it affects
+    rather than to the whole dataset.
+    """
+
+    def __init__(self, engine: CoverageEngine, base_lats=(), base_lons=()):
+        """
+        Initialize the tracker.
+
+        Args:
+            engine: CoverageEngine for the tract dataset
+            base_lats, base_lons: Sites that are always present (existing shelters)
+        """
+        self.engine = engine
+        self.cover_counts = np.zeros(len(engine.sample_xy), dtype=np.int32)
+        self.fraction = np.zeros(len(engine.unhoused))
+        self.covered_unhoused = 0.0
+        self.gains: Dict[Hashable, float] = {}
+        self._site_samples: Dict[Hashable, np.ndarray] = {}
+        self._proposed: List[tuple] = []
+        self._next_key = 0
+
+        for i, samples in enumerate(engine.samples_within(base_lats, base_lons)):
+            self._add_samples(('base', i), samples)
+        self.base_covered_unhoused = self.covered_unhoused
+
+    def _sample_unhoused(self, samples: np.ndarray) -> np.ndarray:
+        tracts = self.engine.sample_tracts[samples]
+        return self.engine.sample_weights[samples] * self.engine.unhoused[tracts]
+
+    def _add_samples(self, key: Hashable, samples: np.ndarray) -> float:
+        newly_covered = samples[self.cover_counts[samples] == 0]
+        self.cover_counts[samples] += 1
+        np.add.at(self.fraction, self.engine.sample_tracts[newly_covered],
+                  self.engine.sample_weights[newly_covered])
+
+        gain = float(self._sample_unhoused(newly_covered).sum())
+        self.covered_unhoused += gain
+        self._site_samples[key] = samples
+        self.gains[key] = gain
+        return gain
+
+    def marginal_gain(self, lat: float, lon: float) -> float:
+        """
+        Unhoused people a site at (lat, lon) would newly cover, without adding it.
+
+        Args:
+            lat, lon: Site coordinates
+
+        Returns:
+            float: Additional covered unhoused count
+        """
+        samples = self.engine.samples_within([lat], [lon])[0]
+        return float(self._sample_unhoused(samples[self.cover_counts[samples] == 0]).sum())
+
+    def add_site(self, lat: float, lon: float) -> Hashable:
+        """
+        Add a site.
+
+        Args:
+            lat, lon: Site coordinates
+
+        Returns:
+            Key of the site; its marginal gain is gains[key]
+        """
+        key = self._next_key
+        self._next_key += 1
+        self._add_samples(key, self.engine.samples_within([lat], [lon])[0])
+        return key
+
+    def remove_site(self, key: Hashable) -> float:
+        """
+        Remove a site added with add_site().
+
+        Args:
+            key: Site key
+
+        Returns:
+            float: Unhoused people no longer covered by any site
+        """
+        samples = self._site_samples.pop(key)
+        self.gains.pop(key)
+        self.cover_counts[samples] -= 1
+        uncovered = samples[self.cover_counts[samples] == 0]
+        np.subtract.at(self.fraction, self.engine.sample_tracts[uncovered],
+                       self.engine.sample_weights[uncovered])
+
+        loss = float(self._sample_unhoused(uncovered).sum())
+        self.covered_unhoused -= loss
+        return loss
+
+    def sync(self, proposed_sites: List[Dict]) -> List[float]:
+        """
+        Match the tracked proposed sites to a list, updating only what changed.
+
+        Sites are compared in order: the common prefix is kept, tracked sites
+        after it are removed and the remaining listed sites are added.
+
+        Args:
+            proposed_sites: Proposed sites with 'lat' and 'lon'
+
+        Returns:
+            Marginal gain of each listed site, in list order, given the
+            shelters and the sites before it
+        """
+        coords = [(site['lat'], site['lon']) for site in proposed_sites]
+        keep = 0
+        while (keep < min(len(coords), len(self._proposed)) and
+               self._proposed[keep][0] == coords[keep]):
+            keep += 1
+
+        for _, key in reversed(self._proposed[keep:]):
+            self.remove_site(key)
+        del self._proposed[keep:]
+        for coord in coords[keep:]:
+            self._proposed.append((coord, self.add_site(*coord)))
+
+        return [self.gains[key] for _, key in self._proposed]
+
+    def summary(self) -> Dict[str, float]:
+        """Coverage totals of the current sites (see CoverageEngine.summary())."""
+        return self.engine.totals(self.fraction)
+
+    def tract_coverage(self) -> pd.DataFrame:
+        """Per-tract coverage of the current sites (see CoverageEngine.tract_coverage())."""
+        return self.engine.tract_table(self.fraction)
+
+
+def site_coordinates(shelters: Optional[pd.DataFrame],
+                     proposed_sites: Optional[List[Dict]] = None):
+    """
+    Coordinates of existing shelters and proposed sites as one pair of arrays.
+
+    Args:
+        shelters: Shelters with coordinate columns, or None
+        proposed_sites: Proposed sites with 'lat' and 'lon', or None
+
+    Returns:
+        Tuple of (lats, lons) arrays
+    """
+    lats, lons = [], []
+    if shelters is not None and len(shelters):
+        lat_column, lon_column = coordinate_columns(shelters)
+        lats.append(shelters[lat_column].to_numpy(dtype=float))
+        lons.append(shelters[lon_column].to_numpy(dtype=float))
+    if proposed_sites:
+        lats.append(np.array([site['lat'] for site in proposed_sites], dtype=float))
+        lons.append(np.array([site['lon'] for site in proposed_sites], dtype=float))
+    if not lats:
+        return np.empty(0), np.empty(0)
+    return np.concatenate(lats), np.concatenate(lons)
+
+
+def get_coverage_engine(tracts: pd.DataFrame, data_version: Hashable) -> CoverageEngine:
+    """
+    CoverageEngine for a tract dataset, built once per data version.
+
+    Args:
+        tracts: Census tracts
+        data_version: Version of the tract data, e.g. data_loading.dataset_version()
+
+    Returns:
+        CoverageEngine
+    """
+    engine = _engine_cache.get(data_version)
+    if engine is None:
+        engine = CoverageEngine(tracts)
+        _engine_cache.put(data_version, engine)
+    return engine
+
+
+def get_coverage_tracker(state, engine: CoverageEngine, shelters: pd.DataFrame,
+                         data_version: Hashable) -> CoverageTracker:
+    """
+    CoverageTracker kept in a session state, rebuilt when the data changes.
+
+    Args:
+        state: Mutable mapping that outlives reruns, e.g. st.session_state
+        engine: CoverageEngine for the tract dataset
+        shelters: Existing shelters, always covered
+        data_version: Version of the tract and shelter data
+
+    Returns:
+        CoverageTracker
+    """
+    tracker = state.get('coverage_tracker')
+    if tracker is None or state.get('coverage_tracker_version') != data_version:
+        tracker = CoverageTracker(engine, *site_coordinates(shelters))
+        state['coverage_tracker'] = tracker
+        state['coverage_tracker_version'] = data_version
+    return tracker
@@ -0,0 +1,199 @@
+"""
+Typed, memoized loading of the SafeSpace datasets.
+
+Datasets are resolved under a configurable data root and read with explicit
+dtypes (Tract ID stays a string, so leading zeros survive). Loaded frames are
+memoized in-process and invalidated when the source file's mtime or size
+changes, so Streamlit reruns don't re-read anything. Optionally each CSV is
+converted to Parquet or Feather on first load and later loads read the
+columnar copy instead.
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the dataset files, overridable through the environment
+DATA_ROOT = os.environ.get('SAFESPACE_DATA_ROOT',
+                           os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Columnar copy written on first load: 'parquet', 'feather' or '' for none
+DATA_CACHE_FORMAT = os.environ.get('SAFESPACE_DATA_CACHE_FORMAT', '')
+
+# Directory for the columnar copies, relative to the data root unless absolute
+DATA_CACHE_DIR = os.environ.get('SAFESPACE_DATA_CACHE_DIR', '.data_cache')
+
+DATASETS = {
+    'census_tracts': {
+        'filename': 'mock_census_tracts_sanjose.csv',
+        'dtypes': {
+            'Tract ID': 'string',
+            'Population': 'int64',
+            'Unhoused Count': 'int64',
+            'Poverty Rate (%)': 'float64',
+            'Latitude': 'float64',
+            'Longitude': 'float64'
+        }
+    },
+    'shelters': {
+        'filename': 'mock_shelters_sanjose.csv',
+        'dtypes': {
+            'Shelter Name': 'string',
+            'Latitude': 'float64',
+            'Longitude': 'float64',
+            'Capacity': 'int64',
+            'Current Occupancy': 'int64',
+            'Shelter Type': 'category'
+        }
+    },
+    'pit_summary': {
+        'filename': 'mock_pit_summary_sanjose.csv',
+        'dtypes': {
+            'Category': 'string',
+            'Count': 'int64'
+        }
+    }
+}
+
+# Memoized frames keyed by source path: (file stamp, DataFrame)
+_memo: Dict[str, Tuple[Tuple[int, int], pd.DataFrame]] = {}
+_memo_lock = threading.Lock()
+
+
+def dataset_path(name: str, root: Optional[str] = None) -> str:
+    """
+    Path of a dataset's source file.
+
+    Args:
+        name: Key in DATASETS
+        root: Data root, defaults to DATA_ROOT
+
+    Returns:
+        str: Absolute path of the CSV
+    """
+    if name not in DATASETS:
+        raise KeyError(f"Unknown dataset '{name}'. Available: {', '.join(DATASETS)}")
+    return os.path.abspath(os.path.join(root or DATA_ROOT, DATASETS[name]['filename']))
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def dataset_version(name: str, root: Optional[str] = None) -> str:
+    """
+    Token that changes whenever a dataset's source file changes.
+
+    Args:
+        name: Key in DATASETS
+        root: Data root, defaults to DATA_ROOT
+
+    Returns:
+        str: Version token built from the file's mtime and size
+    """
+    mtime_ns, size = _file_stamp(dataset_path(name, root))
+    return f"{mtime_ns:x}-{size:x}"
+
+
+def _read_csv(path: str, dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Read a CSV with explicit dtypes, failing clearly on missing columns."""
+    header = pd.read_csv(path, nrows=0).columns
+    missing = [column for column in dtypes if column not in header]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} is missing columns: {', '.join(missing)}")
+    return pd.read_csv(path, dtype=dtypes)
+
+
+def _read_columnar(path: str, dtypes: Dict[str, str], root: str, cache_format: str) -> pd.DataFrame:
+    """Read the columnar copy of a CSV, (re)writing it when stale."""
+    cache_dir = os.path.join(root, DATA_CACHE_DIR)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}.{cache_format}")
+
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        if cache_format == 'parquet':
+            return pd.read_parquet(cache_path)
+        return pd.read_feather(cache_path)
+
+    df = _read_csv(path, dtypes)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        if cache_format == 'parquet':
+            df.to_parquet(cache_path, index=False)
+        else:
+            df.to_feather(cache_path)
+        logger.info(f"Wrote {cache_format} copy of {os.path.basename(path)} to {cache_path}")
+    except (ImportError, OSError) as e:
+        logger.warning(f"Could not write {cache_format} copy of {os.path.basename(path)}: {str(e)}")
+    return df
+
+
+def load_dataset(name: str, root: Optional[str] = None,
+                 cache_format: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load a dataset with its typed schema, memoized until the file changes.
+
+    Args:
+        name: Key in DATASETS
+        root: Data root, defaults to DATA_ROOT
+        cache_format: 'parquet', 'feather' or '' to read the CSV directly,
+            defaults to DATA_CACHE_FORMAT
+
+    Returns:
+        DataFrame (a copy, so callers may modify it freely)
+    """
+    root = root or DATA_ROOT
+    path = dataset_path(name, root)
+    cache_format = DATA_CACHE_FORMAT if cache_format is None else cache_format
+    if cache_format not in ('', 'parquet', 'feather'):
+        raise ValueError(f"Unsupported cache format '{cache_format}'. Use 'parquet' or 'feather'.")
+
+    stamp = _file_stamp(path)
+    with _memo_lock:
+        memo = _memo.get(path)
+        if memo is not None and memo[0] == stamp:
+            return memo[1].copy()
+
+    dtypes = DATASETS[name]['dtypes']
+    if cache_format:
+        df = _read_columnar(path, dtypes, root, cache_format)
+    else:
+        df = _read_csv(path, dtypes)
+
+    with _memo_lock:
+        _memo[path] = (stamp, df)
+    return df.copy()
+
+
+def read_dataset_file(name: str, path: str) -> pd.DataFrame:
+    """
+    Read a dataset's schema from an explicit CSV or Parquet file, unmemoized.
+
+    Args:
+        name: Key in DATASETS whose schema the file follows
+        path: CSV or Parquet file (by extension)
+
+    Returns:
+        DataFrame
+    """
+    dtypes = DATASETS[name]['dtypes']
+    if os.path.splitext(path)[1].lower() not in ('.parquet', '.pq'):
+        return _read_csv(path, dtypes)
+
+    df = pd.read_parquet(path)
+    missing = [column for column in dtypes if column not in df.columns]
+    if missing:
+        raise ValueError(f"{os.path.basename(path)} is missing columns: {', '.join(missing)}")
+    return df.astype(dtypes)
+
+
+def clear_memo() -> None:
+    """Drop every memoized dataset."""
+    with _memo_lock:
+        _memo.clear()
@@ -0,0 +1,93 @@
+"""
+Build feasibility of proposed Emergency Interim Housing (EIH) sites.
+
+Each site is rated on flood risk, soil stability and terrain slope, which
+set its estimated site-prep cost and a 0-1 feasibility score. Sites are
+evaluated as whole batches of coordinates. The hazards come from the raster
+or polygon layers in hazard_layers.HAZARD_DIR where present; sites a layer
+doesn't cover, and hazards without a layer, fall back to the placeholder
+boundaries below.
+
+A raster covers its own grid, minus nodata pixels. A polygon layer covers
+the boundary in <layer>_extent.geojson or extent.geojson (the county
+boundary, say) when one is installed, and otherwise everywhere: a site
+outside every flood-zone polygon is then low flood risk wherever it is,
+never the placeholder's guess.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .hazard_layers import HazardLayers, get_hazard_layers
+
+# Placeholder hazard boundaries for San Jose: flood-prone west of this longitude,
+# unstable soil south of the first latitude, steep terrain north of the second
+FLOOD_RISK_MAX_LON = -121.91
+UNSTABLE_SOIL_MAX_LAT = 37.32
+STEEP_SLOPE_MIN_LAT = 37.35
+
+# Construction cost before site preparation, in $/sqft
+BASE_COST_SQFT = 250
+
+
+def evaluate_feasibility_batch(lats, lons, hazards: Optional[HazardLayers] = None) -> pd.DataFrame:
+    """
+    Evaluate the build feasibility of many sites at once.
+
+    Args:
+        lats, lons: Site coordinates
+        hazards: Hazard layers to sample, defaulting to the ones in HAZARD_DIR
+
+    Returns:
+        DataFrame with Flood Risk, Soil Stability and Terrain Slope
+        (categorical), Estimated Cost ($/sqft) and Feasibility Score per site
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    at_risk = {
+        'flood': lons < FLOOD_RISK_MAX_LON,
+        'soil': lats < UNSTABLE_SOIL_MAX_LAT,
+        'slope': lats > STEEP_SLOPE_MIN_LAT
+    }
+    hazards = get_hazard_layers() if hazards is None else hazards
+    if hazards is not None:
+        for name, (mask, known) in hazards.masks(lats, lons).items():
+            at_risk[name] = np.where(known, mask, at_risk[name])
+    high_flood_risk, unstable_soil, steep_slope = at_risk['flood'], at_risk['soil'], at_risk['slope']
+
+    site_prep_multiplier = np.where(steep_slope, 1.4, 1.2)
+    est_cost = np.round(BASE_COST_SQFT * site_prep_multiplier, 2)
+
+    score = (1.0
+             - np.where(high_flood_risk, 0.3, 0.0)
+             - np.where(unstable_soil, 0.3, 0.0)
+             - np.where(steep_slope, 0.2, 0.1))
+
+    return pd.DataFrame({
+        "Flood Risk": pd.Categorical.from_codes(high_flood_risk.astype(np.int8),
+                                                categories=["Low", "High"]),
+        "Soil Stability": pd.Categorical.from_codes(unstable_soil.astype(np.int8),
+                                                    categories=["Stable", "Unstable"]),
+        "Terrain Slope": pd.Categorical.from_codes(steep_slope.astype(np.int8),
+                                                   categories=["Moderate", "Steep"]),
+        "Estimated Cost ($/sqft)": est_cost,
+        "Feasibility Score": np.round(np.maximum(score, 0), 2)
+    })
+
+
+def evaluate_feasibility(lat: float, lon: float) -> Dict:
+    """
+    Evaluate the build feasibility of one site.
+
+    Args:
+        lat, lon: Site coordinates
+
+    Returns:
+        dict: The evaluate_feasibility_batch() columns as plain Python values
+    """
+    row = evaluate_feasibility_batch([lat], [lon]).iloc[0]
+    return {column: (value.item() if hasattr(value, 'item') else value)
+            for column, value in row.items()}
@@ -0,0 +1,247 @@
+"""
+Shared geocoding helpers for the SafeSpace apps.
+
+Geocode results are cached persistently in SQLite, keyed by the normalized
+address string, so repeat lookups never touch the network. Misses are cached
+too (with a shorter TTL) so unknown addresses aren't re-queried on every click.
+A miss is scoped to the lookup that produced it: found addresses are shared by
+every lookup, but a single-query lookup's miss doesn't stop a lookup with more
+fallback queries from trying them.
+Addresses in the local address-point index (see offline_geocoder) are answered
+before either, and the network can be switched off entirely for air-gapped use.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Cache location and lifetimes, overridable through the environment
+GEOCODE_CACHE_PATH = os.environ.get(
+    'SAFESPACE_GEOCODE_CACHE',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 'geocode_cache.sqlite')
+)
+GEOCODE_CACHE_TTL = float(os.environ.get('SAFESPACE_GEOCODE_TTL', 30 * 24 * 3600))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get('SAFESPACE_GEOCODE_NEGATIVE_TTL', 24 * 3600))
+
+# Whether addresses missing from the offline index may be looked up over the network
+GEOCODE_NETWORK_FALLBACK = os.environ.get('SAFESPACE_GEOCODE_NETWORK', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def normalize_address(address: str) -> str:
+    """
+    Canonical form of an address used as the cache key.
+
+    Lowercases, drops punctuation other than '#', '/' and '-', and collapses
+    whitespace, so "1661 Alum Rock Ave,  San Jose" and "1661 alum rock ave san jose"
+    share an entry.
+
+    Args:
+        address: Address as typed by the user
+
+    Returns:
+        str: Normalized address
+    """
+    address = re.sub(r"[^\w\s#/-]", " ", address.lower())
+    return " ".join(address.split())
+
+
+def lookup_scope(query_templates: Iterable[str]) -> str:
+    """
+    Cache scope of a lookup that tries the given query variants.
+
+    Lookups trying the same variants share their cached misses.
+
+    Args:
+        query_templates: Query variants with an {address} placeholder, most
+            specific first
+
+    Returns:
+        str: Scope to pass to GeocodeCache, cached_geocode() or geocode()
+    """
+    return " | ".join(query_templates)
+
+
+class GeocodeCache:
+    """
+    Persistent geocode cache backed by a SQLite file.
+
+    Safe to share between Streamlit sessions and between the apps; each
+    thread gets its own connection.
+    """
+
+    def __init__(self, path: str = GEOCODE_CACHE_PATH, ttl: float = GEOCODE_CACHE_TTL,
+                 negative_ttl: float = GEOCODE_NEGATIVE_TTL):
+        """
+        Initialize the cache, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds a found address stays cached
+            negative_ttl: Seconds a not-found address stays cached for the
+                lookup scope that didn't find it
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._local = threading.local()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocodes ("
+                " key TEXT PRIMARY KEY,"
+                " found INTEGER NOT NULL,"
+                " lat REAL, lon REAL, address TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS geocode_misses ("
+                " key TEXT NOT NULL,"
+                " scope TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (key, scope))"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, address: str, scope: str = '') -> Tuple[bool, Optional[Dict]]:
+        """
+        Look up an address.
+
+        Args:
+            address: Address as typed by the user
+            scope: Lookup scope (see lookup_scope()); a cached miss only
+                counts for the scope that stored it
+
+        Returns:
+            Tuple of (hit, result). result is None for a cached miss.
+        """
+        key = normalize_address(address)
+        conn = self._connection()
+        now = time.time()
+        # Rows with found = 0 predate scoped misses and are ignored
+        row = conn.execute(
+            "SELECT lat, lon, address, created_at FROM geocodes WHERE key = ? AND found = 1",
+            (key,)
+        ).fetchone()
+        if row is not None and now - row[3] <= self.ttl:
+            return True, {'lat': row[0], 'lon': row[1], 'address': row[2]}
+
+        row = conn.execute(
+            "SELECT created_at FROM geocode_misses WHERE key = ? AND scope = ?",
+            (key, scope)
+        ).fetchone()
+        if row is not None and now - row[0] <= self.negative_ttl:
+            return True, None
+        return False, None
+
+    def put(self, address: str, result: Optional[Dict], scope: str = '') -> None:
+        """
+        Store a geocode result, or a miss when result is None.
+
+        A found address is shared by every scope and clears the address's
+        cached misses.
+
+        Args:
+            address: Address as typed by the user
+            result: Dict with 'lat', 'lon' and optionally 'address', or None
+            scope: Lookup scope the miss is stored for
+        """
+        key = normalize_address(address)
+        with self._connection() as conn:
+            if result is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode_misses (key, scope, created_at) VALUES (?, ?, ?)",
+                    (key, scope, time.time())
+                )
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO geocodes (key, found, lat, lon, address, created_at)"
+                " VALUES (?, 1, ?, ?, ?, ?)",
+                (key, result['lat'], result['lon'], result.get('address'), time.time())
+            )
+            conn.execute("DELETE FROM geocode_misses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM geocodes")
+            conn.execute("DELETE FROM geocode_misses")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """The process-wide GeocodeCache at GEOCODE_CACHE_PATH."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = GeocodeCache()
+        return _default_cache
+
+
+def cached_geocode(address: str, lookup: Callable[[str], Optional[Dict]],
+                   cache: Optional[GeocodeCache] = None, scope: str = '') -> Optional[Dict]:
+    """
+    Geocode an address through the persistent cache.
+
+    Args:
+        address: Address as typed by the user
+        lookup: Network geocoder returning a dict with 'lat', 'lon' and
+            'address', or None when the address can't be found. Exceptions
+            propagate and are not cached.
+        cache: Cache to use, defaults to get_geocode_cache()
+        scope: Identifies the queries lookup tries (see lookup_scope()), so
+            its misses aren't reused by lookups trying other queries
+
+    Returns:
+        Geocode result dict, or None when the address can't be found
+    """
+    cache = cache or get_geocode_cache()
+    hit, result = cache.get(address, scope)
+    if hit:
+        return result
+
+    result = lookup(address)
+    cache.put(address, result, scope)
+    return result
+
+
+def geocode(address: str, lookup: Callable[[str], Optional[Dict]],
+            cache: Optional[GeocodeCache] = None,
+            network: bool = GEOCODE_NETWORK_FALLBACK, scope: str = '') -> Optional[Dict]:
+    """
+    Geocode an address from the offline index, falling back to the network.
+
+    Args:
+        address: Address as typed by the user
+        lookup: Network geocoder, see cached_geocode()
+        cache: Cache for network results, defaults to get_geocode_cache()
+        network: Whether addresses missing from the offline index may be
+            looked up over the network
+        scope: Lookup scope for cached misses, see cached_geocode()
+
+    Returns:
+        Geocode result dict, or None when the address can't be found
+    """
+    from .offline_geocoder import get_offline_geocoder
+
+    offline = get_offline_geocoder()
+    result = offline.lookup(address) if offline is not None else None
+    if result is not None or not network:
+        return result
+    return cached_geocode(address, lookup, cache, scope)
@@ -0,0 +1,564 @@
+"""
+Hazard layers for build feasibility: flood zones, soil stability and slope.
+
+Each layer is a single-band raster stored as a `.npy` array next to a JSON
+sidecar holding its affine transform, CRS and nodata value. Arrays are
+opened memory-mapped for random access, so a county-wide layer costs no
+memory up front and a batch lookup only pages in the pixels its sites fall
+on: coordinates are turned into pixel indices with the inverse transform
+and read with one fancy-indexing pass, a constant cost per site whatever
+the raster size.
+
+GeoTIFFs are converted once with convert_geotiff() (needs rasterio), and a
+slope layer can be derived from a DEM with slope_degrees().
+
+A layer can also be a set of vector polygons (<layer>.geojson), as the
+county publishes flood zones and liquefaction areas. PolygonLayer holds
+them prepared in an STRtree: a batch lookup is one bounding-box query for
+all sites followed by one vectorized contains test of the candidate pairs.
+A polygon layer describes the whole area it was published for, so a site
+outside every polygon is known to be out of the hazard. That area is the
+boundary in <layer>_extent.geojson or the shared extent.geojson (e.g. the
+county boundary) when one exists, and otherwise everywhere.
+"""
+
+import json
+import logging
+import mmap
+import os
+import threading
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .data_loading import DATA_ROOT
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the hazard layers, overridable through the environment
+HAZARD_DIR = os.environ.get('SAFESPACE_HAZARD_DIR', os.path.join(DATA_ROOT, 'hazard_layers'))
+
+# Layer file stems within HAZARD_DIR: a 0/1 flood-zone mask, soil instability
+# classes and terrain slope in degrees
+HAZARD_LAYERS = ('flood_zone', 'soil_class', 'slope')
+
+# Boundary of the area the polygon layers describe, shared by every layer
+# without its own <layer>_extent.geojson
+EXTENT_FILE = 'extent.geojson'
+
+# Soil classes (0 very low .. 4 very high instability) treated as unstable
+UNSTABLE_SOIL_MIN_CLASS = 3
+
+# Slope, in degrees, from which terrain counts as steep
+STEEP_SLOPE_MIN_DEG = 10.0
+
+# Soil class codes for text susceptibility classes in polygon layers
+SOIL_CLASS_CODES = {
+    'very low': 0, 'vl': 0,
+    'low': 1, 'l': 1,
+    'moderate': 2, 'm': 2,
+    'high': 3, 'h': 3,
+    'very high': 4, 'vh': 4
+}
+
+# Rows of a GeoTIFF or DEM processed at a time when converting
+CONVERT_BLOCK_ROWS = 1024
+
+# Meters per degree of latitude, and of longitude at the equator
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LON = 111320.0
+
+WGS84 = 'EPSG:4326'
+
+
+class RasterLayer:
+    """
+    Single-band raster sampled at point locations.
+
+    `transform` maps pixel (col, row) to CRS (x, y) in rasterio's Affine
+    order (a, b, c, d, e, f): x = a*col + b*row + c, y = d*col + e*row + f.
+    """
+
+    def __init__(self, data: np.ndarray, transform: Sequence[float], crs: str = WGS84,
+                 nodata: Optional[float] = None):
+        """
+        Initialize the layer.
+
+        Args:
+            data: (rows, cols) array, typically a read-only memmap
+            transform: Affine (a, b, c, d, e, f) from pixel to CRS coordinates
+            crs: CRS of the transform; sites are reprojected from WGS84 with
+                pyproj when it isn't EPSG:4326
+            nodata: Pixel value meaning "no data", if any
+        """
+        if data.ndim != 2:
+            raise ValueError("Hazard rasters must have a single band")
+        self.data = data
+        self.transform = tuple(float(v) for v in transform)
+        self.crs = crs
+        self.nodata = nodata
+
+        a, b, c, d, e, f = self.transform
+        determinant = a * e - b * d
+        if determinant == 0:
+            raise ValueError("Raster transform is not invertible")
+        # Inverse affine, CRS (x, y) -> fractional pixel (col, row)
+        self._inverse = (e / determinant, -b / determinant, -d / determinant, a / determinant, c, f)
+        self._to_crs = None
+        if crs.upper() != WGS84:
+            from pyproj import Transformer
+            self._to_crs = Transformer.from_crs(WGS84, crs, always_xy=True)
+
+    @classmethod
+    def open(cls, path: str) -> 'RasterLayer':
+        """
+        Open a layer written by write(), memory-mapped.
+
+        Args:
+            path: The .npy file or its stem; the sidecar is <stem>.json
+
+        Returns:
+            RasterLayer
+        """
+        stem = path[:-4] if path.endswith('.npy') else path
+        with open(f"{stem}.json") as f:
+            meta = json.load(f)
+        data = map_npy(f"{stem}.npy")
+        return cls(data, meta['transform'], meta.get('crs', WGS84), meta.get('nodata'))
+
+    @staticmethod
+    def write(path: str, data: np.ndarray, transform: Sequence[float], crs: str = WGS84,
+              nodata: Optional[float] = None) -> None:
+        """
+        Write a layer as <stem>.npy plus its <stem>.json sidecar.
+
+        Args:
+            path: The .npy file or its stem
+            data: (rows, cols) array
+            transform: Affine (a, b, c, d, e, f) from pixel to CRS coordinates
+            crs: CRS of the transform
+            nodata: Pixel value meaning "no data", if any
+        """
+        stem = path[:-4] if path.endswith('.npy') else path
+        directory = os.path.dirname(stem)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.save(f"{stem}.npy", data)
+        write_sidecar(stem, transform, crs, nodata)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.data.shape
+
+    def pixel_indices(self, lats, lons) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pixel row and column of each location.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes
+
+        Returns:
+            Tuple of (rows, cols, inside); rows and cols are only meaningful
+            where inside is True
+        """
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        if self._to_crs is not None:
+            x, y = self._to_crs.transform(x, y)
+
+        ia, ib, id_, ie, c, f = self._inverse
+        dx, dy = x - c, y - f
+        cols = np.floor(ia * dx + ib * dy)
+        rows = np.floor(id_ * dx + ie * dy)
+
+        height, width = self.data.shape
+        inside = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+        return (np.where(inside, rows, 0).astype(np.intp),
+                np.where(inside, cols, 0).astype(np.intp), inside)
+
+    def sample(self, lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pixel values under each location.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes
+
+        Returns:
+            Tuple of (values, valid); values are 0 where valid is False,
+            i.e. outside the raster or on a nodata pixel
+        """
+        rows, cols, inside = self.pixel_indices(lats, lons)
+        values = np.zeros(len(rows), dtype=self.data.dtype)
+        values[inside] = self.data[rows[inside], cols[inside]]
+
+        valid = inside
+        if self.nodata is not None:
+            nodata = (np.isnan(values) if np.isnan(self.nodata)
+                      else values == np.asarray(self.nodata).astype(self.data.dtype))
+            valid = inside & ~nodata
+            values[~valid] = 0
+        return values, valid
+
+
+class PolygonLayer:
+    """
+    Vector polygons, each carrying a value, sampled at point locations.
+
+    Polygons are prepared and indexed in an STRtree once. A site's value is
+    the largest value of the polygons containing it, 0 outside them. Sites
+    outside the extent are unknown; without an extent the layer covers
+    everywhere, since a site that no polygon contains is out of the hazard
+    rather than off the map.
+    """
+
+    def __init__(self, geometries: Sequence, values: Optional[Sequence[float]] = None,
+                 extent=None):
+        """
+        Initialize the layer.
+
+        Args:
+            geometries: Shapely polygons in WGS84 lon/lat
+            values: Value per polygon, 1 for every polygon when not given
+            extent: Area the layer describes (e.g. the county boundary); sites
+                outside it are unknown. None covers everywhere.
+        """
+        import shapely
+        from shapely.strtree import STRtree
+
+        self.geometries = np.asarray(geometries, dtype=object)
+        self.values = (np.ones(len(self.geometries)) if values is None
+                       else np.asarray(values, dtype=float))
+        if len(self.values) != len(self.geometries):
+            raise ValueError("Polygon layer needs one value per geometry")
+
+        # Prepared polygons answer contains in O(log vertices) instead of
+        # O(vertices); STRtree queries with a predicate would prepare the
+        # points rather than the polygons, so the contains test is done
+        # separately with contains_xy
+        shapely.prepare(self.geometries)
+        self.tree = STRtree(self.geometries)
+        self.extent = extent
+        if extent is not None:
+            shapely.prepare(extent)
+
+    @classmethod
+    def from_file(cls, path: str, value_column: str = 'value',
+                  extent_path: Optional[str] = None) -> 'PolygonLayer':
+        """
+        Read polygons from GeoJSON, or any format geopandas reads.
+
+        Args:
+            path: Vector file; GeoJSON is read without geopandas
+            value_column: Property holding each polygon's value; text soil
+                classes ('High', 'VH', ...) are mapped through SOIL_CLASS_CODES.
+                Every polygon gets 1 when no feature has the property.
+            extent_path: Vector file whose polygons, merged, are the layer
+                extent; the layer covers everywhere when not given
+
+        Returns:
+            PolygonLayer
+        """
+        geometries, raw_values = read_polygons(path, value_column)
+
+        values = None
+        if any(value is not None for value in raw_values):
+            values = [SOIL_CLASS_CODES.get(str(value).strip().lower(), np.nan)
+                      if isinstance(value, str) else value for value in raw_values]
+            values = np.asarray(values, dtype=float)
+            if np.isnan(values).any():
+                raise ValueError(f"'{value_column}' has values that are not numbers or soil classes")
+
+        extent = None
+        if extent_path is not None:
+            import shapely
+
+            boundaries, _ = read_polygons(extent_path)
+            if not boundaries:
+                raise ValueError(f"{extent_path} has no polygons")
+            extent = shapely.union_all(boundaries)
+        return cls(geometries, values, extent)
+
+    def sample(self, lats, lons) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Polygon values under each location.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes
+
+        Returns:
+            Tuple of (values, valid); valid is False outside the layer extent
+        """
+        import shapely
+
+        x = np.asarray(lons, dtype=float)
+        y = np.asarray(lats, dtype=float)
+        values = np.zeros(len(x))
+
+        site_idx, polygon_idx = self.tree.query(shapely.points(x, y))
+        hit = shapely.contains_xy(self.geometries[polygon_idx], x[site_idx], y[site_idx])
+        np.maximum.at(values, site_idx[hit], self.values[polygon_idx[hit]])
+
+        if self.extent is not None:
+            valid = shapely.intersects_xy(self.extent, x, y)
+        else:
+            valid = np.isfinite(x) & np.isfinite(y)
+        return values, valid
+
+
+def read_polygons(path: str, value_column: Optional[str] = None) -> Tuple[list, list]:
+    """
+    Read the polygons of a GeoJSON file, or any format geopandas reads, in WGS84.
+
+    Args:
+        path: Vector file; GeoJSON is read without geopandas
+        value_column: Property to read alongside each polygon
+
+    Returns:
+        Tuple of (geometries, values); values holds None for features
+        without the property and is empty when value_column isn't given
+        or (outside GeoJSON) no feature has it
+    """
+    if path.lower().endswith(('.geojson', '.json')):
+        from shapely.geometry import shape
+
+        with open(path) as f:
+            features = [feature for feature in json.load(f)['features'] if feature.get('geometry')]
+        geometries = [shape(feature['geometry']) for feature in features]
+        values = ([(feature.get('properties') or {}).get(value_column) for feature in features]
+                  if value_column else [])
+        return geometries, values
+
+    import geopandas as gpd
+
+    frame = gpd.read_file(path)
+    if frame.crs is not None:
+        frame = frame.to_crs(WGS84)
+    frame = frame[frame.geometry.notna()]
+    values = list(frame[value_column]) if value_column in frame.columns else []
+    return list(frame.geometry), values
+
+
+# Either kind of layer; both answer sample(lats, lons) -> (values, valid)
+HazardLayer = Union[RasterLayer, PolygonLayer]
+
+
+class HazardLayers:
+    """
+    Flood, soil and slope layers answering which sites are at risk.
+
+    Each layer is a RasterLayer or a PolygonLayer. Any layer may be missing;
+    masks() only reports the hazards it has layers for, and marks sites
+    outside a layer or on its nodata pixels as unknown.
+    """
+
+    def __init__(self, flood_zone: Optional[HazardLayer] = None,
+                 soil_class: Optional[HazardLayer] = None,
+                 slope: Optional[HazardLayer] = None,
+                 unstable_soil_min_class: int = UNSTABLE_SOIL_MIN_CLASS,
+                 steep_slope_min_deg: float = STEEP_SLOPE_MIN_DEG):
+        """
+        Initialize the layers.
+
+        Args:
+            flood_zone: Layer that is nonzero inside flood zones
+            soil_class: Layer of soil instability classes
+            slope: Layer of terrain slope in degrees
+            unstable_soil_min_class: Lowest soil class counted as unstable
+            steep_slope_min_deg: Lowest slope counted as steep
+        """
+        self.flood_zone = flood_zone
+        self.soil_class = soil_class
+        self.slope = slope
+        self.unstable_soil_min_class = unstable_soil_min_class
+        self.steep_slope_min_deg = steep_slope_min_deg
+
+    @classmethod
+    def load(cls, directory: str = HAZARD_DIR) -> Optional['HazardLayers']:
+        """
+        Open whichever of the HAZARD_LAYERS exist in a directory.
+
+        A raster (<layer>.npy plus <layer>.json) is used when present, else
+        polygons from <layer>.geojson, whose 'value' property (if any) gives
+        each polygon's value. A polygon layer's extent is read from
+        <layer>_extent.geojson, else EXTENT_FILE; with neither it covers
+        everywhere.
+
+        Args:
+            directory: Directory holding the layer files
+
+        Returns:
+            HazardLayers, or None when the directory has none of the layers
+        """
+        layers = {}
+        for name in HAZARD_LAYERS:
+            stem = os.path.join(directory, name)
+            if os.path.exists(f"{stem}.npy") and os.path.exists(f"{stem}.json"):
+                layers[name] = RasterLayer.open(stem)
+            elif os.path.exists(f"{stem}.geojson"):
+                extent_path = next((path for path in (f"{stem}_extent.geojson",
+                                                      os.path.join(directory, EXTENT_FILE))
+                                    if os.path.exists(path)), None)
+                layers[name] = PolygonLayer.from_file(f"{stem}.geojson", extent_path=extent_path)
+        if not layers:
+            return None
+        logger.info(f"Loaded hazard layers {', '.join(layers)} from {directory}")
+        return cls(**layers)
+
+    def masks(self, lats, lons) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Hazard masks for many sites at once.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes
+
+        Returns:
+            Dict with 'flood', 'soil' and/or 'slope' -> (at_risk, known)
+            boolean arrays, for the layers that are present
+        """
+        masks = {}
+        if self.flood_zone is not None:
+            values, known = self.flood_zone.sample(lats, lons)
+            masks['flood'] = (values != 0, known)
+        if self.soil_class is not None:
+            values, known = self.soil_class.sample(lats, lons)
+            masks['soil'] = (values >= self.unstable_soil_min_class, known)
+        if self.slope is not None:
+            values, known = self.slope.sample(lats, lons)
+            masks['slope'] = (values >= self.steep_slope_min_deg, known)
+        return masks
+
+
+def map_npy(path: str) -> np.ndarray:
+    """
+    Memory-map a .npy file read-only for random access.
+
+    Unlike np.load(mmap_mode='r'), the mapping is advised MADV_RANDOM where
+    the platform supports it: a lookup then faults in only the page under
+    its site instead of the kernel's readahead window, which on a cold file
+    cuts both the time per site and the pages held by about an order of
+    magnitude.
+
+    Args:
+        path: .npy file
+
+    Returns:
+        Read-only array backed by the mapping
+    """
+    read_header = {(1, 0): np.lib.format.read_array_header_1_0,
+                   (2, 0): np.lib.format.read_array_header_2_0}
+    with open(path, 'rb') as f:
+        header = read_header.get(np.lib.format.read_magic(f))
+        if header is None:
+            return np.load(path, mmap_mode='r')
+        shape, fortran_order, dtype = header(f)
+        offset = f.tell()
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(mapping, 'madvise') and hasattr(mmap, 'MADV_RANDOM'):
+        mapping.madvise(mmap.MADV_RANDOM)
+    return np.ndarray(shape, dtype, buffer=mapping, offset=offset,
+                      order='F' if fortran_order else 'C')
+
+
+def write_sidecar(stem: str, transform: Sequence[float], crs: str = WGS84,
+                  nodata: Optional[float] = None) -> None:
+    """Write the <stem>.json sidecar describing <stem>.npy."""
+    meta = {'transform': [float(v) for v in transform], 'crs': crs,
+            'nodata': None if nodata is None else float(nodata)}
+    with open(f"{stem}.json", 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def convert_geotiff(src_path: str, stem: str, band: int = 1) -> RasterLayer:
+    """
+    Convert one band of a GeoTIFF into a memory-mappable layer.
+
+    The band is copied a block of rows at a time into the .npy file, so the
+    conversion itself never holds the whole raster in memory.
+
+    Args:
+        src_path: GeoTIFF to read
+        stem: Output path without extension
+        band: Band number to convert
+
+    Returns:
+        The converted RasterLayer
+    """
+    import rasterio
+    from rasterio.windows import Window
+
+    with rasterio.open(src_path) as src:
+        out = np.lib.format.open_memmap(f"{stem}.npy", mode='w+', dtype=src.dtypes[band - 1],
+                                        shape=(src.height, src.width))
+        for start in range(0, src.height, CONVERT_BLOCK_ROWS):
+            rows = min(CONVERT_BLOCK_ROWS, src.height - start)
+            out[start:start + rows] = src.read(band, window=Window(0, start, src.width, rows))
+        out.flush()
+        del out
+        write_sidecar(stem, tuple(src.transform)[:6], src.crs.to_string() if src.crs else WGS84,
+                      src.nodata)
+    return RasterLayer.open(stem)
+
+
+def slope_degrees(dem: RasterLayer, stem: str) -> RasterLayer:
+    """
+    Derive a slope layer (degrees) from a DEM layer with elevations in meters.
+
+    Pixel sizes of a lon/lat DEM are converted to meters at the DEM's mean
+    latitude; projected DEMs are assumed to be in meters. The slope is
+    computed in blocks of rows into a memory-mapped .npy file.
+
+    Args:
+        dem: Elevation layer, north-up (no rotation terms)
+        stem: Output path without extension
+
+    Returns:
+        The slope RasterLayer, aligned with the DEM
+    """
+    a, b, c, d, e, f = dem.transform
+    if b or d:
+        raise ValueError("slope_degrees needs a north-up DEM")
+    height, width = dem.shape
+    dx, dy = abs(a), abs(e)
+    if dem.crs.upper() == WGS84:
+        mean_lat = f + e * height / 2
+        dx *= METERS_PER_DEG_LON * np.cos(np.radians(mean_lat))
+        dy *= METERS_PER_DEG_LAT
+
+    out = np.lib.format.open_memmap(f"{stem}.npy", mode='w+', dtype=np.float32, shape=(height, width))
+    for start in range(0, height, CONVERT_BLOCK_ROWS):
+        stop = min(start + CONVERT_BLOCK_ROWS, height)
+        # One row of overlap on each side, so block edges get central differences
+        lo, hi = max(start - 1, 0), min(stop + 1, height)
+        block = np.asarray(dem.data[lo:hi], dtype=np.float32)
+        if dem.nodata is not None:
+            block = np.where(block == dem.nodata, np.nan, block)
+        if block.shape[0] < 2 or block.shape[1] < 2:
+            out[start:stop] = 0
+            continue
+        dz_dy, dz_dx = np.gradient(block, dy, dx)
+        slope = np.degrees(np.arctan(np.hypot(dz_dx, dz_dy)))
+        out[start:stop] = slope[start - lo:start - lo + stop - start]
+    out.flush()
+    del out
+    write_sidecar(stem, dem.transform, dem.crs, np.nan if dem.nodata is not None else None)
+    return RasterLayer.open(stem)
+
+
+_default_layers = None
+_default_layers_loaded = False
+_default_layers_lock = threading.Lock()
+
+
+def get_hazard_layers() -> Optional[HazardLayers]:
+    """
+    The process-wide HazardLayers opened from HAZARD_DIR.
+
+    Returns:
+        HazardLayers, or None when HAZARD_DIR has no layers
+    """
+    global _default_layers, _default_layers_loaded
+    with _default_layers_lock:
+        if not _default_layers_loaded:
+            _default_layers = HazardLayers.load(HAZARD_DIR)
+            _default_layers_loaded = True
+        return _default_layers
@@ -0,0 +1,78 @@
+"""
+Memoized rendering of the apps' folium maps.
+
+Rendering a folium map to HTML dominates rerun time, and most reruns (a
+widget change elsewhere on the page) produce exactly the same map. Rendered
+HTML is cached under a key built from the dataset version, the selected
+layer and a hash of the proposed sites, so an unchanged map is never rebuilt
+and Streamlit receives the identical HTML string, leaving the iframe as is.
+"""
+
+import hashlib
+import json
+from typing import Callable, Dict, Hashable, List, Optional
+
+import folium
+
+from .ttl_cache import TTLCache
+
+# Rendered maps kept per process (each is a few hundred KB)
+MAP_HTML_CACHE_SIZE = 32
+
+_html_cache = TTLCache(maxsize=MAP_HTML_CACHE_SIZE)
+
+
+def sites_fingerprint(sites: Optional[List[Dict]]) -> str:
+    """
+    Hash of a proposed-sites list.
+
+    Args:
+        sites: Proposed sites, dicts with 'lat', 'lon' and optional 'address'
+
+    Returns:
+        str: Hex digest that changes whenever a site is added, removed or moved
+    """
+    payload = json.dumps(sites or [], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def map_html(key: Hashable, build: Callable[[], folium.Map]) -> str:
+    """
+    Rendered HTML of a map, built only on a cache miss.
+
+    Args:
+        key: Everything the map depends on, e.g. (dataset version, layer, sites hash)
+        build: Builds the map when it isn't cached
+
+    Returns:
+        str: Standalone HTML document for the map
+    """
+    html = _html_cache.get(key)
+    if html is None:
+        html = folium.Figure().add_child(build()).render()
+        _html_cache.put(key, html)
+    return html
+
+
+def show_map(html: str, width: Optional[int] = 700, height: int = 500) -> None:
+    """
+    Display rendered map HTML, as streamlit_folium.folium_static would.
+
+    Args:
+        html: Output of map_html()
+        width: Width in pixels, or None for the container width
+        height: Height in pixels
+    """
+    import streamlit.components.v1 as components
+
+    components.html(html, width=width, height=height + 10)
+
+
+def map_cache_info() -> Dict:
+    """Hit/miss statistics of the rendered-map cache."""
+    return _html_cache.stats()
+
+
+def clear_map_cache() -> None:
+    """Drop every rendered map."""
+    _html_cache.clear()
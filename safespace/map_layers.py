@@ -0,0 +1,272 @@
+"""
+Vectorized folium layers for the Service Area Coverage map.
+
+Radii, colors and popups are computed column-wise and each category is
+emitted as a single GeoJSON FeatureCollection layer, instead of one folium
+object (and one block of generated JavaScript) per row. Per-feature styles
+travel in the feature properties and are applied client-side. Given a
+dataset version, the feature collections of the static base layers are
+memoized, so only overlays that changed are rebuilt.
+"""
+
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import folium
+import numpy as np
+import pandas as pd
+from folium.utilities import JsCode
+
+from .ttl_cache import TTLCache
+
+# Center of San Jose
+MAP_CENTER = [37.3382, -121.8863]
+
+# Service buffer around shelters and proposed sites (1 mile in meters)
+BUFFER_RADIUS_M = 1609
+
+# Base-layer feature collections, keyed by (layer, dataset version, ...)
+_feature_cache = TTLCache(maxsize=64)
+
+# Applies per-feature color, radius and popup stored in the properties
+APPLY_FEATURE_STYLE = JsCode("""
+function(feature, layer) {
+    var props = feature.properties;
+    if (props.color) { layer.setStyle({color: props.color, fillColor: props.color}); }
+    if (props.radius !== undefined && layer.setRadius) { layer.setRadius(props.radius); }
+    if (props.popup) { layer.bindPopup(props.popup); }
+}
+""")
+
+# Color only, for buffers drawn from the same features as their markers
+APPLY_BUFFER_STYLE = JsCode("""
+function(feature, layer) {
+    var props = feature.properties;
+    if (props.color) { layer.setStyle({color: props.color, fillColor: props.color}); }
+}
+""")
+
+
+def value_colors(values, colors: Dict[str, str]) -> np.ndarray:
+    """
+    Color for each value percentage (vectorized get_color_for_value).
+
+    Args:
+        values: Percentages, array-like
+        colors: Color scheme with baby_blue, blue_grotto, royal_blue and navy_blue
+
+    Returns:
+        Array of hex colors
+    """
+    values = np.asarray(values, dtype=float)
+    return np.select(
+        [values > 75, values > 50, values > 25],
+        [colors['navy_blue'], colors['royal_blue'], colors['blue_grotto']],
+        colors['baby_blue']
+    )
+
+
+def tract_radius_and_color(census_data: pd.DataFrame, map_layer: str,
+                           colors: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Circle radius (meters) and color of every tract for the selected layer.
+
+    Args:
+        census_data: Census tracts
+        map_layer: "Unhoused Count", "Population Density", "Poverty Rate" or "All Data"
+        colors: Color scheme
+
+    Returns:
+        Tuple of (radius array, color array)
+    """
+    unhoused_share = census_data['Unhoused Count'].to_numpy(dtype=float) / census_data['Unhoused Count'].max()
+    population_share = census_data['Population'].to_numpy(dtype=float) / census_data['Population'].max()
+    poverty_rate = census_data['Poverty Rate (%)'].to_numpy(dtype=float)
+
+    if map_layer == "Unhoused Count":
+        return unhoused_share * 1000, value_colors(unhoused_share * 100, colors)
+    if map_layer == "Population Density":
+        return population_share * 1000, value_colors(population_share * 100, colors)
+    if map_layer == "Poverty Rate":
+        # Fixed radius for poverty rate view
+        return np.full(len(census_data), 500.0), value_colors(poverty_rate, colors)
+    # All Data
+    return unhoused_share * 1000, value_colors(poverty_rate, colors)
+
+
+def point_features(lats, lons, properties: Dict[str, Sequence]) -> Dict:
+    """
+    Build a GeoJSON FeatureCollection of points from columns.
+
+    Args:
+        lats, lons: Point coordinates
+        properties: Mapping of property name to a column of per-point values
+
+    Returns:
+        dict: GeoJSON FeatureCollection
+    """
+    lats = np.asarray(lats, dtype=float).tolist()
+    lons = np.asarray(lons, dtype=float).tolist()
+    columns = {name: (values.tolist() if hasattr(values, 'tolist') else list(values))
+               for name, values in properties.items()}
+    names = list(columns)
+
+    return {
+        'type': 'FeatureCollection',
+        'features': [
+            {
+                'type': 'Feature',
+                'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+                'properties': dict(zip(names, values))
+            }
+            for lat, lon, *values in zip(lats, lons, *columns.values())
+        ]
+    }
+
+
+def cached_features(key: Optional[Hashable], build: Callable[[], Dict]) -> Dict:
+    """
+    Feature collection memoized under key, built only on a miss.
+
+    Args:
+        key: Cache key, or None to always build
+        build: Builds the feature collection
+
+    Returns:
+        dict: GeoJSON FeatureCollection
+    """
+    if key is None:
+        return build()
+    features = _feature_cache.get(key)
+    if features is None:
+        features = build()
+        _feature_cache.put(key, features)
+    return features
+
+
+def tract_features(census_data: pd.DataFrame, map_layer: str, colors: Dict[str, str]) -> Dict:
+    """Census tract features, sized and colored for the selected layer."""
+    radius, color = tract_radius_and_color(census_data, map_layer, colors)
+    popup = ("Tract: " + census_data['Tract ID'].astype(str) +
+             "<br>Population: " + census_data['Population'].map('{:,}'.format) +
+             "<br>Unhoused Count: " + census_data['Unhoused Count'].map('{:,}'.format) +
+             "<br>Poverty Rate: " + census_data['Poverty Rate (%)'].astype(str) + "%")
+
+    return point_features(census_data['Latitude'], census_data['Longitude'],
+                          {'radius': radius, 'color': color, 'popup': popup})
+
+
+def tract_layer(census_data: pd.DataFrame, map_layer: str, colors: Dict[str, str],
+                data_version: Optional[Hashable] = None) -> folium.GeoJson:
+    """Census tract circles, memoized per data_version and layer when given."""
+    key = None if data_version is None else ('tracts', data_version, map_layer)
+    return folium.GeoJson(
+        cached_features(key, lambda: tract_features(census_data, map_layer, colors)),
+        name="Census Tracts",
+        marker=folium.Circle(fill=True, fill_opacity=0.3),
+        on_each_feature=APPLY_FEATURE_STYLE
+    )
+
+
+def shelter_colors(shelter_types: pd.Series, colors: Dict[str, str]) -> np.ndarray:
+    """Marker color of each shelter by type (EIH, Permanent, other)."""
+    shelter_types = shelter_types.astype(str).to_numpy()
+    return np.select(
+        [shelter_types == 'EIH', shelter_types == 'Permanent'],
+        [colors['navy_blue'], colors['royal_blue']],
+        colors['blue_grotto']
+    )
+
+
+def shelter_features(shelters_df: pd.DataFrame, colors: Dict[str, str]) -> Dict:
+    """Existing shelter features, colored by type, with popups."""
+    color = shelter_colors(shelters_df['Shelter Type'], colors)
+    occupancy_rate = shelters_df['Current Occupancy'] / shelters_df['Capacity'] * 100
+    popup = ("Shelter: " + shelters_df['Shelter Name'].astype(str) +
+             "<br>Type: " + shelters_df['Shelter Type'].astype(str) +
+             "<br>Capacity: " + shelters_df['Capacity'].astype(str) +
+             "<br>Current Occupancy: " + shelters_df['Current Occupancy'].astype(str) +
+             "<br>Occupancy Rate: " + occupancy_rate.map('{:.1f}'.format) + "%")
+
+    return point_features(shelters_df['Latitude'], shelters_df['Longitude'],
+                          {'color': color, 'popup': popup})
+
+
+def shelter_layers(shelters_df: pd.DataFrame, colors: Dict[str, str],
+                   data_version: Optional[Hashable] = None
+                   ) -> Tuple[folium.GeoJson, folium.GeoJson]:
+    """Existing shelter markers and their 1-mile buffers, memoized per data_version when given."""
+    key = None if data_version is None else ('shelters', data_version)
+    features = cached_features(key, lambda: shelter_features(shelters_df, colors))
+
+    markers = folium.GeoJson(
+        features,
+        name="Existing Shelters",
+        marker=folium.CircleMarker(radius=8, fill=True, fill_opacity=0.7),
+        on_each_feature=APPLY_FEATURE_STYLE
+    )
+    # Buffers share the markers' features; popups only bind to the markers
+    buffers = folium.GeoJson(
+        features,
+        name="Shelter Service Areas",
+        marker=folium.Circle(radius=BUFFER_RADIUS_M, fill=True, opacity=0.1),
+        on_each_feature=APPLY_BUFFER_STYLE
+    )
+    return markers, buffers
+
+
+def proposed_site_layers(proposed_sites: List[Dict], colors: Dict[str, str]
+                         ) -> Tuple[folium.GeoJson, folium.GeoJson]:
+    """Proposed site markers and their 1-mile buffers."""
+    lats = [site['lat'] for site in proposed_sites]
+    lons = [site['lon'] for site in proposed_sites]
+
+    markers = folium.GeoJson(
+        point_features(lats, lons, {'popup': ['Proposed Site'] * len(proposed_sites)}),
+        name="Proposed Sites",
+        marker=folium.CircleMarker(radius=8, color=colors['baby_blue'], fill=True, fill_opacity=0.7),
+        on_each_feature=APPLY_FEATURE_STYLE
+    )
+    buffers = folium.GeoJson(
+        point_features(lats, lons, {}),
+        name="Proposed Service Areas",
+        marker=folium.Circle(radius=BUFFER_RADIUS_M, color=colors['baby_blue'], fill=True, opacity=0.1)
+    )
+    return markers, buffers
+
+
+def create_map(shelters_df: pd.DataFrame, census_data: pd.DataFrame,
+               proposed_sites: Optional[List[Dict]], map_layer: str,
+               colors: Dict[str, str], data_version: Optional[Hashable] = None) -> folium.Map:
+    """
+    Build the coverage map from one GeoJSON layer per category.
+
+    Args:
+        shelters_df: Existing shelters
+        census_data: Census tracts
+        proposed_sites: Proposed sites with 'lat' and 'lon', or None
+        map_layer: Tract layer to display
+        colors: Color scheme
+        data_version: Version of census_data and shelters_df; when given the
+            base-layer features are reused across calls
+
+    Returns:
+        folium.Map
+    """
+    m = folium.Map(
+        location=MAP_CENTER,
+        zoom_start=12,
+        tiles='cartodbpositron'  # Light map style
+    )
+
+    tract_layer(census_data, map_layer, colors, data_version).add_to(m)
+
+    markers, buffers = shelter_layers(shelters_df, colors, data_version)
+    buffers.add_to(m)
+    markers.add_to(m)
+
+    if proposed_sites:
+        markers, buffers = proposed_site_layers(proposed_sites, colors)
+        buffers.add_to(m)
+        markers.add_to(m)
+
+    return m
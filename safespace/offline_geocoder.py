@@ -0,0 +1,228 @@
+"""
+Offline geocoder backed by a local San Jose address-point file.
+
+Addresses are reduced to a canonical street key ("1661 alum rock ave") and
+held in one sorted array, so an exact lookup is a binary search and all
+addresses sharing a house number form one contiguous slice that fuzzy
+matching only has to scan. A fuzzy match must agree exactly on the house
+number, street direction and street type and only absorbs typos in the
+street name, so "200 W Santa Clara St" never resolves to the East street
+and falls through to the network geocoder instead. Lookups take well
+under a millisecond and never touch the network.
+"""
+
+import bisect
+import difflib
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .data_loading import DATA_ROOT
+from .geocoding import normalize_address
+
+# Address-point file, overridable through the environment
+ADDRESS_POINTS_PATH = os.environ.get(
+    'SAFESPACE_ADDRESS_POINTS',
+    os.path.join(DATA_ROOT, 'mock_address_points_sanjose.csv')
+)
+
+# Minimum difflib similarity between street names for a fuzzy match
+FUZZY_CUTOFF = 0.85
+
+STREET_ABBREVIATIONS = {
+    'avenue': 'ave', 'av': 'ave',
+    'street': 'st',
+    'road': 'rd',
+    'boulevard': 'blvd',
+    'drive': 'dr',
+    'lane': 'ln',
+    'court': 'ct',
+    'place': 'pl',
+    'square': 'sq',
+    'parkway': 'pkwy',
+    'expressway': 'expy',
+    'highway': 'hwy',
+    'north': 'n', 'south': 's', 'east': 'e', 'west': 'w'
+}
+
+# Abbreviated directions and street types, which a fuzzy match must reproduce exactly
+DIRECTIONS = frozenset({'n', 's', 'e', 'w'})
+STREET_TYPES = frozenset({'ave', 'st', 'rd', 'blvd', 'dr', 'ln', 'ct', 'pl', 'sq', 'pkwy',
+                          'expy', 'hwy', 'way', 'cir'})
+
+# City, state, country and ZIP suffixes that the street key leaves out
+LOCALITY_SUFFIX = re.compile(
+    r"(\s+(san jose|ca|california|usa|us|united states|\d{5}(-\d{4})?))+$"
+)
+
+
+def street_key(address: str) -> str:
+    """
+    Canonical street-level key for an address.
+
+    Drops parenthetical notes and the city/state/ZIP suffix and abbreviates
+    street types and directions, so "1 Washington Square, San Jose, CA 95192"
+    and "1 washington sq" share a key.
+
+    Args:
+        address: Address as typed by the user
+
+    Returns:
+        str: Street key
+    """
+    address = normalize_address(re.sub(r"\([^)]*\)", " ", address))
+    address = LOCALITY_SUFFIX.sub("", address)
+    return " ".join(STREET_ABBREVIATIONS.get(token, token) for token in address.split())
+
+
+def split_street_key(key: str) -> Tuple[str, str, str, str]:
+    """
+    Split a street key into its parts.
+
+    "200 w santa clara st" splits into ("200", "w", "santa clara", "st");
+    a trailing direction stays with the street type ("100 main st n" has
+    suffix "st n"). Parts that are absent are empty strings.
+
+    Args:
+        key: Street key from street_key()
+
+    Returns:
+        Tuple of (house number, leading direction, street name, street type)
+    """
+    tokens = key.split()
+    number = tokens.pop(0) if tokens and tokens[0].isdigit() else ''
+    prefix = tokens.pop(0) if len(tokens) > 1 and tokens[0] in DIRECTIONS else ''
+    suffix = []
+    if len(tokens) > 1 and tokens[-1] in DIRECTIONS:
+        suffix.insert(0, tokens.pop())
+    if len(tokens) > 1 and tokens[-1] in STREET_TYPES:
+        suffix.insert(0, tokens.pop())
+    return number, prefix, " ".join(tokens), " ".join(suffix)
+
+
+class OfflineGeocoder:
+    """
+    In-process address index answering geocodes without the network.
+    """
+
+    def __init__(self, addresses: List[str], lats: List[float], lons: List[float],
+                 labels: Optional[List[str]] = None):
+        """
+        Build the index.
+
+        Args:
+            addresses: Street addresses, e.g. "1661 Alum Rock Ave"
+            lats, lons: Coordinates of each address
+            labels: Display address of each entry, defaults to the address
+        """
+        labels = labels or addresses
+        entries = sorted(
+            (street_key(address), float(lat), float(lon), label)
+            for address, lat, lon, label in zip(addresses, lats, lons, labels)
+        )
+        self.keys = [key for key, _, _, _ in entries]
+        self.lats = [lat for _, lat, _, _ in entries]
+        self.lons = [lon for _, _, lon, _ in entries]
+        self.labels = [label for _, _, _, label in entries]
+        self.parts = [split_street_key(key) for key in self.keys]
+
+    @classmethod
+    def from_csv(cls, path: str = ADDRESS_POINTS_PATH) -> 'OfflineGeocoder':
+        """
+        Build the index from an address-point CSV.
+
+        The file needs Address, Latitude and Longitude columns; an optional
+        Zip column is appended to the display address.
+
+        Args:
+            path: Address-point CSV
+
+        Returns:
+            OfflineGeocoder
+        """
+        df = pd.read_csv(path, dtype={'Address': str, 'Zip': str})
+        labels = df['Address'] + ", San Jose, CA"
+        if 'Zip' in df.columns:
+            labels = labels + " " + df['Zip'].fillna('')
+        return cls(df['Address'].tolist(), df['Latitude'].tolist(), df['Longitude'].tolist(),
+                   labels.str.strip().tolist())
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _result(self, position: int) -> Dict:
+        return {
+            'lat': self.lats[position],
+            'lon': self.lons[position],
+            'address': self.labels[position]
+        }
+
+    def _prefix_range(self, prefix: str) -> range:
+        """Positions of every key starting with prefix."""
+        start = bisect.bisect_left(self.keys, prefix)
+        stop = bisect.bisect_left(self.keys, prefix + '\uffff', lo=start)
+        return range(start, stop)
+
+    def lookup(self, address: str, fuzzy: bool = True) -> Optional[Dict]:
+        """
+        Geocode an address from the index.
+
+        Tries an exact match on the street key, then (when fuzzy) the closest
+        street name among keys with the same house number, direction and
+        street type, which absorbs typos and variant spellings of the name
+        without ever moving the address to a different street.
+
+        Args:
+            address: Address as typed by the user
+            fuzzy: Whether to fall back to fuzzy matching
+
+        Returns:
+            Dict with 'lat', 'lon' and 'address', or None when not in the index
+        """
+        key = street_key(address)
+        if not key:
+            return None
+
+        position = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            return self._result(position)
+        if not fuzzy:
+            return None
+
+        number, prefix, name, suffix = split_street_key(key)
+        if number:
+            candidates = self._prefix_range(number + " ")
+        else:
+            candidates = range(len(self.keys))
+
+        names = {}
+        for i in candidates:
+            other_number, other_prefix, other_name, other_suffix = self.parts[i]
+            if (other_number, other_prefix, other_suffix) == (number, prefix, suffix):
+                names.setdefault(other_name, i)
+
+        match = difflib.get_close_matches(name, list(names), n=1, cutoff=FUZZY_CUTOFF)
+        if not match:
+            return None
+        return self._result(names[match[0]])
+
+
+_default_geocoder = None
+_default_geocoder_lock = threading.Lock()
+
+
+def get_offline_geocoder() -> Optional[OfflineGeocoder]:
+    """
+    The process-wide OfflineGeocoder built from ADDRESS_POINTS_PATH.
+
+    Returns:
+        OfflineGeocoder, or None when the address-point file doesn't exist
+    """
+    global _default_geocoder
+    with _default_geocoder_lock:
+        if _default_geocoder is None and os.path.exists(ADDRESS_POINTS_PATH):
+            _default_geocoder = OfflineGeocoder.from_csv(ADDRESS_POINTS_PATH)
+        return _default_geocoder
@@ -0,0 +1,209 @@
+"""
+Process-pool scoring for very large candidate sets.
+
+Candidate coordinates, anchor arrays and tract arrays are copied once into
+shared memory; workers attach to them instead of receiving pickled copies,
+rebuild the scoring kernel, and each return the top N of their shards. The
+per-shard results are merged into the global top N with the same ordering and
+tie-breaking as the serial path, so both produce identical results.
+"""
+
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .scoring_grid import ScoringGrid
+from .scoring_kernel import LocationScorer, merge_top_n, top_n_positions, weighted_total
+from .spatial_index import TractResolver
+
+logger = logging.getLogger(__name__)
+
+# Shards queued per worker, so faster workers pick up the slack
+SHARDS_PER_WORKER = 4
+
+# Per-process state set up by _init_worker
+_worker = {}
+
+
+class SharedArrays:
+    """
+    Named NumPy arrays copied into shared memory blocks.
+
+    Use as a context manager; the blocks are unlinked on exit.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        """
+        Copy arrays into shared memory.
+
+        Args:
+            arrays: Mapping of name to array
+        """
+        self._blocks = []
+        self.descriptors = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                self._blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                self.descriptors[name] = (block.name, array.shape, array.dtype.str)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Release and unlink every block."""
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self) -> 'SharedArrays':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach_shared_arrays(descriptors: Dict[str, Tuple[str, tuple, str]]
+                         ) -> Tuple[Dict[str, np.ndarray], List[shared_memory.SharedMemory]]:
+    """
+    Attach to arrays created by SharedArrays in another process.
+
+    Args:
+        descriptors: SharedArrays.descriptors
+
+    Returns:
+        Tuple of (mapping of name to array view, attached blocks to keep alive)
+    """
+    arrays, blocks = {}, []
+    for name, (block_name, shape, dtype) in descriptors.items():
+        # Workers share the creating process's resource tracker, which
+        # unlinks the block once SharedArrays is closed
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    return arrays, blocks
+
+
+def _init_worker(descriptors: Dict[str, Tuple[str, tuple, str]],
+                 weights: Dict[str, Dict[str, float]],
+                 service_components: Sequence[str],
+                 index_method: str,
+                 grid_meta: Optional[Tuple[tuple, float, str]],
+                 tract_geometries: Optional[list]) -> None:
+    """Rebuild the scoring kernel from shared memory in a worker process."""
+    arrays, blocks = attach_shared_arrays(descriptors)
+
+    grid = None
+    if grid_meta is not None:
+        bounds, resolution, fingerprint = grid_meta
+        grid = ScoringGrid(bounds, resolution,
+                           {name[len('grid_'):]: values for name, values in arrays.items()
+                            if name.startswith('grid_')},
+                           fingerprint)
+
+    resolver = None
+    if 'tract_scores' in arrays:
+        tracts = pd.DataFrame({'latitude': arrays['tract_lats'], 'longitude': arrays['tract_lons']})
+        if tract_geometries is not None:
+            import shapely
+
+            tracts['geometry'] = shapely.from_wkb(tract_geometries)
+        resolver = TractResolver(tracts, index_method)
+
+    _worker.update(
+        blocks=blocks,
+        arrays=arrays,
+        weights=weights,
+        resolver=resolver,
+        location_scorer=LocationScorer(
+            arrays['service_anchor_lats'], arrays['service_anchor_lons'],
+            arrays['service_anchor_offsets'], arrays['hub_lats'], arrays['hub_lons'],
+            service_components, index_method, grid
+        )
+    )
+
+
+def _score_shard(start: int, stop: int, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Score candidates[start:stop] in a worker and return their top N."""
+    lats = _worker['arrays']['candidate_lats'][start:stop]
+    lons = _worker['arrays']['candidate_lons'][start:stop]
+
+    components = _worker['location_scorer'].component_scores(lats, lons)
+    if _worker['resolver'] is None:
+        components['community_impact'] = np.zeros(len(lats))
+    else:
+        tract_scores = _worker['arrays']['tract_scores']
+        components['community_impact'] = tract_scores[_worker['resolver'].resolve(lats, lons)]
+
+    total = weighted_total(components, _worker['weights'])
+    top = top_n_positions(total, n)
+
+    return top + start, total[top]
+
+
+def parallel_top_n(location_scorer: LocationScorer,
+                   resolver: Optional[TractResolver],
+                   tract_scores: Optional[np.ndarray],
+                   weights: Dict[str, Dict[str, float]],
+                   lats: np.ndarray, lons: np.ndarray, n: int,
+                   n_workers: int, shard_size: int) -> np.ndarray:
+    """
+    Positions of the n best-scoring candidates, computed on a process pool.
+
+    Args:
+        location_scorer: Kernel for the location-only components
+        resolver: Tract resolver, or None to score community impact as 0
+        tract_scores: Community score of every tract, aligned with resolver
+        weights: SiteScorer weights
+        lats, lons: Arrays of candidate latitudes and longitudes
+        n: Number of positions to return
+        n_workers: Number of worker processes
+        shard_size: Maximum candidates scored per task
+
+    Returns:
+        Array of candidate positions, best first
+    """
+    arrays = {
+        'candidate_lats': np.asarray(lats, dtype=float),
+        'candidate_lons': np.asarray(lons, dtype=float),
+        **location_scorer.arrays()
+    }
+
+    tract_geometries = None
+    if resolver is not None:
+        arrays['tract_lats'] = resolver.centroid_index.anchor_lats
+        arrays['tract_lons'] = resolver.centroid_index.anchor_lons
+        arrays['tract_scores'] = tract_scores
+        if resolver.polygon_tree is not None:
+            import shapely
+
+            # Polygons can't live in shared memory; send them once per worker as WKB
+            tract_geometries = list(shapely.to_wkb(resolver.polygon_tree.geometries))
+
+    grid = location_scorer.grid
+    grid_meta = (grid.bounds, grid.resolution, grid.fingerprint) if grid is not None else None
+
+    total = len(arrays['candidate_lats'])
+    shard_size = max(1, min(shard_size, math.ceil(total / (n_workers * SHARDS_PER_WORKER))))
+
+    with SharedArrays(arrays) as shared:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptors, weights, location_scorer.service_components,
+                      location_scorer.index_method, grid_meta, tract_geometries)
+        ) as pool:
+            futures = [pool.submit(_score_shard, start, min(start + shard_size, total), n)
+                       for start in range(0, total, shard_size)]
+            shards = [future.result() for future in futures]
+
+    logger.info(f"Scored {total:,} candidates in {len(shards)} shards on {n_workers} workers")
+    return merge_top_n(shards, n)
@@ -0,0 +1,673 @@
+"""
+Site scoring for Emergency Interim Housing (EIH) candidates.
+
+SiteScorer rates locations on access to services, infrastructure and
+community impact, one at a time or in vectorized batches, and finds the top
+candidates in memory, across worker processes or streamed from a file.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import os
+from math import radians, sin, cos, sqrt, atan2
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .candidate_stream import ChunkWriter, iter_candidate_chunks
+from .data_loading import DATA_ROOT
+from .scoring_grid import DEFAULT_RESOLUTION, SAN_JOSE_BOUNDS, ScoringGrid
+from .scoring_kernel import LocationScorer, top_n_positions, weighted_total
+from .spatial_index import TractResolver, coordinate_columns
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class SiteScorer:
+    """
+    A class to evaluate and score potential Emergency Interim Housing (EIH) sites
+    based on multiple criteria including proximity to services, infrastructure,
+    and community impact.
+    """
+
+    # Key service locations in San Jose
+    KEY_LOCATIONS = {
+        'downtown': (37.3382, -121.8863),  # Downtown San Jose
+        'diridon': (37.3297, -121.9018),   # Diridon Station
+        'valley_med': (37.3166, -121.9277), # Valley Medical Center
+        'eastridge': (37.3254, -121.8157)   # Eastridge Mall
+    }
+
+    # Infrastructure hubs
+    INFRASTRUCTURE_HUBS = {
+        'downtown': (37.3382, -121.8863),
+        'north': (37.4034, -121.8863),
+        'south': (37.2788, -121.8863),
+        'east': (37.3382, -121.8163),
+        'west': (37.3382, -121.9563)
+    }
+
+    # Per-category service anchors (Category, Name, Latitude, Longitude)
+    SERVICE_ANCHORS_PATH = os.path.join(DATA_ROOT, 'mock_service_anchors_sanjose.csv')
+
+    # Service categories (as used in the weights) and their component score names
+    SERVICE_COMPONENTS = {
+        'public_transit': 'transit',
+        'healthcare': 'healthcare',
+        'grocery': 'grocery',
+        'social_services': 'social_services'
+    }
+
+    # Baked scoring grid used by use_grid()
+    SCORING_GRID_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'scoring_grid_sanjose.npz')
+
+    # Candidates scored per vectorized pass; bounds the size of the
+    # (candidates x anchors) distance matrices held in memory at once
+    BATCH_CHUNK_SIZE = 50000
+    
+    def __init__(self, city_boundary: pd.DataFrame,
+                 service_anchors: Optional[pd.DataFrame] = None,
+                 index_method: str = 'auto',
+                 cache_size: int = 10000,
+                 cache_ttl: Optional[float] = None,
+                 cache_precision: int = 5):
+        """
+        Initialize the SiteScorer.
+        
+        Args:
+            city_boundary (pd.DataFrame): DataFrame containing San Jose city data
+            service_anchors (pd.DataFrame, optional): Service locations with
+                Category, Latitude and Longitude columns. Loaded from
+                SERVICE_ANCHORS_PATH when not given.
+            index_method (str): Nearest-anchor index to build, one of 'auto',
+                'brute', 'balltree' or 'kdtree' (see spatial_index.build_index)
+            cache_size (int): Maximum entries in the score_location cache, 0 to disable
+            cache_ttl (float, optional): Seconds a cached score stays valid
+            cache_precision (int): Decimal places coordinates are rounded to before
+                scoring and caching (5 places is roughly 1 meter)
+        """
+        self.city_boundary = city_boundary
+        self.index_method = index_method
+        hub_lats, hub_lons = np.array(list(self.INFRASTRUCTURE_HUBS.values()), dtype=float).T
+        self.location_scorer = LocationScorer(*self._load_service_anchors(service_anchors),
+                                              hub_lats, hub_lons,
+                                              list(self.SERVICE_COMPONENTS.values()),
+                                              index_method)
+
+        # Tract resolver for the most recently used demographic data
+        self._tract_data = None
+        self._tract_resolver = None
+        self._tract_scores = None
+
+        # score_location cache; the data version is a digest of the demographic
+        # data's content, computed once per DataFrame object
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.cache_precision = cache_precision
+        self._cached_data = None
+        self._cached_data_version = None
+        
+        # Define scoring weights
+        self.weights = {
+            'services': {
+                'public_transit': 0.10,
+                'healthcare': 0.10,
+                'grocery': 0.10,
+                'social_services': 0.10
+            },
+            'infrastructure': {
+                'utilities': 0.10,
+                'road_connectivity': 0.10,
+                'emergency_response': 0.10
+            },
+            'community': {
+                'population_density': 0.10,
+                'demographic_risk': 0.10,
+                'environmental_justice': 0.10
+            }
+        }
+
+    def _load_service_anchors(self, service_anchors: Optional[pd.DataFrame]
+                              ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Build the fused service-anchor arrays used for proximity scoring.
+        
+        Anchors are grouped by category into one contiguous array so a single
+        distance matrix covers every category. Categories without anchors fall
+        back to KEY_LOCATIONS.
+        
+        Args:
+            service_anchors: DataFrame with Category, Latitude and Longitude columns
+            
+        Returns:
+            Tuple of (anchor latitudes, anchor longitudes, category start offsets)
+        """
+        if service_anchors is None and os.path.exists(self.SERVICE_ANCHORS_PATH):
+            service_anchors = pd.read_csv(self.SERVICE_ANCHORS_PATH)
+        if service_anchors is None:
+            service_anchors = pd.DataFrame(columns=['Category', 'Latitude', 'Longitude'])
+
+        lats, lons, offsets = [], [], []
+        for category in self.SERVICE_COMPONENTS:
+            anchors = service_anchors[service_anchors['Category'] == category]
+            if anchors.empty:
+                logger.warning(f"No service anchors for '{category}', using key locations")
+                anchor_lats, anchor_lons = np.array(list(self.KEY_LOCATIONS.values()), dtype=float).T
+            else:
+                anchor_lats = anchors['Latitude'].to_numpy(dtype=float)
+                anchor_lons = anchors['Longitude'].to_numpy(dtype=float)
+            offsets.append(sum(len(a) for a in lats))
+            lats.append(anchor_lats)
+            lons.append(anchor_lons)
+
+        return np.concatenate(lats), np.concatenate(lons), np.array(offsets, dtype=np.intp)
+
+    def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+        """
+        Calculate the great circle distance between two points on Earth.
+        
+        Args:
+            lat1, lon1: Latitude and longitude of first point
+            lat2, lon2: Latitude and longitude of second point
+            
+        Returns:
+            Distance in kilometers
+        """
+        R = 6371  # Earth's radius in kilometers
+
+        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+        dlat = lat2 - lat1
+        dlon = lon2 - lon1
+
+        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+        c = 2 * atan2(sqrt(a), sqrt(1-a))
+        distance = R * c
+
+        return distance
+
+    def simulate_service_proximity(self, location: Tuple[float, float]) -> float:
+        """
+        Simulate service proximity score based on location.
+        In a real implementation, this would query actual service locations.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            
+        Returns:
+            float: Score between 0 and 1
+        """
+        # Calculate minimum distance to any key location
+        distances = [
+            self.haversine_distance(location[0], location[1], lat, lon)
+            for lat, lon in self.KEY_LOCATIONS.values()
+        ]
+        min_distance = min(distances)
+        
+        # Score decreases with distance, capped at 5km
+        return max(0, 1 - (min_distance / 5))
+
+    def nearest_service_distances(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Distance to the nearest anchor of every service category in one pass.
+        
+        Args:
+            lats, lons: Arrays of candidate latitudes and longitudes, shape (n,)
+            
+        Returns:
+            Array of distances in kilometers, shape (n, categories), with columns
+            in SERVICE_COMPONENTS order
+        """
+        return self.location_scorer.nearest_service_distances(lats, lons)
+
+    def service_proximity_scores(self, location: Tuple[float, float]) -> Dict[str, float]:
+        """
+        Service proximity score for every service category.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            
+        Returns:
+            Dict mapping component name to a score between 0 and 1
+        """
+        distances = self.nearest_service_distances(np.array([location[0]]),
+                                                   np.array([location[1]]))[0]
+
+        # Score decreases with distance, capped at 5km
+        return {
+            component: max(0, 1 - (float(distance) / 5))
+            for component, distance in zip(self.SERVICE_COMPONENTS.values(), distances)
+        }
+
+    def simulate_infrastructure_score(self, location: Tuple[float, float]) -> float:
+        """
+        Simulate infrastructure availability score.
+        In a real implementation, this would check actual infrastructure data.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            
+        Returns:
+            float: Score between 0 and 1
+        """
+        # Calculate distance to the nearest infrastructure hub
+        distances, _ = self.location_scorer.hub_index.query(np.array([location[0]]),
+                                                            np.array([location[1]]))
+        min_distance = float(distances[0])
+        
+        # Score decreases with distance from nearest hub, capped at 8km
+        return max(0, 1 - (min_distance / 8))
+
+    def _tract_lookup(self, demographic_data: pd.DataFrame) -> Tuple[TractResolver, np.ndarray]:
+        """
+        Tract resolver and per-tract community scores for demographic_data.
+        
+        Both are built once and reused for as long as the same DataFrame is passed.
+        
+        Args:
+            demographic_data: DataFrame with one row per census tract
+            
+        Returns:
+            Tuple of (TractResolver, array of community scores per tract)
+        """
+        if self._tract_data is not demographic_data:
+            # Calculate sub-scores for every tract at once
+            population_density_score = 1 - np.minimum(
+                1.0, demographic_data['population_density'].to_numpy(dtype=float) / 10000)
+            poverty_rate_score = np.minimum(
+                1.0, demographic_data['poverty_rate'].to_numpy(dtype=float) / 30)
+            environmental_score = 1 - np.minimum(
+                1.0, demographic_data['calenviroscreen_score'].to_numpy(dtype=float) / 100)
+
+            # Weight the sub-scores
+            tract_scores = (population_density_score * 0.3 +
+                            poverty_rate_score * 0.4 +
+                            environmental_score * 0.3)
+
+            self._tract_resolver = TractResolver(demographic_data, self.index_method)
+            self._tract_scores = tract_scores
+            self._tract_data = demographic_data
+
+        return self._tract_resolver, self._tract_scores
+
+    def community_impact_scores(self, lats: np.ndarray, lons: np.ndarray,
+                                demographic_data: pd.DataFrame) -> np.ndarray:
+        """
+        Community impact scores for many locations with one tract lookup.
+        
+        Each location is scored using the census tract that contains it, or the
+        nearest tract when no tract geometry contains it.
+        
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+            demographic_data: DataFrame with demographic information and tract
+                latitude/longitude columns
+            
+        Returns:
+            Array of scores between 0 and 1
+        """
+        try:
+            resolver, tract_scores = self._tract_lookup(demographic_data)
+            return tract_scores[resolver.resolve(lats, lons)]
+
+        except Exception as e:
+            logger.error(f"Error calculating community impact score: {str(e)}")
+            return np.zeros(len(lats))
+
+    def calculate_community_impact_score(self, location: Tuple[float, float], 
+                                      demographic_data: pd.DataFrame) -> float:
+        """
+        Calculate community impact score based on demographic factors.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            demographic_data: DataFrame with demographic information
+            
+        Returns:
+            float: Score between 0 and 1
+        """
+        return float(self.community_impact_scores(np.array([location[0]]),
+                                                  np.array([location[1]]),
+                                                  demographic_data)[0])
+
+    def score_location(self, location: Tuple[float, float], 
+                      demographic_data: pd.DataFrame) -> Dict[str, float]:
+        """
+        Calculate overall suitability score for a potential EIH site.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            demographic_data: DataFrame with demographic information
+            
+        Returns:
+            Dict containing overall score and component scores
+        """
+        location = (round(float(location[0]), self.cache_precision),
+                    round(float(location[1]), self.cache_precision))
+        data_version = self._data_version(demographic_data)
+        score_key = ('score', *location, data_version, self._weights_key())
+
+        cached = self.cache.get(score_key)
+        if cached is None:
+            # Component scores don't depend on the weights, so a weight change
+            # only recomputes the weighted total
+            component_key = ('components', *location, data_version)
+            component_scores = self.cache.peek(component_key)
+            if component_scores is None:
+                component_scores = self._score_components(location, demographic_data)
+                self.cache.put(component_key, component_scores)
+
+            # Calculate weighted total score
+            cached = (self._weighted_total(component_scores), component_scores)
+            self.cache.put(score_key, cached)
+
+        total_score, component_scores = cached
+        return {
+            'total_score': total_score,
+            'component_scores': dict(component_scores)
+        }
+
+    def _score_components(self, location: Tuple[float, float],
+                          demographic_data: pd.DataFrame) -> Dict[str, float]:
+        """
+        Calculate every component score for a single location.
+        
+        Args:
+            location: Tuple of (latitude, longitude)
+            demographic_data: DataFrame with demographic information
+            
+        Returns:
+            Dict mapping component name to score
+        """
+        # Calculate service proximity and infrastructure scores
+        location_scores = self.location_component_scores(np.array([location[0]]),
+                                                         np.array([location[1]]))
+        
+        # Calculate community impact score
+        community_score = self.calculate_community_impact_score(location, demographic_data)
+        
+        return {
+            **{name: float(scores[0]) for name, scores in location_scores.items()},
+            'community_impact': community_score
+        }
+
+    def _data_version(self, demographic_data: pd.DataFrame) -> str:
+        """
+        Version of the demographic data used in cache keys.
+        
+        Content-based, so a reloaded copy of the same data (load_dataset()
+        returns a fresh copy per call) keeps hitting the cache. The digest is
+        only recomputed when a different DataFrame object is passed in, and
+        entries cached under a previous version are dropped when it changes.
+        
+        Args:
+            demographic_data: DataFrame with demographic information
+            
+        Returns:
+            str: Hex digest of the data's columns, index and values
+        """
+        if demographic_data is not self._cached_data:
+            digest = hashlib.sha1(json.dumps([str(column) for column in demographic_data.columns]).encode())
+            digest.update(pd.util.hash_pandas_object(demographic_data, index=True).to_numpy().tobytes())
+            version = digest.hexdigest()
+            if self._cached_data_version is not None and version != self._cached_data_version:
+                previous = self._cached_data_version
+                self.cache.discard_where(lambda key: key[3] == previous)
+            self._cached_data = demographic_data
+            self._cached_data_version = version
+        return self._cached_data_version
+
+    def _weights_key(self) -> str:
+        """
+        Stable hash of the current scoring weights for cache keys.
+        
+        Returns:
+            str: Hex digest of the weights
+        """
+        return hashlib.sha1(json.dumps(self.weights, sort_keys=True).encode()).hexdigest()
+
+    def cache_info(self) -> Dict[str, float]:
+        """
+        Hit/miss counters and size of the score_location cache.
+        
+        Returns:
+            Dict with hits, misses, hit_rate, size and maxsize
+        """
+        return self.cache.stats()
+
+    def clear_cache(self) -> None:
+        """Drop every cached score, e.g. after anchor data changes."""
+        self.cache.clear()
+
+    def location_component_scores(self, lats: np.ndarray, lons: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Scores for the components that depend only on location.
+        
+        Interpolated from the baked scoring grid when one is in use (see
+        use_grid); locations outside the grid are computed exactly.
+        
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+            
+        Returns:
+            Dict mapping component name to a score array
+        """
+        return self.location_scorer.component_scores(lats, lons)
+
+    @property
+    def grid(self) -> Optional[ScoringGrid]:
+        """Precomputed scoring grid in use, if any (see use_grid)."""
+        return self.location_scorer.grid
+
+    def anchor_fingerprint(self) -> str:
+        """
+        Hash of the service anchors and infrastructure hubs.
+        
+        Returns:
+            str: Hex digest that changes whenever any anchor changes
+        """
+        return self.location_scorer.fingerprint()
+
+    def use_grid(self, path: Optional[str] = None,
+                 bounds: Tuple[float, float, float, float] = SAN_JOSE_BOUNDS,
+                 resolution: float = DEFAULT_RESOLUTION) -> ScoringGrid:
+        """
+        Answer location-only components from a precomputed scoring grid.
+        
+        The grid at path is loaded when it matches the current anchors, bounds
+        and resolution, and baked (and saved) otherwise.
+        
+        Args:
+            path: Grid file path, defaults to SCORING_GRID_PATH
+            bounds: (lat_min, lat_max, lon_min, lon_max) covered by the grid
+            resolution: Grid spacing in degrees
+            
+        Returns:
+            ScoringGrid in use
+        """
+        self.location_scorer.grid = ScoringGrid.load_or_bake(
+            path or self.SCORING_GRID_PATH, self.location_scorer.exact_component_scores,
+            bounds, resolution, self.anchor_fingerprint())
+        self.clear_cache()
+        return self.grid
+
+    def _candidate_arrays(self, candidates: Union[pd.DataFrame, np.ndarray,
+                                                  List[Tuple[float, float]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Normalize candidate locations into latitude and longitude arrays.
+        
+        Args:
+            candidates: DataFrame with latitude/longitude columns, an (n, 2) array
+                or a list of (latitude, longitude) tuples
+            
+        Returns:
+            Tuple of (latitudes, longitudes) float arrays
+        """
+        if isinstance(candidates, pd.DataFrame):
+            lat_col, lon_col = coordinate_columns(candidates)
+            return (candidates[lat_col].to_numpy(dtype=float),
+                    candidates[lon_col].to_numpy(dtype=float))
+
+        coords = np.asarray(candidates, dtype=float)
+        if coords.size == 0:
+            return np.empty(0), np.empty(0)
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            raise ValueError("Candidate array must have shape (n, 2)")
+        return coords[:, 0], coords[:, 1]
+
+    def score_locations_batch(self, candidates: Union[pd.DataFrame, np.ndarray,
+                                                      List[Tuple[float, float]]],
+                              demographic_data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Score many locations in one vectorized pass.
+        
+        Every component is computed with one vectorized nearest-anchor lookup per
+        chunk of candidates instead of one haversine call per candidate and anchor.
+        
+        Args:
+            candidates: DataFrame with latitude/longitude columns, an (n, 2) array
+                or a list of (latitude, longitude) tuples
+            demographic_data: DataFrame with demographic information
+            
+        Returns:
+            DataFrame with one row per candidate, in input order, with the same
+            columns as get_top_locations
+        """
+        lats, lons = self._candidate_arrays(candidates)
+
+        components = {}
+        for start in range(0, len(lats), self.BATCH_CHUNK_SIZE):
+            chunk = slice(start, start + self.BATCH_CHUNK_SIZE)
+            for name, scores in self.location_component_scores(lats[chunk], lons[chunk]).items():
+                components.setdefault(name, np.empty(len(lats)))[chunk] = scores
+        if not len(lats):
+            components = self.location_component_scores(lats, lons)
+
+        community_scores = self.community_impact_scores(lats, lons, demographic_data)
+
+        components['community_impact'] = community_scores
+
+        return pd.DataFrame({
+            'latitude': lats,
+            'longitude': lons,
+            'total_score': self._weighted_total(components),
+            **components
+        })
+
+    def _weighted_total(self, components: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Combine component scores into the weighted total score.
+        
+        Args:
+            components: Mapping of component name to score (scalar or array)
+            
+        Returns:
+            Total score, with the same shape as the components
+        """
+        return weighted_total(components, self.weights)
+
+    def get_top_locations(self, candidate_locations: Union[pd.DataFrame, np.ndarray,
+                                                           List[Tuple[float, float]]],
+                         demographic_data: pd.DataFrame, 
+                         n: int = 5,
+                         n_workers: Optional[int] = None) -> pd.DataFrame:
+        """
+        Score multiple locations and return the top N candidates.
+        
+        Args:
+            candidate_locations: List of (latitude, longitude) tuples, an (n, 2)
+                array or a DataFrame with latitude/longitude columns
+            demographic_data: DataFrame with demographic information
+            n: Number of top locations to return
+            n_workers: Worker processes to shard scoring across; None or 1 scores
+                serially. Results are identical either way.
+            
+        Returns:
+            DataFrame with scored locations
+        """
+        if not n_workers or n_workers <= 1:
+            results_df = self.score_locations_batch(candidate_locations, demographic_data)
+            top = top_n_positions(results_df['total_score'].to_numpy(), n)
+            return results_df.iloc[top]
+
+        from .parallel_scoring import parallel_top_n
+
+        lats, lons = self._candidate_arrays(candidate_locations)
+        try:
+            resolver, tract_scores = self._tract_lookup(demographic_data)
+        except Exception as e:
+            logger.error(f"Error calculating community impact score: {str(e)}")
+            resolver, tract_scores = None, None
+
+        top = parallel_top_n(self.location_scorer, resolver, tract_scores, self.weights,
+                             lats, lons, n, n_workers, self.BATCH_CHUNK_SIZE)
+
+        # Only the winners are re-scored in full to build the result rows
+        results_df = self.score_locations_batch(np.column_stack([lats[top], lons[top]]),
+                                                demographic_data)
+        results_df.index = top
+        return results_df
+
+    def stream_top_locations(self, candidates_path: str,
+                             demographic_data: pd.DataFrame,
+                             n: int = 5,
+                             chunksize: int = 100000,
+                             output_path: Optional[str] = None,
+                             id_column: Optional[str] = None) -> pd.DataFrame:
+        """
+        Score a CSV or Parquet candidate file chunk by chunk and return the top N.
+        
+        Only a min-heap of the best N rows is kept between chunks, so peak memory
+        depends on chunksize and n, not on the size of the file.
+        
+        Args:
+            candidates_path: CSV or Parquet file with latitude/longitude columns
+            demographic_data: DataFrame with demographic information
+            n: Number of top locations to return
+            chunksize: Candidate rows read and scored at a time
+            output_path: Optional CSV or Parquet file that receives every scored
+                row, written incrementally
+            id_column: Optional candidate column (e.g. a parcel ID) carried into
+                the results
+            
+        Returns:
+            DataFrame with the top N scored locations, best first, indexed by row
+            position in the candidate file (same ordering and ties as
+            get_top_locations)
+        """
+        # Min-heap keyed so the root is the worst kept row: lowest score, and
+        # the later position among equal scores
+        heap = []
+        writer = ChunkWriter(output_path) if output_path else None
+        try:
+            for chunk in iter_candidate_chunks(candidates_path, chunksize):
+                results = self.score_locations_batch(chunk, demographic_data)
+                results.index = chunk.index
+                if id_column:
+                    results.insert(0, id_column, chunk[id_column].to_numpy())
+
+                if writer:
+                    writer.write(results)
+
+                scores = results['total_score'].to_numpy()
+                for position in top_n_positions(scores, n):
+                    entry = (scores[position], -int(results.index[position]),
+                             results.iloc[position].tolist())
+                    if len(heap) < n:
+                        heapq.heappush(heap, entry)
+                    elif entry[:2] > heap[0][:2]:
+                        heapq.heapreplace(heap, entry)
+        finally:
+            if writer:
+                writer.close()
+
+        best = sorted(heap, key=lambda entry: (-entry[0], -entry[1]))
+        columns = ([id_column] if id_column else []) + [
+            'latitude', 'longitude', 'total_score',
+            *self.SERVICE_COMPONENTS.values(), 'infrastructure', 'community_impact'
+        ]
+        return pd.DataFrame([row for _, _, row in best], columns=columns,
+                            index=[-position for _, position, _ in best])
@@ -0,0 +1,243 @@
+"""
+Precomputed lookup grid for location-only score components.
+
+Service proximity and infrastructure scores depend only on location and the
+static anchor sets, so they can be baked once over a regular lat/lon grid
+covering the city and answered online by bilinear interpolation. The baked
+grid records a fingerprint of the anchors and is rebuilt automatically when
+they change.
+"""
+
+import hashlib
+import logging
+import os
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# San Jose bounding box (lat_min, lat_max, lon_min, lon_max)
+SAN_JOSE_BOUNDS = (37.20, 37.47, -122.05, -121.72)
+
+# Grid spacing in degrees (~55m north-south at San Jose's latitude)
+DEFAULT_RESOLUTION = 0.0005
+
+# Grid rows evaluated per bake pass
+BAKE_CHUNK_ROWS = 64
+
+
+def anchor_fingerprint(*arrays: np.ndarray) -> str:
+    """
+    Hash of the anchor arrays a grid was baked from.
+
+    Args:
+        arrays: Anchor coordinate and offset arrays
+
+    Returns:
+        str: Hex digest that changes whenever any anchor changes
+    """
+    digest = hashlib.sha1()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class ScoringGrid:
+    """
+    Component scores sampled on a regular lat/lon grid.
+    """
+
+    def __init__(self, bounds: Tuple[float, float, float, float], resolution: float,
+                 components: Dict[str, np.ndarray], fingerprint: str):
+        """
+        Initialize the grid.
+
+        Args:
+            bounds: (lat_min, lat_max, lon_min, lon_max) covered by the grid
+            resolution: Grid spacing in degrees
+            components: Mapping of component name to a (rows, cols) score array
+            fingerprint: anchor_fingerprint() of the anchors the grid was baked from
+        """
+        self.bounds = tuple(float(b) for b in bounds)
+        self.resolution = float(resolution)
+        self.components = components
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def grid_axes(bounds: Tuple[float, float, float, float],
+                  resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Latitude and longitude of the grid rows and columns.
+
+        Args:
+            bounds: (lat_min, lat_max, lon_min, lon_max)
+            resolution: Grid spacing in degrees
+
+        Returns:
+            Tuple of (row latitudes, column longitudes)
+        """
+        lat_min, lat_max, lon_min, lon_max = bounds
+        rows = int(np.ceil(round((lat_max - lat_min) / resolution, 9))) + 1
+        cols = int(np.ceil(round((lon_max - lon_min) / resolution, 9))) + 1
+        return (lat_min + np.arange(rows) * resolution,
+                lon_min + np.arange(cols) * resolution)
+
+    @classmethod
+    def bake(cls, score_fn: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]],
+             bounds: Tuple[float, float, float, float], resolution: float,
+             fingerprint: str) -> 'ScoringGrid':
+        """
+        Evaluate component scores at every grid node.
+
+        Args:
+            score_fn: Function mapping (lats, lons) arrays to a dict of score arrays
+            bounds: (lat_min, lat_max, lon_min, lon_max) to cover
+            resolution: Grid spacing in degrees
+            fingerprint: anchor_fingerprint() of the anchors score_fn uses
+
+        Returns:
+            ScoringGrid with float32 component arrays
+        """
+        grid_lats, grid_lons = cls.grid_axes(bounds, resolution)
+        components = {}
+
+        for start in range(0, len(grid_lats), BAKE_CHUNK_ROWS):
+            row_lats = grid_lats[start:start + BAKE_CHUNK_ROWS]
+            lats, lons = np.meshgrid(row_lats, grid_lons, indexing='ij')
+            scores = score_fn(lats.ravel(), lons.ravel())
+
+            for name, values in scores.items():
+                if name not in components:
+                    components[name] = np.empty((len(grid_lats), len(grid_lons)), dtype=np.float32)
+                components[name][start:start + len(row_lats)] = values.reshape(lats.shape)
+
+        logger.info(f"Baked {len(components)} components on a "
+                    f"{len(grid_lats)}x{len(grid_lons)} scoring grid")
+        return cls(bounds, resolution, components, fingerprint)
+
+    def save(self, path: str) -> None:
+        """
+        Write the grid as a compressed .npz file.
+
+        Args:
+            path: Output file path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(
+            path,
+            bounds=np.array(self.bounds),
+            resolution=np.array(self.resolution),
+            fingerprint=np.array(self.fingerprint),
+            component_names=np.array(list(self.components)),
+            **{f"component_{name}": values for name, values in self.components.items()}
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'ScoringGrid':
+        """
+        Read a grid written by save().
+
+        Args:
+            path: Grid file path
+
+        Returns:
+            ScoringGrid
+        """
+        with np.load(path) as data:
+            names = [str(name) for name in data['component_names']]
+            return cls(
+                bounds=tuple(data['bounds']),
+                resolution=float(data['resolution']),
+                components={name: data[f"component_{name}"] for name in names},
+                fingerprint=str(data['fingerprint'])
+            )
+
+    @classmethod
+    def load_or_bake(cls, path: Optional[str],
+                     score_fn: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]],
+                     bounds: Tuple[float, float, float, float], resolution: float,
+                     fingerprint: str) -> 'ScoringGrid':
+        """
+        Load a baked grid, re-baking when it is missing or stale.
+
+        A grid is stale when it was baked from different anchors, bounds or
+        resolution.
+
+        Args:
+            path: Grid file path, or None to bake without saving
+            score_fn: Function mapping (lats, lons) arrays to a dict of score arrays
+            bounds: (lat_min, lat_max, lon_min, lon_max) to cover
+            resolution: Grid spacing in degrees
+            fingerprint: anchor_fingerprint() of the anchors score_fn uses
+
+        Returns:
+            ScoringGrid matching the current anchors
+        """
+        if path and os.path.exists(path):
+            try:
+                grid = cls.load(path)
+                if (grid.fingerprint == fingerprint
+                        and np.allclose(grid.bounds, bounds)
+                        and np.isclose(grid.resolution, resolution)):
+                    return grid
+                logger.info(f"Scoring grid at {path} is stale, re-baking")
+            except Exception as e:
+                logger.warning(f"Could not read scoring grid at {path}: {str(e)}")
+
+        grid = cls.bake(score_fn, bounds, resolution, fingerprint)
+        if path:
+            grid.save(path)
+        return grid
+
+    def contains(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Which locations fall inside the grid bounds.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes
+
+        Returns:
+            Boolean array
+        """
+        lat_min, lat_max, lon_min, lon_max = self.bounds
+        return (lats >= lat_min) & (lats <= lat_max) & (lons >= lon_min) & (lons <= lon_max)
+
+    def interpolate(self, lats: np.ndarray, lons: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Bilinear interpolation of every component at the given locations.
+
+        Locations are expected to lie inside the grid (see contains()); ones
+        outside are clamped to the nearest edge.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+
+        Returns:
+            Dict mapping component name to an interpolated score array
+        """
+        any_component = next(iter(self.components.values()))
+        rows, cols = any_component.shape
+
+        y = np.clip((np.asarray(lats, dtype=float) - self.bounds[0]) / self.resolution, 0, rows - 1)
+        x = np.clip((np.asarray(lons, dtype=float) - self.bounds[2]) / self.resolution, 0, cols - 1)
+        r0 = np.minimum(y.astype(np.intp), rows - 2)
+        c0 = np.minimum(x.astype(np.intp), cols - 2)
+        fy = y - r0
+        fx = x - c0
+
+        w00 = (1 - fy) * (1 - fx)
+        w01 = (1 - fy) * fx
+        w10 = fy * (1 - fx)
+        w11 = fy * fx
+
+        return {
+            name: (values[r0, c0] * w00 + values[r0, c0 + 1] * w01 +
+                   values[r0 + 1, c0] * w10 + values[r0 + 1, c0 + 1] * w11)
+            for name, values in self.components.items()
+        }
@@ -0,0 +1,232 @@
+"""
+Array-level scoring kernel shared by SiteScorer and its parallel workers.
+
+Everything here works on plain NumPy arrays so a kernel can be rebuilt from
+shared memory in a worker process and produce exactly the same scores as the
+serial path.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .scoring_grid import ScoringGrid, anchor_fingerprint
+from .spatial_index import BruteForceIndex, build_index, haversine_matrix
+
+
+class LocationScorer:
+    """
+    Service proximity and infrastructure scores, which depend only on location.
+
+    Service anchors of every category are held in one contiguous array, and a
+    nearest-neighbor index is built per category plus one for the
+    infrastructure hubs.
+    """
+
+    def __init__(self, service_anchor_lats: np.ndarray, service_anchor_lons: np.ndarray,
+                 service_anchor_offsets: np.ndarray, hub_lats: np.ndarray, hub_lons: np.ndarray,
+                 service_components: Sequence[str], index_method: str = 'auto',
+                 grid: Optional[ScoringGrid] = None):
+        """
+        Initialize the kernel.
+
+        Args:
+            service_anchor_lats, service_anchor_lons: Service anchors grouped by category
+            service_anchor_offsets: Start position of each category in the anchor arrays
+            hub_lats, hub_lons: Infrastructure hub locations
+            service_components: Component name of each service category, in order
+            index_method: Nearest-neighbor index method (see spatial_index.build_index)
+            grid: Optional precomputed scoring grid
+        """
+        self.service_anchor_lats = np.asarray(service_anchor_lats, dtype=float)
+        self.service_anchor_lons = np.asarray(service_anchor_lons, dtype=float)
+        self.service_anchor_offsets = np.asarray(service_anchor_offsets, dtype=np.intp)
+        self.service_components = tuple(service_components)
+        self.index_method = index_method
+        self.grid = grid
+
+        bounds = list(self.service_anchor_offsets[1:]) + [len(self.service_anchor_lats)]
+        self.service_indexes = [
+            build_index(self.service_anchor_lats[start:stop],
+                        self.service_anchor_lons[start:stop], index_method)
+            for start, stop in zip(self.service_anchor_offsets, bounds)
+        ]
+        self.hub_index = build_index(hub_lats, hub_lons, index_method)
+
+    def nearest_service_distances(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Distance to the nearest anchor of every service category in one pass.
+
+        Args:
+            lats, lons: Arrays of candidate latitudes and longitudes, shape (n,)
+
+        Returns:
+            Array of distances in kilometers, shape (n, categories)
+        """
+        if all(isinstance(index, BruteForceIndex) for index in self.service_indexes):
+            # Small anchor sets: one fused distance matrix across all categories
+            distances = haversine_matrix(lats, lons,
+                                         self.service_anchor_lats, self.service_anchor_lons)
+            return np.minimum.reduceat(distances, self.service_anchor_offsets, axis=1)
+
+        return np.column_stack([index.query(lats, lons)[0] for index in self.service_indexes])
+
+    def exact_component_scores(self, lats: np.ndarray, lons: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Service proximity and infrastructure scores from nearest-anchor lookups.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+
+        Returns:
+            Dict mapping component name to a score array
+        """
+        # Score decreases with distance, capped at 5km
+        service_distance = self.nearest_service_distances(lats, lons)
+        service_scores = np.maximum(0, 1 - service_distance / 5)
+
+        # Score decreases with distance from nearest hub, capped at 8km
+        hub_distance, _ = self.hub_index.query(lats, lons)
+
+        return {
+            **{component: service_scores[:, i]
+               for i, component in enumerate(self.service_components)},
+            'infrastructure': np.maximum(0, 1 - hub_distance / 8)
+        }
+
+    def component_scores(self, lats: np.ndarray, lons: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Location-only component scores, interpolated from the grid when set.
+
+        Locations outside the grid are computed exactly.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+
+        Returns:
+            Dict mapping component name to a score array
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if self.grid is None:
+            return self.exact_component_scores(lats, lons)
+
+        inside = self.grid.contains(lats, lons)
+        if inside.all():
+            return self.grid.interpolate(lats, lons)
+
+        components = {name: np.empty(len(lats)) for name in self.grid.components}
+        for name, scores in self.grid.interpolate(lats[inside], lons[inside]).items():
+            components[name][inside] = scores
+        for name, scores in self.exact_component_scores(lats[~inside], lons[~inside]).items():
+            components[name][~inside] = scores
+        return components
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the service anchors and infrastructure hubs.
+
+        Returns:
+            str: Hex digest that changes whenever any anchor changes
+        """
+        return anchor_fingerprint(self.service_anchor_lats, self.service_anchor_lons,
+                                  self.service_anchor_offsets,
+                                  self.hub_index.anchor_lats, self.hub_index.anchor_lons)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """
+        The arrays needed to rebuild this kernel, e.g. in another process.
+
+        Returns:
+            Dict of named arrays, including any scoring grid components
+        """
+        arrays = {
+            'service_anchor_lats': self.service_anchor_lats,
+            'service_anchor_lons': self.service_anchor_lons,
+            'service_anchor_offsets': self.service_anchor_offsets,
+            'hub_lats': self.hub_index.anchor_lats,
+            'hub_lons': self.hub_index.anchor_lons
+        }
+        if self.grid is not None:
+            arrays.update({f"grid_{name}": values for name, values in self.grid.components.items()})
+        return arrays
+
+
+def weighted_total(components: Dict[str, np.ndarray],
+                   weights: Dict[str, Dict[str, float]]) -> np.ndarray:
+    """
+    Combine component scores into the weighted total score.
+
+    Args:
+        components: Mapping of component name to score (scalar or array)
+        weights: SiteScorer weights
+
+    Returns:
+        Total score, with the same shape as the components
+    """
+    return (
+        components['transit'] * weights['services']['public_transit'] +
+        components['healthcare'] * weights['services']['healthcare'] +
+        components['grocery'] * weights['services']['grocery'] +
+        components['social_services'] * weights['services']['social_services'] +
+        components['infrastructure'] * (
+            weights['infrastructure']['utilities'] +
+            weights['infrastructure']['road_connectivity'] +
+            weights['infrastructure']['emergency_response']
+        ) / 3 +
+        components['community_impact'] * (
+            weights['community']['population_density'] +
+            weights['community']['demographic_risk'] +
+            weights['community']['environmental_justice']
+        ) / 3
+    )
+
+
+def top_n_positions(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Positions of the n highest scores, best first.
+
+    Uses a partial sort (argpartition) and breaks ties by position, which
+    matches DataFrame.nlargest(keep='first').
+
+    Args:
+        scores: Array of scores
+        n: Number of positions to return
+
+    Returns:
+        Array of positions into scores
+    """
+    n = min(n, len(scores))
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    threshold = scores[np.argpartition(-scores, n - 1)[:n]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:n - len(above)]
+    top = np.concatenate([above, ties])
+
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def merge_top_n(shards: Iterable[Tuple[np.ndarray, np.ndarray]], n: int) -> np.ndarray:
+    """
+    Merge per-shard top-N results into the global top N.
+
+    Args:
+        shards: (positions, scores) pairs, each already ordered best first
+            with positions global to the full candidate array
+        n: Number of positions to return
+
+    Returns:
+        Array of global positions, best first, with the same tie-breaking as
+        top_n_positions over the full array
+    """
+    shards = list(shards)
+    if not shards:
+        return np.empty(0, dtype=np.intp)
+
+    positions = np.concatenate([shard_positions for shard_positions, _ in shards])
+    scores = np.concatenate([shard_scores for _, shard_scores in shards])
+    order = np.lexsort((positions, -scores))[:n]
+
+    return positions[order]
@@ -0,0 +1,341 @@
+"""
+Local HTTP/JSON service around the scoring and feasibility engines.
+
+    python -m safespace serve --port 8090
+
+    POST /score         {"sites": [{"lat": 37.33, "lon": -121.88}, ...]}
+    POST /feasibility   same body; a single {"lat": ..., "lon": ...} also works
+    GET  /metrics       request counts, p50/p99 latency and batch sizes
+    GET  /health
+
+The SiteScorer (anchor index and tract resolver) is built and warmed once at
+startup. Concurrent requests to an endpoint are queued and a single worker
+thread drains the queue every batch window, scoring everything that arrived
+in one vectorized call, so many small requests cost about as much as one
+large one and the engines are only ever used from one thread.
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# How long the batch worker keeps collecting requests after the first one arrives
+BATCH_WINDOW_MS = float(os.environ.get('SAFESPACE_BATCH_WINDOW_MS', 1.0))
+
+# Sites scored in one batch at most; larger queues are split over several batches
+MAX_BATCH_SITES = 50000
+
+# Sites accepted in one request
+MAX_REQUEST_SITES = 10000
+
+# Most recent request latencies kept per endpoint for the percentiles
+METRICS_WINDOW = 10000
+
+# Seconds a request waits for its batch before failing
+REQUEST_TIMEOUT = 30.0
+
+
+class LatencyStats:
+    """Thread-safe rolling request latencies and counters per endpoint."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if error:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-endpoint request count, error count and latency percentiles.
+
+        Returns:
+            Dict of endpoint -> {'requests', 'errors', 'p50_ms', 'p99_ms', 'max_ms'},
+            the latencies taken over the last `window` requests
+        """
+        with self._lock:
+            latencies = {endpoint: np.array(values) for endpoint, values in self._latencies.items()}
+            counts, errors = dict(self._counts), dict(self._errors)
+
+        stats = {}
+        for endpoint, values in latencies.items():
+            p50, p99 = np.percentile(values, [50, 99]) * 1000
+            stats[endpoint] = {
+                'requests': counts[endpoint],
+                'errors': errors.get(endpoint, 0),
+                'p50_ms': round(float(p50), 3),
+                'p99_ms': round(float(p99), 3),
+                'max_ms': round(float(values.max() * 1000), 3)
+            }
+        return stats
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and evaluates them in one vectorized call.
+
+    Each request is a pair of coordinate arrays. A worker thread waits for the
+    first queued request, keeps collecting for `window` seconds (or until
+    `max_sites` sites are queued), concatenates the coordinates, calls
+    `fn(lats, lons)` once and hands every request its slice of the result.
+    """
+
+    def __init__(self, fn: Callable[[np.ndarray, np.ndarray], Sequence],
+                 window: float = BATCH_WINDOW_MS / 1000, max_sites: int = MAX_BATCH_SITES,
+                 name: str = 'batch'):
+        """
+        Initialize the batcher and start its worker thread.
+
+        Args:
+            fn: Vectorized function of (lats, lons) returning a sequence with
+                one item per site
+            window: Seconds to keep collecting after the first request arrives
+            max_sites: Stop collecting once this many sites are queued
+            name: Name of the worker thread
+        """
+        self.fn = fn
+        self.window = window
+        self.max_sites = max_sites
+        self.batches = 0
+        self.batched_requests = 0
+        self.batched_sites = 0
+        self._queue = queue.Queue()
+        self._pending = None
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, lats: np.ndarray, lons: np.ndarray) -> Future:
+        """Queue one request; the future resolves to its items of the result."""
+        future = Future()
+        self._queue.put((np.asarray(lats, dtype=float), np.asarray(lons, dtype=float), future))
+        return future
+
+    def __call__(self, lats, lons, timeout: Optional[float] = REQUEST_TIMEOUT) -> Sequence:
+        return self.submit(lats, lons).result(timeout)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'batches': self.batches,
+            'requests_per_batch': round(self.batched_requests / max(self.batches, 1), 2),
+            'sites_per_batch': round(self.batched_sites / max(self.batches, 1), 2)
+        }
+
+    def _collect(self) -> List[Tuple[np.ndarray, np.ndarray, Future]]:
+        # A request that overflowed the previous batch starts this one
+        first = self._pending or self._queue.get()
+        self._pending = None
+        jobs, sites = [first], len(first[0])
+        deadline = time.monotonic() + self.window
+        while sites < self.max_sites:
+            try:
+                job = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if sites + len(job[0]) > self.max_sites:
+                self._pending = job
+                break
+            jobs.append(job)
+            sites += len(job[0])
+        return jobs
+
+    def _run(self) -> None:
+        while True:
+            jobs = self._collect()
+            jobs = [job for job in jobs if job[2].set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+
+            try:
+                result = self.fn(np.concatenate([job[0] for job in jobs]),
+                                 np.concatenate([job[1] for job in jobs]))
+            except Exception as e:
+                logger.exception("Batch of %d requests failed", len(jobs))
+                for job in jobs:
+                    job[2].set_exception(e)
+                continue
+
+            start = 0
+            for lats, _, future in jobs:
+                future.set_result(result[start:start + len(lats)])
+                start += len(lats)
+
+            self.batches += 1
+            self.batched_requests += len(jobs)
+            self.batched_sites += start
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict]:
+    """
+    Rows of `frame` as JSON-ready dicts.
+
+    Much cheaper than DataFrame.to_dict('records') on the small frames a
+    batch produces; categorical values come out as their labels.
+    """
+    columns = list(frame.columns)
+    return [dict(zip(columns, row)) for row in zip(*(frame[column].tolist() for column in columns))]
+
+
+class ScoringService:
+    """
+    Warm scoring and feasibility engines behind per-endpoint micro-batchers.
+    """
+
+    def __init__(self, tracts: pd.DataFrame, window: float = BATCH_WINDOW_MS / 1000,
+                 max_batch_sites: int = MAX_BATCH_SITES):
+        """
+        Build the engines and start the batch workers.
+
+        Args:
+            tracts: Census tracts used for community impact scores
+            window: Batch window in seconds
+            max_batch_sites: Most sites scored in one batch
+        """
+        from .feasibility import evaluate_feasibility_batch
+        from .scoring import SiteScorer
+
+        self.tracts = tracts
+        self.scorer = SiteScorer(tracts)
+        self.started = time.time()
+        self.latency = LatencyStats()
+
+        # Builds the nearest-anchor index and the tract resolver up front,
+        # so the first request is not the slow one
+        self._score(np.array([37.3382]), np.array([-121.8863]))
+
+        # Results are turned into records once per batch, not once per request
+        self.batchers = {
+            'score': MicroBatcher(lambda lats, lons: frame_records(self._score(lats, lons)),
+                                  window, max_batch_sites, 'score-batcher'),
+            'feasibility': MicroBatcher(
+                lambda lats, lons: frame_records(evaluate_feasibility_batch(lats, lons)),
+                window, max_batch_sites, 'feasibility-batcher'
+            )
+        }
+
+    def _score(self, lats: np.ndarray, lons: np.ndarray) -> pd.DataFrame:
+        return self.scorer.score_locations_batch(np.column_stack([lats, lons]), self.tracts)
+
+    def evaluate(self, endpoint: str, lats, lons) -> List[Dict]:
+        """Results of `endpoint` ('score' or 'feasibility') for the given sites, one dict per site."""
+        return self.batchers[endpoint](lats, lons)
+
+    def metrics(self) -> Dict:
+        return {
+            'uptime_s': round(time.time() - self.started, 1),
+            'batch_window_ms': self.batchers['score'].window * 1000,
+            'endpoints': self.latency.snapshot(),
+            'batching': {name: batcher.stats() for name, batcher in self.batchers.items()}
+        }
+
+
+def parse_sites(payload) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordinates from a request body.
+
+    Args:
+        payload: {"sites": [{"lat": ..., "lon": ...}, ...]} or a single
+            {"lat": ..., "lon": ...}; "latitude"/"longitude" are accepted too
+
+    Returns:
+        Tuple of (latitudes, longitudes) float arrays
+
+    Raises:
+        ValueError: If the body is malformed or has too many sites
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    sites = payload['sites'] if 'sites' in payload else [payload]
+    if not isinstance(sites, list) or not sites:
+        raise ValueError("'sites' must be a non-empty list")
+    if len(sites) > MAX_REQUEST_SITES:
+        raise ValueError(f"At most {MAX_REQUEST_SITES} sites per request")
+
+    try:
+        lats = np.array([site.get('lat', site.get('latitude')) for site in sites], dtype=float)
+        lons = np.array([site.get('lon', site.get('longitude')) for site in sites], dtype=float)
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError("Every site needs numeric 'lat' and 'lon'") from None
+    if not (np.isfinite(lats).all() and np.isfinite(lons).all()):
+        raise ValueError("Every site needs numeric 'lat' and 'lon'")
+    return lats, lons
+
+
+def make_handler(service: ScoringService):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so clients do not pay a TCP handshake per request
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            elif self.path == '/metrics':
+                self._send(200, service.metrics())
+            else:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            endpoint = self.path.strip('/')
+            start = time.perf_counter()
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length)
+            if endpoint not in service.batchers:
+                self._send(404, {'error': f"Unknown path {self.path}"})
+                return
+
+            try:
+                lats, lons = parse_sites(json.loads(body or b'null'))
+                status, response = 200, {'results': service.evaluate(endpoint, lats, lons)}
+            except ValueError as e:
+                status, response = 400, {'error': str(e)}
+            except Exception as e:
+                logger.exception("%s request failed", endpoint)
+                status, response = 500, {'error': str(e)}
+
+            self._send(status, response)
+            service.latency.record(endpoint, time.perf_counter() - start, error=status != 200)
+
+        def _send(self, status: int, payload: Dict) -> None:
+            body = json.dumps(payload).encode()
+            try:
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    return ScoringHandler
+
+
+def create_server(service: ScoringService, host: str = '127.0.0.1', port: int = 8090) -> ThreadingHTTPServer:
+    """HTTP server for `service`; call serve_forever() on it."""
+    server = ThreadingHTTPServer((host, port), make_handler(service), bind_and_activate=False)
+    server.daemon_threads = True
+    # The default backlog of 5 resets connections under a burst of clients
+    server.request_queue_size = 128
+    server.server_bind()
+    server.server_activate()
+    return server
@@ -0,0 +1,343 @@
+"""
+Capacity-aware assignment of each tract's unhoused population to shelters.
+
+Every tract's unhoused count is allocated to shelters within a travel radius
+of its centroid, without exceeding any shelter's capacity, at the least
+total person-distance. This is a transportation problem (min-cost flow from
+tracts to shelters) over the sparse tract-to-shelter graph, solved as a
+linear program with HiGHS; its constraint matrix is totally unimodular, so
+the simplex solution is integral. Demand that no shelter in reach can take
+is the tract's unmet demand. Solutions are cached per set of sites.
+
+A site's relief (how much unmet demand would grow without it) doesn't need
+an LP per site: dropping the site from the optimal assignment frees the
+people it served, and how many of them the other sites can still take is a
+max flow on that assignment's residual graph. An assessment therefore costs
+two LP solves however many sites are proposed, plus one small max flow each.
+"""
+
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .coverage import site_coordinates
+from .spatial_index import EARTH_RADIUS_KM, coordinate_columns, haversine_pairwise
+from .ttl_cache import TTLCache
+
+# Farthest a tract's residents are assigned to a shelter (5 miles)
+ASSIGNMENT_RADIUS_M = 8047
+
+# Beds assumed at a proposed site
+PROPOSED_SITE_CAPACITY = 100
+
+# What a shelter can take: all its beds, or only the ones not occupied now
+CAPACITY_BASES = ('total', 'available')
+
+_engine_cache = TTLCache(maxsize=4)
+
+
+def shelter_capacity(shelters: pd.DataFrame, basis: str = 'total') -> np.ndarray:
+    """
+    Beds each shelter offers to the assignment.
+
+    Args:
+        shelters: Shelters with 'Capacity' and 'Current Occupancy'
+        basis: 'total' assigns every bed (the tract counts include today's
+            occupants), 'available' only the free beds (Capacity minus
+            Current Occupancy, and none at over-capacity shelters)
+
+    Returns:
+        Array of capacities
+    """
+    if basis == 'total':
+        return shelters['Capacity'].to_numpy(dtype=float)
+    if basis == 'available':
+        return np.clip(shelters['Capacity'].to_numpy(dtype=float) -
+                       shelters['Current Occupancy'].to_numpy(dtype=float), 0, None)
+    raise ValueError(f"Unknown capacity basis '{basis}'. Use one of {CAPACITY_BASES}.")
+
+
+class AssignmentEngine:
+    """
+    Min-cost assignment of tract demand to sites under capacity constraints.
+
+    Build once per tract dataset; each assignment only queries the tree and
+    solves the sparse LP.
+    """
+
+    def __init__(self, tracts: pd.DataFrame, radius_m: float = ASSIGNMENT_RADIUS_M):
+        """
+        Initialize the engine and index the tract centroids.
+
+        Args:
+            tracts: Census tracts with centroid coordinates and 'Unhoused Count',
+                and optionally 'Tract ID'
+            radius_m: Farthest distance between a tract and its assigned site
+        """
+        from scipy.spatial import cKDTree
+
+        lat_column, lon_column = coordinate_columns(tracts)
+        self.tract_ids = (tracts['Tract ID'].astype(str).to_numpy() if 'Tract ID' in tracts
+                          else np.arange(len(tracts)).astype(str))
+        self.demand = tracts['Unhoused Count'].to_numpy(dtype=float)
+        self.lats = tracts[lat_column].to_numpy(dtype=float)
+        self.lons = tracts[lon_column].to_numpy(dtype=float)
+        self.radius_km = radius_m / 1000
+
+        self._cos_lat0 = np.cos(np.radians(self.lats.mean())) if len(tracts) else 1.0
+        self._tree = cKDTree(self._project(self.lats, self.lons))
+        self._solutions = TTLCache(maxsize=64)
+
+    def _project(self, lats, lons) -> np.ndarray:
+        """Equirectangular projection to kilometers, centred on the tracts."""
+        return np.column_stack([
+            np.radians(np.asarray(lons, dtype=float)) * self._cos_lat0 * EARTH_RADIUS_KM,
+            np.radians(np.asarray(lats, dtype=float)) * EARTH_RADIUS_KM
+        ])
+
+    def edges(self, lats, lons):
+        """
+        Tract-to-site pairs within the assignment radius.
+
+        Args:
+            lats, lons: Site coordinates
+
+        Returns:
+            Tuple of (tract positions, site positions, distances in km) arrays
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        if len(lats) == 0 or len(self.demand) == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0)
+
+        # Small slack on the projected search; exact distances filter afterwards
+        hits = self._tree.query_ball_point(self._project(lats, lons), self.radius_km * 1.01,
+                                           return_sorted=False)
+        sites = np.repeat(np.arange(len(hits)), [len(tracts) for tracts in hits])
+        tracts = np.concatenate([np.asarray(tracts, dtype=np.intp) for tracts in hits])
+        distances = haversine_pairwise(self.lats[tracts], self.lons[tracts], lats[sites], lons[sites])
+        within = distances <= self.radius_km
+        return tracts[within], sites[within], distances[within]
+
+    def assign(self, lats, lons, capacity) -> Dict[str, np.ndarray]:
+        """
+        Assign every tract's demand to sites within reach.
+
+        Serving as many people as possible comes first; among those
+        assignments the one with the least total person-distance wins.
+
+        Args:
+            lats, lons: Site coordinates
+            capacity: Beds at each site
+
+        Returns:
+            Dict with 'unmet' (per tract), 'assigned' (per tract), 'load'
+            (per site), 'person_km' (total) and 'flows', a DataFrame of
+            tract, site, distance_km and people for every used edge
+        """
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        capacity = np.atleast_1d(np.asarray(capacity, dtype=float))
+
+        key = (lats.tobytes(), lons.tobytes(), capacity.tobytes())
+        solution = self._solutions.get(key)
+        if solution is None:
+            solution = self._solve(lats, lons, capacity)
+            self._solutions.put(key, solution)
+        return solution
+
+    def relief(self, lats, lons, capacity, sites=None) -> np.ndarray:
+        """
+        How much the total unmet demand grows when each given site is removed.
+
+        Equal to re-solving the assignment without the site, but computed
+        from the optimal assignment with all sites: the site's load, minus
+        the people a max flow over the residual graph (spare beds elsewhere,
+        and reroutes along the current flows) can move to the other sites.
+
+        Args:
+            lats, lons: Site coordinates
+            capacity: Beds at each site; counts are rounded to whole people
+            sites: Positions of the sites to assess, all sites when None
+
+        Returns:
+            Array with the relief of each assessed site
+        """
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import maximum_flow
+
+        lats = np.atleast_1d(np.asarray(lats, dtype=float))
+        lons = np.atleast_1d(np.asarray(lons, dtype=float))
+        capacity = np.atleast_1d(np.asarray(capacity, dtype=float))
+        sites = np.arange(len(lats)) if sites is None else np.atleast_1d(np.asarray(sites, dtype=np.intp))
+        solution = self.assign(lats, lons, capacity)
+        if len(sites) == 0:
+            return np.empty(0)
+
+        n_tracts, n_sites = len(self.demand), len(lats)
+        tracts, edge_sites, _ = self.edges(lats, lons)
+        edge_codes = pd.Index(tracts.astype(np.int64) * n_sites + edge_sites)
+        used = solution['flows']
+        flows = np.zeros(len(tracts), dtype=np.int64)
+        flows[edge_codes.get_indexer(used['tract'].to_numpy(np.int64) * n_sites + used['site'].to_numpy())] = \
+            np.round(used['people'].to_numpy())
+        unmet = np.round(solution['unmet']).astype(np.int64)
+        spare = np.round(capacity - solution['load']).astype(np.int64)
+        load = np.bincount(edge_sites, weights=flows, minlength=n_sites).astype(np.int64)
+
+        # Nodes: source, tracts, sites, sink. Tract -> site edges are uncapacitated.
+        source, sink = 0, n_tracts + n_sites + 1
+        tract_nodes, site_nodes = 1 + tracts, 1 + n_tracts + edge_sites
+        unbounded = int(self.demand.sum()) + 1
+        relief = np.zeros(len(sites))
+        for k, site in enumerate(sites):
+            if load[site] == 0:
+                continue
+            # Residual graph of the assignment with this site's flows taken out
+            freed = np.bincount(tracts[edge_sites == site], weights=flows[edge_sites == site],
+                                minlength=n_tracts).astype(np.int64)
+            supply = unmet + freed
+            kept = edge_sites != site
+            backward = kept & (flows > 0)
+            site_spare = spare.copy()
+            site_spare[site] = 0
+            rows = np.concatenate([np.zeros(n_tracts, dtype=np.int64), tract_nodes[kept],
+                                   site_nodes[backward], 1 + n_tracts + np.arange(n_sites)])
+            columns = np.concatenate([1 + np.arange(n_tracts), site_nodes[kept],
+                                      tract_nodes[backward], np.full(n_sites, sink)])
+            residual = np.concatenate([supply, np.full(kept.sum(), unbounded),
+                                       flows[backward], site_spare])
+            nonzero = residual > 0
+            graph = csr_matrix((residual[nonzero].astype(np.int32), (rows[nonzero], columns[nonzero])),
+                               shape=(sink + 1, sink + 1))
+            rerouted = maximum_flow(graph, source, sink).flow_value
+            relief[k] = load[site] - rerouted
+        return relief
+
+    def _solve(self, lats: np.ndarray, lons: np.ndarray, capacity: np.ndarray) -> Dict:
+        from scipy.optimize import linprog
+        from scipy.sparse import csr_matrix, hstack, identity
+
+        n_tracts, n_sites = len(self.demand), len(lats)
+        tracts, sites, distances = self.edges(lats, lons)
+        n_edges = len(tracts)
+        flows = np.zeros(n_edges)
+
+        if n_edges and capacity.sum() > 0:
+            # Variables: people on each edge, then unmet demand per tract. Serving
+            # one more person can reroute others along a chain using each site at
+            # most once, so a penalty above that chain's length makes serving win.
+            edge_columns = np.arange(n_edges)
+            tract_rows = csr_matrix((np.ones(n_edges), (tracts, edge_columns)), shape=(n_tracts, n_edges))
+            site_rows = csr_matrix((np.ones(n_edges), (sites, edge_columns)), shape=(n_sites, n_edges))
+            penalty = self.radius_km * (min(n_tracts, n_sites) + 1)
+
+            result = linprog(
+                np.concatenate([distances, np.full(n_tracts, penalty)]),
+                A_ub=hstack([site_rows, csr_matrix((n_sites, n_tracts))]),
+                b_ub=capacity,
+                A_eq=hstack([tract_rows, identity(n_tracts)]),
+                b_eq=self.demand,
+                bounds=(0, None),
+                # Interior point with crossover is faster here than simplex and
+                # still ends on a vertex, i.e. an integral assignment
+                method='highs-ipm'
+            )
+            if not result.success:
+                raise RuntimeError(f"Shelter assignment failed: {result.message}")
+            flows = np.round(result.x[:n_edges], 6)
+
+        assigned = np.bincount(tracts, weights=flows, minlength=n_tracts)
+        used = flows > 0
+        return {
+            'unmet': self.demand - assigned,
+            'assigned': assigned,
+            'load': np.bincount(sites, weights=flows, minlength=n_sites),
+            'person_km': float(flows @ distances),
+            'flows': pd.DataFrame({
+                'tract': tracts[used],
+                'site': sites[used],
+                'distance_km': distances[used],
+                'people': flows[used]
+            })
+        }
+
+
+def assess_proposed_sites(engine: AssignmentEngine, shelters: pd.DataFrame,
+                          proposed_sites: Optional[List[Dict]] = None, basis: str = 'total',
+                          proposed_capacity: float = PROPOSED_SITE_CAPACITY) -> Dict:
+    """
+    Unmet demand with existing shelters alone and with the proposed sites.
+
+    A proposed site's relief is how much the total unmet demand would grow
+    without it, all other proposed sites kept (see AssignmentEngine.relief()).
+
+    Args:
+        engine: AssignmentEngine for the tract dataset
+        shelters: Existing shelters with 'Capacity' and 'Current Occupancy'
+        proposed_sites: Proposed sites with 'lat' and 'lon', or None
+        basis: Shelter capacity basis, see shelter_capacity()
+        proposed_capacity: Beds at each proposed site
+
+    Returns:
+        Dict with 'tracts' (Tract ID, Unhoused Count, Unmet (Existing),
+        Unmet (With Proposed), Relieved), 'shelters' (Shelter Name, Capacity
+        Offered, Assigned, Spare Beds), 'sites' (Site, Capacity, Assigned,
+        Overflow Relieved) DataFrames and the unmet totals
+        'unmet_existing' and 'unmet_proposed'
+    """
+    proposed_sites = proposed_sites or []
+    lats, lons = site_coordinates(shelters, proposed_sites)
+    n_shelters = len(lats) - len(proposed_sites)
+    capacity = np.concatenate([shelter_capacity(shelters, basis),
+                               np.full(len(proposed_sites), float(proposed_capacity))])
+
+    existing = engine.assign(lats[:n_shelters], lons[:n_shelters], capacity[:n_shelters])
+    combined = engine.assign(lats, lons, capacity) if proposed_sites else existing
+
+    relief = engine.relief(lats, lons, capacity, np.arange(n_shelters, len(lats)))
+
+    load = combined['load']
+    return {
+        'tracts': pd.DataFrame({
+            'Tract ID': engine.tract_ids,
+            'Unhoused Count': engine.demand,
+            'Unmet (Existing)': existing['unmet'],
+            'Unmet (With Proposed)': combined['unmet'],
+            'Relieved': existing['unmet'] - combined['unmet']
+        }),
+        'shelters': pd.DataFrame({
+            'Shelter Name': shelters['Shelter Name'].to_numpy() if 'Shelter Name' in shelters
+            else np.arange(1, n_shelters + 1),
+            'Capacity Offered': capacity[:n_shelters],
+            'Assigned': load[:n_shelters],
+            'Spare Beds': capacity[:n_shelters] - load[:n_shelters]
+        }),
+        'sites': pd.DataFrame({
+            'Site': np.arange(1, len(proposed_sites) + 1),
+            'Capacity': capacity[n_shelters:],
+            'Assigned': load[n_shelters:],
+            'Overflow Relieved': np.asarray(relief, dtype=float)
+        }),
+        'unmet_existing': float(existing['unmet'].sum()),
+        'unmet_proposed': float(combined['unmet'].sum())
+    }
+
+
+def get_assignment_engine(tracts: pd.DataFrame, data_version: Hashable) -> AssignmentEngine:
+    """
+    AssignmentEngine for a tract dataset, built once per data version.
+
+    Args:
+        tracts: Census tracts
+        data_version: Version of the tract data, e.g. data_loading.dataset_version()
+
+    Returns:
+        AssignmentEngine
+    """
+    engine = _engine_cache.get(data_version)
+    if engine is None:
+        engine = AssignmentEngine(tracts)
+        _engine_cache.put(data_version, engine)
+    return engine
@@ -0,0 +1,224 @@
+"""
+Choosing new shelter sites that cover the most unhoused people.
+
+This is the maximum coverage location problem over the tract sample points
+of a CoverageEngine: pick K candidate sites so that the unhoused population
+within 1 mile of a site (and not already covered by an existing shelter) is
+largest. The candidate-to-sample coverage is computed once as a sparse
+matrix. The default solver is lazy greedy: coverage is submodular, so a
+candidate's gain can only shrink as sites are chosen, and a priority queue
+of stale gains only needs the top entry refreshed each round. Greedy is
+within (1 - 1/e) of optimal; an exact integer program solved with HiGHS
+(scipy.optimize.milp) is available for smaller instances.
+"""
+
+import heapq
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .coverage import CoverageEngine
+
+logger = logging.getLogger(__name__)
+
+
+class SiteSelector:
+    """
+    Maximum-coverage site selection over a pool of candidate sites.
+    """
+
+    def __init__(self, engine: CoverageEngine, candidate_lats: Sequence[float],
+                 candidate_lons: Sequence[float], base_lats: Sequence[float] = (),
+                 base_lons: Sequence[float] = ()):
+        """
+        Initialize the selector and compute what every candidate covers.
+
+        Args:
+            engine: CoverageEngine for the tract dataset
+            candidate_lats, candidate_lons: Candidate site coordinates
+            base_lats, base_lons: Existing sites (shelters); what they cover
+                doesn't count towards any candidate's gain
+        """
+        from scipy.sparse import csr_matrix
+
+        self.engine = engine
+        self.candidate_lats = np.asarray(candidate_lats, dtype=float)
+        self.candidate_lons = np.asarray(candidate_lons, dtype=float)
+
+        # Unhoused people each sample point stands for
+        self.sample_values = engine.sample_weights * engine.unhoused[engine.sample_tracts]
+        self.base_covered = engine.covered_mask(base_lats, base_lons)
+
+        hits = engine.samples_within(self.candidate_lats, self.candidate_lons)
+        indptr = np.zeros(len(hits) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(samples) for samples in hits])
+        indices = np.concatenate(hits) if hits else np.empty(0, dtype=np.intp)
+        self.coverage = csr_matrix((np.ones(len(indices)), indices, indptr),
+                                   shape=(len(hits), len(engine.sample_xy)))
+
+    def __len__(self) -> int:
+        return len(self.candidate_lats)
+
+    def _gain(self, candidate: int, uncovered_values: np.ndarray) -> float:
+        start, stop = self.coverage.indptr[candidate], self.coverage.indptr[candidate + 1]
+        return float(uncovered_values[self.coverage.indices[start:stop]].sum())
+
+    def _result(self, chosen, gains) -> pd.DataFrame:
+        chosen = np.asarray(chosen, dtype=np.intp)
+        gains = np.asarray(gains, dtype=float)
+        base = float(self.sample_values[self.base_covered].sum())
+        return pd.DataFrame({
+            'candidate': chosen,
+            'latitude': self.candidate_lats[chosen],
+            'longitude': self.candidate_lons[chosen],
+            'marginal_gain': gains,
+            'covered_unhoused': base + np.cumsum(gains)
+        })
+
+    def greedy(self, k: int) -> pd.DataFrame:
+        """
+        Choose up to k sites with lazy greedy.
+
+        Args:
+            k: Number of sites to choose
+
+        Returns:
+            DataFrame of chosen sites in selection order with candidate
+            position, latitude, longitude, marginal_gain and the running
+            covered_unhoused total (including existing shelters)
+        """
+        uncovered_values = np.where(self.base_covered, 0.0, self.sample_values)
+        initial = self.coverage @ uncovered_values
+
+        # Max-heap of (negated, possibly stale gain, candidate); ties go to the lower position
+        heap = [(-gain, candidate) for candidate, gain in enumerate(initial) if gain > 0]
+        heapq.heapify(heap)
+
+        chosen, gains = [], []
+        while heap and len(chosen) < k:
+            _, candidate = heapq.heappop(heap)
+            gain = self._gain(candidate, uncovered_values)
+            if heap and gain < -heap[0][0]:
+                # Stale: another candidate may now be better
+                if gain > 0:
+                    heapq.heappush(heap, (-gain, candidate))
+                continue
+            if gain <= 0:
+                # Everything left covers nothing new
+                continue
+
+            chosen.append(candidate)
+            gains.append(gain)
+            start, stop = self.coverage.indptr[candidate], self.coverage.indptr[candidate + 1]
+            uncovered_values[self.coverage.indices[start:stop]] = 0.0
+
+        return self._result(chosen, gains)
+
+    def solve_ilp(self, k: int, time_limit: Optional[float] = None) -> pd.DataFrame:
+        """
+        Choose k sites optimally with an integer program (HiGHS via SciPy).
+
+        Maximizes the value of covered samples subject to choosing k sites,
+        where a sample counts as covered only if a chosen site covers it.
+        Only samples some candidate covers and no existing shelter covers
+        enter the model, merged by the set of candidates covering them.
+
+        Args:
+            k: Number of sites to choose
+            time_limit: Solver time limit in seconds, or None
+
+        Returns:
+            DataFrame like greedy(), ordered by marginal gain
+        """
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import diags, hstack
+
+        reachable = np.flatnonzero((self.coverage.getnnz(axis=0) > 0) & ~self.base_covered)
+        coverage = self.coverage[:, reachable].T.tocsr()  # samples x candidates
+        coverage.sort_indices()
+
+        # Samples covered by exactly the same candidates share one variable
+        keys = [coverage.indices[coverage.indptr[i]:coverage.indptr[i + 1]].tobytes()
+                for i in range(coverage.shape[0])]
+        groups = pd.factorize(pd.Series(keys))[0]
+        _, first = np.unique(groups, return_index=True)
+        coverage = coverage[first]
+        values = np.bincount(groups, weights=self.sample_values[reachable])
+        n_candidates, n_samples = len(self), len(first)
+
+        # Variables: x (site chosen) for each candidate, then y (sample group covered)
+        objective = np.concatenate([np.zeros(n_candidates), -values])
+        covered_by_chosen = LinearConstraint(hstack([-coverage, diags(np.ones(n_samples))]), -np.inf, 0)
+        site_count = LinearConstraint(np.concatenate([np.ones(n_candidates), np.zeros(n_samples)]), 0, k)
+
+        result = milp(
+            objective,
+            constraints=[covered_by_chosen, site_count],
+            integrality=np.concatenate([np.ones(n_candidates), np.zeros(n_samples)]),
+            bounds=Bounds(0, 1),
+            options={'time_limit': time_limit} if time_limit else None
+        )
+        if result.x is None:
+            raise RuntimeError(f"ILP site selection failed: {result.message}")
+        if not result.success:
+            logger.warning(f"ILP site selection stopped early: {result.message}")
+
+        chosen = np.flatnonzero(result.x[:n_candidates] > 0.5)
+        return self._ordered(chosen)
+
+    def _ordered(self, chosen: np.ndarray) -> pd.DataFrame:
+        """Order a chosen set greedily and compute each site's marginal gain."""
+        uncovered_values = np.where(self.base_covered, 0.0, self.sample_values)
+        remaining = list(chosen)
+        order, gains = [], []
+        while remaining:
+            candidate_gains = [self._gain(candidate, uncovered_values) for candidate in remaining]
+            best = int(np.argmax(candidate_gains))
+            candidate = remaining.pop(best)
+            order.append(candidate)
+            gains.append(candidate_gains[best])
+            start, stop = self.coverage.indptr[candidate], self.coverage.indptr[candidate + 1]
+            uncovered_values[self.coverage.indices[start:stop]] = 0.0
+        return self._result(order, gains)
+
+
+def select_sites(engine: CoverageEngine, candidates: pd.DataFrame, k: int,
+                 shelters: Optional[pd.DataFrame] = None,
+                 proposed_sites: Optional[List[Dict]] = None, method: str = 'greedy',
+                 time_limit: Optional[float] = None) -> pd.DataFrame:
+    """
+    Choose the k candidate sites that newly cover the most unhoused people.
+
+    Args:
+        engine: CoverageEngine for the tract dataset
+        candidates: Candidate sites with coordinate columns
+        k: Number of sites to choose
+        shelters: Existing shelters, whose coverage is already counted
+        proposed_sites: Sites already proposed ('lat' and 'lon'), counted like shelters
+        method: 'greedy' (lazy greedy) or 'ilp' (exact, HiGHS)
+        time_limit: ILP time limit in seconds
+
+    Returns:
+        The chosen rows of candidates, in selection order, with
+        marginal_gain and covered_unhoused columns added
+    """
+    from .coverage import site_coordinates
+    from .spatial_index import coordinate_columns
+
+    lat_column, lon_column = coordinate_columns(candidates)
+    selector = SiteSelector(engine, candidates[lat_column], candidates[lon_column],
+                            *site_coordinates(shelters, proposed_sites))
+
+    if method == 'greedy':
+        result = selector.greedy(k)
+    elif method == 'ilp':
+        result = selector.solve_ilp(k, time_limit)
+    else:
+        raise ValueError(f"Unknown selection method '{method}'. Use 'greedy' or 'ilp'.")
+
+    chosen = candidates.iloc[result['candidate'].to_numpy()].copy()
+    chosen['marginal_gain'] = result['marginal_gain'].to_numpy()
+    chosen['covered_unhoused'] = result['covered_unhoused'].to_numpy()
+    return chosen
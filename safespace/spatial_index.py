@@ -0,0 +1,356 @@
+"""
+Nearest-neighbor indexes over latitude/longitude anchor points.
+
+Used by the site scorer to find the nearest anchor (transit stop, clinic,
+infrastructure hub, ...) for many candidate locations. Indexes are built once
+and answer each lookup in O(log n) instead of scanning every anchor.
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371
+
+# Latitude/longitude column pairs recognized in input DataFrames
+COORDINATE_COLUMNS = (('latitude', 'longitude'), ('Latitude', 'Longitude'), ('lat', 'lon'))
+
+# Anchor count below which a brute-force scan beats building a tree
+BRUTE_FORCE_MAX_ANCHORS = 64
+
+# Distance matrix cells per brute-force pass; bounds the (candidates x anchors)
+# matrix size to a few tens of megabytes
+BRUTE_FORCE_MAX_CELLS = 2_000_000
+
+
+def haversine_matrix(lats: np.ndarray, lons: np.ndarray,
+                     anchor_lats: np.ndarray, anchor_lons: np.ndarray) -> np.ndarray:
+    """
+    Vectorized great circle distances between every candidate and every anchor.
+
+    Args:
+        lats, lons: Arrays of candidate latitudes and longitudes, shape (n,)
+        anchor_lats, anchor_lons: Arrays of anchor latitudes and longitudes, shape (m,)
+
+    Returns:
+        Array of distances in kilometers, shape (n, m)
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=float))[:, np.newaxis]
+    lon1 = np.radians(np.asarray(lons, dtype=float))[:, np.newaxis]
+    lat2 = np.radians(np.asarray(anchor_lats, dtype=float))[np.newaxis, :]
+    lon2 = np.radians(np.asarray(anchor_lons, dtype=float))[np.newaxis, :]
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_pairwise(lats: np.ndarray, lons: np.ndarray,
+                       other_lats: np.ndarray, other_lons: np.ndarray) -> np.ndarray:
+    """
+    Great circle distances between matching pairs of points.
+
+    Args:
+        lats, lons: Arrays of latitudes and longitudes
+        other_lats, other_lons: Arrays of latitudes and longitudes, broadcastable
+            against lats and lons
+
+    Returns:
+        Array of distances in kilometers with the broadcast shape
+    """
+    lat1 = np.radians(np.asarray(lats, dtype=float))
+    lon1 = np.radians(np.asarray(lons, dtype=float))
+    lat2 = np.radians(np.asarray(other_lats, dtype=float))
+    lon2 = np.radians(np.asarray(other_lons, dtype=float))
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+class NearestNeighborIndex:
+    """
+    Base class for nearest-anchor lookups.
+
+    Subclasses index a fixed set of anchors at construction time and answer
+    query() for arrays of candidate locations.
+    """
+
+    def __init__(self, anchor_lats: np.ndarray, anchor_lons: np.ndarray):
+        """
+        Initialize the index.
+
+        Args:
+            anchor_lats, anchor_lons: Arrays of anchor latitudes and longitudes
+        """
+        self.anchor_lats = np.asarray(anchor_lats, dtype=float)
+        self.anchor_lons = np.asarray(anchor_lons, dtype=float)
+        if len(self.anchor_lats) == 0:
+            raise ValueError("Cannot build a nearest-neighbor index without anchors")
+
+    def __len__(self) -> int:
+        return len(self.anchor_lats)
+
+    def query(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the nearest anchor for every candidate.
+
+        Args:
+            lats, lons: Arrays of candidate latitudes and longitudes, shape (n,)
+
+        Returns:
+            Tuple of (distances in kilometers, anchor positions), each shape (n,)
+        """
+        raise NotImplementedError
+
+
+class BruteForceIndex(NearestNeighborIndex):
+    """Exact haversine scan over every anchor, in bounded chunks."""
+
+    def query(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        distances = np.empty(len(lats))
+        positions = np.empty(len(lats), dtype=np.intp)
+
+        chunk_size = max(1, BRUTE_FORCE_MAX_CELLS // len(self))
+        for start in range(0, len(lats), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            matrix = haversine_matrix(lats[chunk], lons[chunk], self.anchor_lats, self.anchor_lons)
+            positions[chunk] = matrix.argmin(axis=1)
+            distances[chunk] = matrix[np.arange(len(matrix)), positions[chunk]]
+
+        return distances, positions
+
+
+class BallTreeIndex(NearestNeighborIndex):
+    """Exact haversine nearest neighbor using scikit-learn's BallTree."""
+
+    def __init__(self, anchor_lats: np.ndarray, anchor_lons: np.ndarray):
+        super().__init__(anchor_lats, anchor_lons)
+        from sklearn.neighbors import BallTree
+
+        self._tree = BallTree(
+            np.radians(np.column_stack([self.anchor_lats, self.anchor_lons])),
+            metric='haversine'
+        )
+
+    def query(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(lats) == 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+
+        points = np.radians(np.column_stack([np.asarray(lats, dtype=float),
+                                             np.asarray(lons, dtype=float)]))
+        distances, positions = self._tree.query(points, k=1)
+
+        return distances[:, 0] * EARTH_RADIUS_KM, positions[:, 0]
+
+
+class KDTreeIndex(NearestNeighborIndex):
+    """
+    Nearest neighbor using SciPy's cKDTree on locally projected coordinates.
+
+    Points are projected with an equirectangular projection centred on the
+    anchors, and the few nearest projected neighbors are re-ranked by
+    haversine distance. The projection stretches east-west distances by at
+    most cos(lat0) / cos(lat) over the latitudes involved, so an anchor
+    outside those neighbors is at least the last neighbor's projected
+    distance divided by that stretch away. When that doesn't rule out a
+    closer anchor, every anchor within the best distance times the stretch
+    is re-ranked; candidates the bound doesn't hold for (far from every
+    anchor, or near the poles or antimeridian) get an exact scan. The result
+    matches BruteForceIndex.
+    """
+
+    # Projected neighbors re-ranked by haversine distance
+    RERANK_NEIGHBORS = 4
+
+    # Relative margin on the projection's distortion bound, covering the
+    # difference between great circles and the local flat metric
+    DISTORTION_SLACK = 1e-3
+
+    # Nearest-anchor distance beyond which the distortion bound isn't trusted
+    BOUNDED_MAX_KM = 300.0
+
+    def __init__(self, anchor_lats: np.ndarray, anchor_lons: np.ndarray):
+        super().__init__(anchor_lats, anchor_lons)
+        from scipy.spatial import cKDTree
+
+        self._cos_lat0 = np.cos(np.radians(self.anchor_lats.mean()))
+        self._max_abs_lat = np.abs(self.anchor_lats).max()
+        self._tree = cKDTree(self._project(self.anchor_lats, self.anchor_lons))
+        self._exact = BruteForceIndex(self.anchor_lats, self.anchor_lons)
+
+    def _project(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return np.column_stack([
+            np.radians(np.asarray(lons, dtype=float)) * self._cos_lat0 * EARTH_RADIUS_KM,
+            np.radians(np.asarray(lats, dtype=float)) * EARTH_RADIUS_KM
+        ])
+
+    def _query_within(self, lats: np.ndarray, lons: np.ndarray,
+                      radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Nearest anchor by haversine among every anchor within a projected radius."""
+        hits = self._tree.query_ball_point(self._project(lats, lons), radius * (1 + 1e-9),
+                                           return_sorted=False)
+        rows = np.repeat(np.arange(len(hits)), [len(row) for row in hits])
+        anchors = np.concatenate([np.asarray(row, dtype=np.intp) for row in hits])
+        distances = haversine_pairwise(lats[rows], lons[rows],
+                                       self.anchor_lats[anchors], self.anchor_lons[anchors])
+        # Rows in order, nearest first within each row
+        order = np.lexsort((distances, rows))
+        first = np.searchsorted(rows[order], np.arange(len(hits)))
+        return distances[order][first], anchors[order][first]
+
+    def query(self, lats: np.ndarray, lons: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if len(lats) == 0:
+            return np.empty(0), np.empty(0, dtype=np.intp)
+
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        k = min(self.RERANK_NEIGHBORS, len(self))
+        projected, neighbors = self._tree.query(self._project(lats, lons), k=k)
+        projected = np.asarray(projected).reshape(len(lats), k)
+        neighbors = np.asarray(neighbors, dtype=np.intp).reshape(len(lats), k)
+
+        distances = haversine_pairwise(lats[:, np.newaxis], lons[:, np.newaxis],
+                                       self.anchor_lats[neighbors], self.anchor_lons[neighbors])
+        best = distances.argmin(axis=1)
+        rows = np.arange(len(lats))
+        distances, positions = distances[rows, best], neighbors[rows, best]
+
+        if k < len(self):
+            # Largest projected / true distance ratio over the latitudes involved
+            cos_min = np.cos(np.radians(np.maximum(np.abs(lats), self._max_abs_lat)))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                stretch = np.maximum(1.0, self._cos_lat0 / cos_min) * (1 + self.DISTORTION_SLACK)
+                reach_deg = np.degrees(distances * stretch / (EARTH_RADIUS_KM * cos_min))
+            # Any closer anchor lies within best * stretch in projected space
+            radius = distances * stretch
+            bounded = ((cos_min > 0) & (distances <= self.BOUNDED_MAX_KM)
+                       & (np.abs(lons) + reach_deg < 180))
+            unsure = bounded & (projected[:, -1] < radius)
+            if unsure.any():
+                distances[unsure], positions[unsure] = self._query_within(lats[unsure], lons[unsure],
+                                                                          radius[unsure])
+            if not bounded.all():
+                distances[~bounded], positions[~bounded] = self._exact.query(lats[~bounded], lons[~bounded])
+
+        return distances, positions
+
+
+INDEX_TYPES = {
+    'brute': BruteForceIndex,
+    'balltree': BallTreeIndex,
+    'kdtree': KDTreeIndex
+}
+
+
+def build_index(anchor_lats: np.ndarray, anchor_lons: np.ndarray,
+                method: str = 'auto') -> NearestNeighborIndex:
+    """
+    Build a nearest-neighbor index over a set of anchors.
+
+    Args:
+        anchor_lats, anchor_lons: Arrays of anchor latitudes and longitudes
+        method: 'brute', 'balltree', 'kdtree' or 'auto'. 'auto' uses a brute-force
+            scan for small anchor sets and a KD-tree (or BallTree when SciPy is
+            unavailable) otherwise.
+
+    Returns:
+        NearestNeighborIndex over the anchors
+    """
+    if method == 'auto':
+        if len(anchor_lats) <= BRUTE_FORCE_MAX_ANCHORS:
+            return BruteForceIndex(anchor_lats, anchor_lons)
+        for fallback in ('kdtree', 'balltree'):
+            try:
+                return INDEX_TYPES[fallback](anchor_lats, anchor_lons)
+            except ImportError:
+                logger.info(f"{fallback} index unavailable, trying the next option")
+        return BruteForceIndex(anchor_lats, anchor_lons)
+
+    if method not in INDEX_TYPES:
+        raise ValueError(f"Unknown index method '{method}', expected one of "
+                         f"{['auto'] + list(INDEX_TYPES)}")
+    return INDEX_TYPES[method](anchor_lats, anchor_lons)
+
+
+def coordinate_columns(df: pd.DataFrame) -> Tuple[str, str]:
+    """
+    Find the latitude and longitude columns of a DataFrame.
+
+    Args:
+        df: DataFrame with one of the COORDINATE_COLUMNS pairs
+
+    Returns:
+        Tuple of (latitude column, longitude column)
+    """
+    for lat_col, lon_col in COORDINATE_COLUMNS:
+        if lat_col in df.columns and lon_col in df.columns:
+            return lat_col, lon_col
+    raise ValueError("DataFrame needs latitude/longitude columns")
+
+
+class TractResolver:
+    """
+    Maps locations to census tracts through a prebuilt spatial index.
+
+    When the tract data carries polygon geometries (a 'geometry' column of
+    shapely polygons), a location resolves to the tract containing it; locations
+    outside every polygon, and tract data with only centroid coordinates,
+    resolve to the tract with the nearest centroid.
+    """
+
+    def __init__(self, tracts: pd.DataFrame, method: str = 'auto'):
+        """
+        Initialize the resolver.
+
+        Args:
+            tracts: DataFrame with one row per tract and centroid latitude/longitude
+                columns, optionally with a 'geometry' column of polygons
+            method: Nearest-neighbor index method (see build_index)
+        """
+        lat_col, lon_col = coordinate_columns(tracts)
+        self.centroid_index = build_index(tracts[lat_col].to_numpy(dtype=float),
+                                          tracts[lon_col].to_numpy(dtype=float), method)
+
+        self.polygon_tree = None
+        if 'geometry' in tracts.columns:
+            from shapely.strtree import STRtree
+
+            self.polygon_tree = STRtree(np.asarray(tracts['geometry'], dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.centroid_index)
+
+    def resolve(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """
+        Resolve every location to a tract with one index query per batch.
+
+        Args:
+            lats, lons: Arrays of latitudes and longitudes, shape (n,)
+
+        Returns:
+            Array of tract positions (row numbers into the tract data), shape (n,)
+        """
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        _, positions = self.centroid_index.query(lats, lons)
+
+        if self.polygon_tree is not None and len(lats):
+            from shapely import points
+
+            location_idx, tract_idx = self.polygon_tree.query(points(lons, lats), predicate='within')
+            positions[location_idx] = tract_idx
+
+        return positions
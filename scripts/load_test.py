@@ -0,0 +1,130 @@
+"""
+Load test for the local scoring service.
+
+Usage:
+    python scripts/load_test.py [--spawn] [--port 8090] [--endpoint score]
+        [--concurrency 32] [--requests 2000] [--sites 1] [--batch-window-ms 1]
+
+Each of --concurrency client threads keeps one keep-alive connection open
+and sends requests of --sites random San Jose sites back to back. Reports
+throughput and client-side p50/p99 latency, then the server's /metrics
+(its own latency percentiles and how many requests each batch held).
+With --spawn the service is started on localhost for the run, with the
+given --batch-window-ms; otherwise it must already be running.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# San Jose bounding box (lat_min, lat_max, lon_min, lon_max)
+BOUNDS = (37.20, 37.47, -122.05, -121.72)
+
+
+def request(connection: http.client.HTTPConnection, method: str, path: str, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else None
+    headers = {'Content-Type': 'application/json'} if body else {}
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    data = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{method} {path}: HTTP {response.status} {data[:200]!r}")
+    return json.loads(data)
+
+
+def wait_until_healthy(host: str, port: int, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            request(http.client.HTTPConnection(host, port, timeout=1), 'GET', '/health')
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Service on {host}:{port} did not come up")
+            time.sleep(0.2)
+
+
+def client(host: str, port: int, path: str, payloads, latencies, errors) -> None:
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    for payload in payloads:
+        start = time.perf_counter()
+        try:
+            request(connection, 'POST', path, payload)
+            latencies.append(time.perf_counter() - start)
+        except (OSError, RuntimeError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            connection = http.client.HTTPConnection(host, port, timeout=30)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--endpoint', choices=('score', 'feasibility'), default='score')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sites', type=int, default=1, help='Sites per request')
+    parser.add_argument('--spawn', action='store_true', help='Start the service for this run')
+    parser.add_argument('--batch-window-ms', type=float, default=1.0,
+                        help='Batch window of the spawned service')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'safespace', 'serve', '--host', args.host, '--port', str(args.port),
+             '--batch-window-ms', str(args.batch_window_ms)],
+            cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    try:
+        wait_until_healthy(args.host, args.port)
+
+        rng = np.random.default_rng(args.seed)
+        payloads = [{'sites': [{'lat': lat, 'lon': lon} for lat, lon in
+                               zip(rng.uniform(BOUNDS[0], BOUNDS[1], args.sites),
+                                   rng.uniform(BOUNDS[2], BOUNDS[3], args.sites))]}
+                    for _ in range(args.requests)]
+
+        latencies, errors = [], []
+        threads = [threading.Thread(target=client,
+                                    args=(args.host, args.port, f"/{args.endpoint}",
+                                          payloads[i::args.concurrency], latencies, errors))
+                   for i in range(args.concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (np.nan, np.nan)
+        print(f"{args.requests:,} /{args.endpoint} requests x {args.sites} sites, "
+              f"{args.concurrency} concurrent clients")
+        print(f"throughput: {len(latencies) / elapsed:,.0f} requests/s "
+              f"({len(latencies) * args.sites / elapsed:,.0f} sites/s), {len(errors)} errors")
+        print(f"client latency: p50 {p50:.1f} ms, p99 {p99:.1f} ms")
+
+        metrics = request(http.client.HTTPConnection(args.host, args.port, timeout=5), 'GET', '/metrics')
+        print("server metrics:")
+        print(json.dumps({'endpoints': metrics['endpoints'], 'batching': metrics['batching'],
+                          'batch_window_ms': metrics['batch_window_ms']}, indent=2))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Build the hazard layers read by evaluate_feasibility.
+
+Usage:
+    python scripts/make_hazard_layers.py --flood-zone flood.tif --soil-class soil.tif --dem dem.tif
+    python scripts/make_hazard_layers.py --flood-zone flood_zones.shp --soil-class liquefaction.geojson \
+        --extent county_boundary.geojson
+    python scripts/make_hazard_layers.py --mock [--resolution 0.0002]
+
+Real layers are converted from GeoTIFFs (needs rasterio) into memory-mappable
+.npy/.json pairs, and the slope layer is derived from the DEM. Flood-zone and
+soil polygons are written as WGS84 GeoJSON (formats other than GeoJSON need
+geopandas); a 'value' property, if present, carries each polygon's soil
+class or flood flag. A site outside every polygon counts as outside the
+hazard; --extent limits that to a boundary such as the county's, outside
+which sites fall back to the placeholder rules. --mock writes synthetic San Jose layers instead: a DEM
+rising into the eastern foothills, flood zones along two creek corridors
+and the bay edge, and soil that is least stable near the bay and the
+creeks. Layers go to --output, by default the directory evaluate_feasibility
+reads (SAFESPACE_HAZARD_DIR).
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from safespace.hazard_layers import (EXTENT_FILE, HAZARD_DIR, METERS_PER_DEG_LAT,  # noqa: E402
+                                     METERS_PER_DEG_LON, PolygonLayer, RasterLayer,
+                                     convert_geotiff, slope_degrees)
+from safespace.scoring_grid import SAN_JOSE_BOUNDS  # noqa: E402
+
+# Mock creek centerlines as (lat, lon) vertices, south to north
+CREEKS = (
+    ((37.22, -121.88), (37.30, -121.90), (37.35, -121.905), (37.42, -121.93), (37.47, -121.95)),
+    ((37.22, -121.76), (37.30, -121.82), (37.36, -121.865), (37.42, -121.90), (37.47, -121.93))
+)
+
+# Flood zone width either side of a creek, in meters
+CREEK_FLOOD_M = 250
+
+
+def distance_to_polyline(lats: np.ndarray, lons: np.ndarray, vertices) -> np.ndarray:
+    """Approximate distance in meters from each point to a polyline."""
+    scale = np.array([METERS_PER_DEG_LAT, METERS_PER_DEG_LON * np.cos(np.radians(37.33))])
+    points = np.stack([lats, lons], axis=-1) * scale
+    best = np.full(lats.shape, np.inf)
+    for start, stop in zip(vertices[:-1], vertices[1:]):
+        a, b = np.array(start) * scale, np.array(stop) * scale
+        t = np.clip(((points - a) @ (b - a)) / ((b - a) @ (b - a)), 0, 1)
+        best = np.minimum(best, np.linalg.norm(points - (a + t[..., None] * (b - a)), axis=-1))
+    return best
+
+
+def remove_files(*paths: str) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def write_polygons(src_path: str, dst_path: str) -> None:
+    """Copy polygons to WGS84 GeoJSON."""
+    if src_path.lower().endswith(('.geojson', '.json')):
+        shutil.copyfile(src_path, dst_path)
+        return
+    import geopandas as gpd
+
+    frame = gpd.read_file(src_path)
+    if frame.crs is not None:
+        frame = frame.to_crs('EPSG:4326')
+    frame.to_file(dst_path, driver='GeoJSON')
+
+
+def mock_layers(output: str, resolution: float, seed: int) -> None:
+    lat_min, lat_max, lon_min, lon_max = SAN_JOSE_BOUNDS
+    rows = int(round((lat_max - lat_min) / resolution))
+    cols = int(round((lon_max - lon_min) / resolution))
+    # North-up: row 0 is the northern edge
+    transform = (resolution, 0.0, lon_min, 0.0, -resolution, lat_max)
+    lats = (lat_max - (np.arange(rows) + 0.5) * resolution)[:, None].repeat(cols, axis=1)
+    lons = (lon_min + (np.arange(cols) + 0.5) * resolution)[None, :].repeat(rows, axis=0)
+
+    rng = np.random.default_rng(seed)
+    foothills = np.clip((lons + 121.82) / 0.10, 0, None) ** 2 * 600
+    southern_hills = np.clip((37.26 - lats) / 0.06, 0, None) ** 2 * 400
+    bay = np.clip((lats - 37.40) / 0.07, 0, 1)
+    dem = (30 + 40 * (1 - bay) + foothills + southern_hills
+           + rng.normal(0, 0.5, (rows, cols))).astype(np.float32)
+
+    creek_distance = np.minimum.reduce([distance_to_polyline(lats, lons, creek) for creek in CREEKS])
+    flood = ((creek_distance < CREEK_FLOOD_M) | (bay > 0.8)).astype(np.uint8)
+
+    instability = 4 * bay + 2.5 * np.exp(-creek_distance / 400) + rng.normal(0, 0.3, (rows, cols))
+    soil = np.clip(np.round(instability), 0, 4).astype(np.uint8)
+
+    RasterLayer.write(os.path.join(output, 'flood_zone'), flood, transform)
+    RasterLayer.write(os.path.join(output, 'soil_class'), soil, transform)
+    with tempfile.TemporaryDirectory() as tmp:
+        RasterLayer.write(os.path.join(tmp, 'dem'), dem, transform)
+        slope_degrees(RasterLayer.open(os.path.join(tmp, 'dem')), os.path.join(output, 'slope'))
+    print(f"Wrote mock {rows}x{cols} hazard layers to {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--output', default=HAZARD_DIR)
+    parser.add_argument('--flood-zone', help='GeoTIFF nonzero inside flood zones, or flood-zone polygons')
+    parser.add_argument('--soil-class', help='GeoTIFF of soil instability classes (0-4), or class polygons')
+    parser.add_argument('--extent', help='Boundary polygons of the area the polygon layers describe')
+    parser.add_argument('--dem', help='GeoTIFF of elevation in meters; the slope layer is derived from it')
+    parser.add_argument('--mock', action='store_true', help='Write synthetic San Jose layers')
+    parser.add_argument('--resolution', type=float, default=0.0002, help='Mock pixel size in degrees')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    if args.mock:
+        mock_layers(args.output, args.resolution, args.seed)
+        return
+    if not (args.flood_zone or args.soil_class or args.dem or args.extent):
+        parser.error("give --mock or at least one of --flood-zone, --soil-class, --dem, --extent")
+
+    for name, path in (('flood_zone', args.flood_zone), ('soil_class', args.soil_class)):
+        if not path:
+            continue
+        stem = os.path.join(args.output, name)
+        # A raster takes precedence over polygons, so drop the other kind
+        if path.lower().endswith(('.tif', '.tiff')):
+            remove_files(f"{stem}.geojson")
+            layer = convert_geotiff(path, stem)
+            print(f"Converted {path} -> {name} ({layer.shape[0]}x{layer.shape[1]})")
+        else:
+            remove_files(f"{stem}.npy", f"{stem}.json")
+            write_polygons(path, f"{stem}.geojson")
+            layer = PolygonLayer.from_file(f"{stem}.geojson")
+            print(f"Converted {path} -> {name} ({len(layer.geometries):,} polygons)")
+    if args.extent:
+        write_polygons(args.extent, os.path.join(args.output, EXTENT_FILE))
+        print(f"Converted {args.extent} -> polygon layer extent")
+    if args.dem:
+        dem = convert_geotiff(args.dem, os.path.join(args.output, 'dem'))
+        slope_degrees(dem, os.path.join(args.output, 'slope'))
+        print(f"Derived slope from {args.dem} ({dem.shape[0]}x{dem.shape[1]})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Local stub of the Nominatim /search endpoint for exercising bulk geocoding offline.
+
+Usage:
+    python scripts/stub_geocoder.py [--port 8089] [--latency 0.2] [--miss unknown]
+        [--slow california --slow-latency 5]
+
+Every query resolves to a deterministic point inside San Jose derived from a
+hash of the query text, except queries containing the --miss substring, which
+return no results. Queries containing the --slow substring take --slow-latency
+seconds instead of --latency. Point BulkGeocoder(base_url='http://127.0.0.1:8089') at it.
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def make_handler(latency: float, miss: str, slow: Optional[str] = None, slow_latency: float = 0.0):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != '/search':
+                self.send_error(404)
+                return
+
+            query = parse_qs(url.query).get('q', [''])[0]
+            time.sleep(slow_latency if slow and slow in query.lower() else latency)
+
+            hits = []
+            if miss not in query.lower():
+                digest = hashlib.sha1(query.encode()).digest()
+                hits.append({
+                    'lat': str(37.25 + digest[0] / 255 * 0.15),
+                    'lon': str(-121.95 + digest[1] / 255 * 0.15),
+                    'display_name': f"{query} (stub)"
+                })
+
+            body = json.dumps(hits).encode()
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client timed out or cancelled a hedged variant and closed the connection
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds per request')
+    parser.add_argument('--miss', default='unknown', help='Queries containing this are not found')
+    parser.add_argument('--slow', help='Queries containing this take --slow-latency seconds')
+    parser.add_argument('--slow-latency', type=float, default=5.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port),
+                                 make_handler(args.latency, args.miss, args.slow, args.slow_latency))
+    print(f"Stub geocoder on http://{args.host}:{args.port}/search")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()